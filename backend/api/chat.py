@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.retriever_service import retriever_function
+from services.retriever_service import retriever_function_async, retriever_batch_async, stream_retriever_function
+from services.cache_service import query_cache
+from services.session_service import chat_sessions
+from config.settings import CHAT_BATCH_MAX_ITEMS
+from services.tracing_service import stream_timing
+from utils.utils import format_sse
 import logging
-from schemas.chat import ChatRequest, ChatResponse
+from schemas.chat import ChatRequest, ChatResponse, BatchChatRequest, BatchChatResponse, BatchChatResult
 
 # Initialize the APIRouter instance for the chat endpoint
 router = APIRouter()
@@ -15,28 +21,137 @@ async def chat_endpoint(request: ChatRequest):
     Endpoint to process chat queries and return answers with citations included.
 
     **Parameters**:
-    - `request` (ChatRequest): The request body that contains the user's query and an optional category.
+    - `request` (ChatRequest): The request body that contains the user's query, optional categories
+      (several categories are searched at once and answered in a single model call) and an optional
+      session ID (follow-up questions reuse the retrieved chunks and history of the session).
 
     **Returns**:
     - `ChatResponse`: A response containing the generated answer, which includes citations.
     """
     try:
-        # Log the incoming chat request message and category
-        logger.info(f"Chat request: {request.message} - Category: {request.category}")
+        # Log the incoming chat request message and categories
+        logger.info(f"Chat request: {request.message} - Categories: {request.category_filter()}")
         
-        # Call the retriever function to retrieve documents and generate an answer
-        result = retriever_function(
+        # Retrieve documents and generate an answer without blocking the event loop
+        result = await retriever_function_async(
             query=request.message,  # The message from the user
-            category=request.category  # The optional category to filter the documents
+            category=request.category_filter(),  # The optional categories to filter the documents
+            session_id=request.session_id,  # The optional chat session
+            follow_up=request.follow_up  # Whether the client marked the message as a follow-up
         )
         
         # Extract the 'answer' from the result, which contains both the answer and formatted citations
         answer_text = result.get("answer", "")
         
         # Return the response in the ChatResponse format
-        return ChatResponse(response=answer_text)
+        return ChatResponse(response=answer_text, session_id=request.session_id)
         
     except Exception as e:
         # If any error occurs, log it and raise an HTTP exception with a 500 status code
         logger.exception("Error in /chat endpoint")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streaming variant of `/chat` that sends the answer as server-sent events (SSE).
+
+    **Parameters**:
+    - `request` (ChatRequest): The request body that contains the user's query, optional categories
+      (several categories are searched at once and answered in a single model call) and an optional
+      session ID (follow-up questions reuse the retrieved chunks and history of the session).
+
+    **Returns**:
+    - `StreamingResponse`: A `text/event-stream` with one `token` event per generated text piece,
+      a `citations` event, a final `timing` event with the trace ID and the stage durations (ms),
+      and an `error` event if generation fails mid-stream.
+    """
+    # Log the incoming chat request message and categories
+    logger.info(f"Streaming chat request: {request.message} - Categories: {request.category_filter()}")
+
+    async def event_stream():
+        try:
+            async for event in stream_retriever_function(
+                query=request.message,  # The message from the user
+                category=request.category_filter(),  # The optional categories to filter the documents
+                session_id=request.session_id,  # The optional chat session
+                follow_up=request.follow_up  # Whether the client marked the message as a follow-up
+            ):
+                yield format_sse(event["event"], event["data"])
+            # The headers went out before generation, so the full breakdown comes last
+            yield format_sse("timing", stream_timing())
+        except Exception as e:
+            # The response has already started, so report the error as an event
+            logger.exception("Error in /chat/stream endpoint")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(request: BatchChatRequest):
+    """
+    Endpoint to answer a checklist of questions, possibly across several categories, in one call.
+
+    Questions are answered concurrently with a bounded fan-out (`CHAT_BATCH_MAX_CONCURRENCY`).
+    A failing question does not fail the batch; its error is reported in its own result.
+
+    **Parameters**:
+    - `request` (BatchChatRequest): The list of questions, each with an optional category.
+
+    **Returns**:
+    - `BatchChatResponse`: One result per question, in request order.
+    """
+    if len(request.items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {CHAT_BATCH_MAX_ITEMS} questions")
+
+    logger.info(f"Batch chat request: {len(request.items)} questions")
+    outcomes = await retriever_batch_async([(item.message, item.category) for item in request.items])
+
+    results = []
+    for index, (item, outcome) in enumerate(zip(request.items, outcomes)):
+        result = BatchChatResult(index=index, message=item.message, category=item.category)
+        if isinstance(outcome, Exception):
+            result.error = str(outcome)
+        else:
+            result.response = outcome.get("answer", "")
+        results.append(result)
+
+    return BatchChatResponse(results=results)
+
+@router.get("/chat/cache/stats")
+async def chat_cache_stats():
+    """
+    Endpoint exposing the query cache counters, used to size the cache.
+
+    **Returns**:
+    - `dict`: Size, capacity, TTL, hits, misses, hit ratio, evictions and invalidations.
+    """
+    return query_cache.stats()
+
+@router.get("/chat/sessions/stats")
+async def chat_sessions_stats():
+    """
+    Endpoint exposing the chat session counters, used to size the session store.
+
+    **Returns**:
+    - `dict`: Size, capacity, TTL, history turns, follow-ups, evictions and expirations.
+    """
+    return chat_sessions.stats()
+
+@router.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    """
+    Endpoint to end a chat session, so the next question starts a new conversation.
+
+    **Parameters**:
+    - `session_id` (str): The session ID.
+
+    **Returns**:
+    - `dict`: Whether the session existed.
+    """
+    return {"session_id": session_id, "deleted": chat_sessions.delete(session_id)}
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException
+from services.ingestion_scheduler import ingestion_scheduler
+import logging
+
+# Initialize the APIRouter instance for the ingestion endpoints
+router = APIRouter()
+# Set up the logger to track activity and errors
+logger = logging.getLogger(__name__)
+
+@router.get("/ingestion/status")
+async def ingestion_status():
+    """
+    Endpoint exposing the ingestion scheduler state and the current and last job of each data source.
+
+    **Returns**:
+    - `dict`: The status of each data source, keyed by data source ID.
+    """
+    return ingestion_scheduler.status()
+
+@router.post("/ingestion/sync")
+async def ingestion_sync():
+    """
+    Endpoint to request an ingestion job, e.g. after files were added to S3 outside of the API.
+
+    The request is coalesced with pending uploads like any other upload.
+
+    **Returns**:
+    - `dict`: The status of each data source, keyed by data source ID.
+    """
+    if not ingestion_scheduler.mark_dirty():
+        raise HTTPException(status_code=400, detail="KNOWLEDGE_BASE_DATA_SOURCE_ID is not configured")
+    logger.info("Ingestion sync requested")
+    return ingestion_scheduler.status()
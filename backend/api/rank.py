@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException
+from services.ranking_service import rank_candidates
+from services.metrics_service import timed
+from config.settings import RANK_MAX_TOP_N
+from schemas.rank import RankRequest, RankResponse
+import asyncio
+import logging
+
+# Initialize the APIRouter instance for the ranking endpoint
+router = APIRouter()
+# Set up the logger to track activity and errors
+logger = logging.getLogger(__name__)
+
+@router.post("/rank", response_model=RankResponse)
+@timed("rank", "total")
+async def rank_endpoint(request: RankRequest):
+    """
+    Endpoint to rank every CV of a category against a job description.
+
+    CVs are scored by the similarity of their embedding with the job description, combined
+    with the share of the required skills they hold (from the field index), in a few
+    vectorized operations over the whole category and without any model call.
+
+    **Parameters**:
+    - `request` (RankRequest): The job description, the category and the number of candidates to return.
+
+    **Returns**:
+    - `RankResponse`: The best candidates with their scores and download URLs.
+    """
+    if not 1 <= request.top_n <= RANK_MAX_TOP_N:
+        raise HTTPException(status_code=400, detail=f"top_n must be between 1 and {RANK_MAX_TOP_N}")
+
+    try:
+        logger.info(f"Rank request: category '{request.category}' - top {request.top_n}")
+        # Scoring is CPU-bound, so it runs in a worker thread
+        result = await asyncio.to_thread(rank_candidates, request.job_description, request.category, request.top_n)
+        return RankResponse(**result)
+
+    except (FileNotFoundError, ValueError) as e:
+        # The local index (or its document embeddings) has not been built
+        logger.exception("Error in /rank endpoint")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Error in /rank endpoint")
+        raise HTTPException(status_code=500, detail=str(e))
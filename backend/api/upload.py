@@ -1,7 +1,19 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from services.s3_service import S3Service
-from schemas.upload import UploadResponse
+from services.cache_service import query_cache
+from services.ingestion_scheduler import ingestion_scheduler
+from services.dedup_index import ContentHashIndex
+from services.metrics_service import UPLOADS, timed, track_stage
+from utils.utils import compute_sha256_async, normalize_filename
+from schemas.upload import UploadResponse, BulkUploadItem, BulkUploadResponse
+from config.settings import UPLOAD_BULK_CONCURRENCY
+from collections import Counter
+from typing import List, Tuple
+import asyncio
+import json
 import logging
+import os
+import zipfile
 
 # Create an APIRouter instance for organizing routes
 router = APIRouter()
@@ -9,8 +21,101 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 # Initialize the S3Service instance to handle file uploads
 s3_service = S3Service()
+# Initialize the content hash index used to detect duplicate uploads
+content_hash_index = ContentHashIndex()
+# Uploads in progress by content hash, so identical concurrent uploads are stored once
+inflight_uploads = {}
+
+# Define allowed file extensions for upload
+ALLOWED_EXTENSIONS = [".pdf", ".docx", ".txt", ".doc"]
+
+def is_allowed_file(filename: str) -> bool:
+    """Checks whether a file name has one of the allowed extensions."""
+    return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
+
+class ZipMemberStream:
+    """
+    Async reader over a member of a zip archive, so it can be streamed with `S3Service.upload_stream`.
+
+    The blocking decompression runs in a worker thread.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, name: str):
+        self._archive = archive
+        self._name = name
+        self._member = archive.open(name)
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self._member.read, size)
+
+    async def seek(self, offset: int) -> None:
+        # Compressed members cannot seek; rewinding reopens the member
+        if offset != 0:
+            raise ValueError("Zip member streams can only be rewound to the start")
+        self._member.close()
+        self._member = self._archive.open(self._name)
+
+    def close(self) -> None:
+        self._member.close()
+
+async def store_document(stream, filename: str, content_type: str, category: str) -> dict:
+    """
+    Uploads a document to S3 unless a byte-identical document was already uploaded.
+
+    The content is hashed (SHA-256) in a streaming pass first. If the hash is already in
+    the content hash index and the indexed S3 object still holds that content (its `sha256`
+    metadata matches), nothing is written to S3 and the existing object is returned.
+    Otherwise the stale entry is dropped, the stream is rewound and uploaded, and its hash
+    is recorded.
+
+    Args:
+        stream: An async stream with `read(size)` and `seek(0)` (e.g., FastAPI's `UploadFile`).
+        filename (str): The name of the file to upload.
+        content_type (str): The MIME type of the file.
+        category (str): The category to associate with the file.
+
+    Returns:
+        dict: The S3 key, file URL and normalized filename, plus `duplicate` (True if
+            the document was already stored).
+    """
+    with track_stage("upload", "hash"):
+        sha256 = await compute_sha256_async(stream)
+
+    # Wait for an identical upload that is already in progress, then claim the hash
+    while sha256 in inflight_uploads:
+        await asyncio.shield(inflight_uploads[sha256])
+    inflight_uploads[sha256] = asyncio.get_running_loop().create_future()
+
+    try:
+        with track_stage("upload", "dedup_lookup"):
+            existing = await asyncio.to_thread(content_hash_index.get, sha256)
+            # The object may have been overwritten by another file of the same name, or deleted
+            if existing is not None and await asyncio.to_thread(s3_service.stored_sha256, existing["s3_key"]) != sha256:
+                logger.info(f"Content hash index entry for {existing['s3_key']} is stale (sha256 {sha256[:12]}); uploading again")
+                await asyncio.to_thread(content_hash_index.remove, sha256)
+                existing = None
+        if existing is not None:
+            logger.info(f"Duplicate upload of '{filename}' (sha256 {sha256[:12]}): already stored as {existing['s3_key']}")
+            UPLOADS.labels("duplicate").inc()
+            return {**existing, "duplicate": True}
+
+        await stream.seek(0)
+        with track_stage("upload", "s3_upload"):
+            result = await s3_service.upload_stream(
+                stream=stream,
+                filename=filename,
+                content_type=content_type,
+                category=category,
+                sha256=sha256
+            )
+        await asyncio.to_thread(content_hash_index.add, sha256, result, category)
+        UPLOADS.labels("uploaded").inc()
+        return {**result, "duplicate": False}
+    finally:
+        inflight_uploads.pop(sha256).set_result(None)
 
 @router.post("/upload", response_model=UploadResponse)
+@timed("upload", "total")
 async def upload_document(
     file: UploadFile = File(...),  # The file to be uploaded
     category: str = Form(...)      # The category of the document, provided via form
@@ -32,28 +137,36 @@ async def upload_document(
     try:
         logger.info(f"Upload request: {file.filename} - Category: {category}")
 
-        # Define allowed file extensions for upload
-        allowed_extensions = [".pdf", ".docx", ".txt", ".doc"]
-        
         # Check if the uploaded file has a valid extension
-        if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
+        if not is_allowed_file(file.filename):
             logger.warning(f"Disallowed file type: {file.filename}")
             raise HTTPException(
                 status_code=400,
-                detail=f"Allowed file types: {', '.join(allowed_extensions)}"
+                detail=f"Allowed file types: {', '.join(ALLOWED_EXTENSIONS)}"
             )
 
-        # Read the file content asynchronously
-        contents = await file.read()
-
-        # Use the S3 service to upload the file and get metadata
-        result = s3_service.upload_file(
-            file_content=contents,
+        # Stream the file to S3 part by part, unless the same content was already uploaded
+        result = await store_document(
+            stream=file,
             filename=file.filename,
             content_type=file.content_type or "application/octet-stream",
             category=category
         )
 
+        if result["duplicate"]:
+            return UploadResponse(
+                message="Identical file already uploaded; existing file returned",
+                file_id=result["s3_key"],
+                url=result["url"],
+                filename=result["filename"],
+                duplicate=True
+            )
+
+        # Cached answers for this category no longer reflect the uploaded documents
+        query_cache.invalidate_category(category)
+        # Schedule a (coalesced) ingestion job so the document becomes searchable
+        ingestion_scheduler.mark_dirty([category])
+
         # Return a response with the result of the file upload
         return UploadResponse(
             message="File uploaded successfully with metadata JSON",
@@ -66,3 +179,177 @@ async def upload_document(
         # If any error occurs, log the exception and raise an HTTPException
         logger.exception("Error in /upload endpoint")
         raise HTTPException(status_code=500, detail=str(e))
+
+def resolve_category(path: str, category_mapping: dict, default_category: str = None) -> str:
+    """
+    Resolves the category of a file in a bulk upload.
+
+    The mapping is looked up by full path, then by file name, then by top-level
+    folder (for zip archives organized as `<category>/<file>`); the default category
+    is used when none of them match.
+
+    Args:
+        path (str): The file name, or the member path inside a zip archive.
+        category_mapping (dict): Mapping of path, file name or folder to category.
+        default_category (str, optional): Category used when the mapping has no match.
+
+    Returns:
+        str: The category, or None if it cannot be resolved.
+    """
+    folder = path.split("/", 1)[0] if "/" in path else None
+    for key in (path, os.path.basename(path), folder):
+        if key and key in category_mapping:
+            return category_mapping[key]
+    return default_category
+
+def storage_names(paths: List[str]) -> List[Tuple[str, str]]:
+    """
+    Chooses the file name each file of a bulk upload is stored under, so that no two files
+    of the upload overwrite each other.
+
+    Files are stored under their base name. When several files share a (normalized) base
+    name, e.g. `Legal/cv.pdf` and `Security/cv.pdf` in a zip archive, the ones inside a
+    folder are stored under their path instead (`Legal_cv.pdf`). Files whose name still
+    collides get an error.
+
+    Args:
+        paths (list): The file names, or the member paths inside a zip archive.
+
+    Returns:
+        list: One `(filename, error)` pair per path, in order; `error` is None unless the name collides.
+    """
+    names = [os.path.basename(path) for path in paths]
+    counts = Counter(normalize_filename(name) for name in names)
+    names = [
+        path.replace("/", "_") if counts[normalize_filename(name)] > 1 and "/" in path else name
+        for path, name in zip(paths, names)
+    ]
+    counts = Counter(normalize_filename(name) for name in names)
+    return [
+        (name, f"Another file of this upload is also named '{normalize_filename(name)}'; rename one of them"
+         if counts[normalize_filename(name)] > 1 else None)
+        for name in names
+    ]
+
+@router.post("/upload/bulk", response_model=BulkUploadResponse)
+async def upload_documents_bulk(
+    files: List[UploadFile] = File(None),  # The files to be uploaded
+    archive: UploadFile = File(None),      # A zip archive with the files to be uploaded
+    category: str = Form(None),            # Default category for every file
+    category_mapping: str = Form(None)     # JSON object mapping file name, path or zip folder to category
+):
+    """
+    Endpoint to upload many documents at once, as multiple files and/or a zip archive.
+
+    Files are streamed to S3 by a bounded pool of concurrent uploads (`UPLOAD_BULK_CONCURRENCY`).
+    A failing file does not fail the request; it is reported in the per-file results.
+    Files whose content was already uploaded are reported as duplicates and not stored again.
+    Zip members with the same file name in different folders are stored under their path
+    (see `storage_names`), so they do not overwrite each other.
+    Once every file has been handled, the batch is handed to the ingestion scheduler once,
+    so it is ingested by a single job (if `KNOWLEDGE_BASE_DATA_SOURCE_ID` is configured).
+
+    **Parameters**:
+    - `files` (List[UploadFile]): The files to upload. Optional if `archive` is provided.
+    - `archive` (UploadFile): A zip archive of files to upload. Optional if `files` is provided.
+    - `category` (str): The default category for files not listed in `category_mapping`.
+    - `category_mapping` (str): A JSON object mapping file names, paths or zip folders to categories.
+
+    **Returns**:
+    - `BulkUploadResponse`: Per-file results, counts and whether ingestion was scheduled.
+    """
+    files = files or []
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="Provide at least one file or a zip archive")
+
+    try:
+        mapping = json.loads(category_mapping) if category_mapping else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="category_mapping must be a JSON object")
+
+    logger.info(f"Bulk upload request: {len(files)} files - Archive: {archive.filename if archive else None}")
+    semaphore = asyncio.Semaphore(UPLOAD_BULK_CONCURRENCY)
+
+    async def upload_one(path: str, filename: str, name_error: str, open_stream, content_type: str) -> BulkUploadItem:
+        item = BulkUploadItem(filename=filename, category=resolve_category(path, mapping, category), status="failed")
+        if not is_allowed_file(filename):
+            item.error = f"Allowed file types: {', '.join(ALLOWED_EXTENSIONS)}"
+            return item
+        if name_error:
+            item.error = name_error
+            return item
+        if not item.category:
+            item.error = "No category provided for this file"
+            return item
+
+        async with semaphore:
+            stream = open_stream()
+            try:
+                result = await store_document(
+                    stream=stream,
+                    filename=filename,
+                    content_type=content_type,
+                    category=item.category
+                )
+                item.status = "duplicate" if result["duplicate"] else "uploaded"
+                item.file_id = result["s3_key"]
+                item.url = result["url"]
+            except Exception as e:
+                logger.exception(f"Error uploading '{path}' in bulk upload")
+                item.error = str(e)
+            finally:
+                if isinstance(stream, ZipMemberStream):
+                    stream.close()
+        return item
+
+    # (path, stream opener, content type) of every file to upload
+    entries = [
+        (file.filename, lambda file=file: file, file.content_type or "application/octet-stream")
+        for file in files
+    ]
+
+    zip_file = None
+    if archive is not None:
+        try:
+            zip_file = zipfile.ZipFile(archive.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail=f"'{archive.filename}' is not a valid zip archive")
+        for member in zip_file.infolist():
+            if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                continue
+            entries.append((
+                member.filename,
+                lambda name=member.filename: ZipMemberStream(zip_file, name),
+                "application/octet-stream"
+            ))
+
+    names = storage_names([path for path, _, _ in entries])
+    jobs = [
+        upload_one(path, filename, name_error, open_stream, content_type)
+        for (path, open_stream, content_type), (filename, name_error) in zip(entries, names)
+    ]
+
+    try:
+        results = await asyncio.gather(*jobs)
+    finally:
+        if zip_file is not None:
+            zip_file.close()
+
+    uploaded = [item for item in results if item.status == "uploaded"]
+    duplicates = [item for item in results if item.status == "duplicate"]
+    response = BulkUploadResponse(
+        message=f"{len(uploaded)} of {len(results)} files uploaded, {len(duplicates)} already stored",
+        uploaded=len(uploaded),
+        duplicates=len(duplicates),
+        failed=len(results) - len(uploaded) - len(duplicates),
+        results=results
+    )
+
+    if uploaded:
+        categories = sorted({item.category for item in uploaded})
+        for uploaded_category in categories:
+            query_cache.invalidate_category(uploaded_category)
+        # One ingestion request for the whole batch, coalesced with any other pending uploads
+        response.ingestion_scheduled = ingestion_scheduler.mark_dirty(categories)
+
+    return response
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from moto import mock_aws
+
+BENCH_BUCKET = "bench-bucket"
+BENCH_PREFIX = "uploads/bench/"
+BENCH_CATEGORY = "Benchmark"
+
+# End-to-end scenarios go through the FastAPI app; stage scenarios call one function directly
+HTTP_SCENARIOS = ("chat", "chat_stream", "upload")
+STAGE_SCENARIOS = ("retriever_function", "retrieve_documents", "generate_presigned_url", "s3_upload_file")
+SCENARIOS = HTTP_SCENARIOS + STAGE_SCENARIOS
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Returns a percentile of a list of values, interpolating between the closest ranks.
+
+    Args:
+        values (list): The measured values.
+        percent (float): The percentile to compute (0-100).
+
+    Returns:
+        float: The percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def current_rss() -> int:
+    """Returns the current resident set size of the process in bytes (the peak so far where unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+        return max_rss if platform.system() == "Darwin" else max_rss * 1024
+
+class RssSampler:
+    """
+    Samples the resident set size in a background thread while a benchmark runs and keeps the peak.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+        """
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+async def run_level(call: Callable[[int], Awaitable], concurrency: int, requests: int) -> Dict:
+    """
+    Runs `requests` calls with `concurrency` callers in flight and measures them.
+
+    Args:
+        call (callable): An async function taking the request number.
+        concurrency (int): Number of concurrent callers.
+        requests (int): Total number of calls.
+
+    Returns:
+        dict: Latency percentiles (ms), throughput (requests/s), error count and peak RSS (MB).
+    """
+    latencies, errors = [], []
+    request_numbers = iter(range(requests))
+
+    async def caller():
+        for number in request_numbers:
+            start = time.perf_counter()
+            try:
+                await call(number)
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "elapsed_s": round(elapsed, 3),
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1)
+    }
+
+def configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    # Settings are read at import time, so the app must be imported after this
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SECURITY_TOKEN": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_REGION": "us-east-1",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "S3_BUCKET_NAME": BENCH_BUCKET,
+        "S3_PREFIX": BENCH_PREFIX,
+        "KNOWLEDGE_BASE_ID": "BENCHKB",
+        # No data source: uploads do not schedule ingestion jobs
+        "KNOWLEDGE_BASE_DATA_SOURCE_ID": "",
+        "RETRIEVER_BACKEND": "bedrock",
+        "DEDUP_INDEX_PATH": os.path.join(workdir, "dedup_index.sqlite3"),
+        # No field index: a local field_index.jsonl must not answer the benchmark questions without retrieval
+        "FIELD_INDEX_PATH": "",
+        "QUERY_CACHE_MAX_ENTRIES": os.environ.get("QUERY_CACHE_MAX_ENTRIES", "1024") if args.cache else "0"
+    })
+
+def install_fakes(args: argparse.Namespace) -> None:
+    from services import retriever_service
+    from services.fakes import FakeBedrockAgentRuntimeClient, FakeBedrockRuntimeClient
+
+    retriever_service.bedrock_runtime_client = FakeBedrockRuntimeClient(
+        latency=args.llm_latency, answer_tokens=args.answer_tokens, token_latency=args.token_latency
+    )
+    retriever_service.bedrock_agent_client = FakeBedrockAgentRuntimeClient(
+        latency=args.retrieve_latency, results=args.results, chunk_size=args.chunk_size,
+        bucket=BENCH_BUCKET, prefix=BENCH_PREFIX
+    )
+
+def build_scenarios(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict[str, Callable[[int], Awaitable]]:
+    from api import upload
+    from services import retriever_service
+    from services.aws_clients import get_client
+    from utils import utils
+
+    upload_payload = os.urandom(args.upload_size)
+
+    def question(number):
+        # Unique questions, so the query cache (when enabled) is not what gets measured
+        return f"Which candidates have Python and AWS experience? #{number}-{uuid.uuid4().hex[:8]}"
+
+    def unique_payload():
+        # A different hash for every upload, so de-duplication does not short-circuit them
+        return uuid.uuid4().bytes + upload_payload
+
+    async def chat(number):
+        response = await client.post("/api/chat", json={"message": question(number), "category": BENCH_CATEGORY})
+        response.raise_for_status()
+
+    async def chat_stream(number):
+        async with client.stream("POST", "/api/chat/stream", json={"message": question(number), "category": BENCH_CATEGORY}) as response:
+            response.raise_for_status()
+            async for _ in response.aiter_bytes():
+                pass
+
+    async def upload_document(number):
+        files = {"file": (f"bench_{number}_{uuid.uuid4().hex[:8]}.pdf", unique_payload(), "application/pdf")}
+        response = await client.post("/api/upload", files=files, data={"category": BENCH_CATEGORY})
+        response.raise_for_status()
+
+    def in_thread(func):
+        async def call(number):
+            return await asyncio.get_running_loop().run_in_executor(None, func, number)
+        return call
+
+    return {
+        "chat": chat,
+        "chat_stream": chat_stream,
+        "upload": upload_document,
+        "retriever_function": in_thread(lambda n: retriever_service.retriever_function(question(n), BENCH_CATEGORY)),
+        "retrieve_documents": in_thread(lambda n: retriever_service.retrieve_documents(question(n), BENCH_CATEGORY)),
+        "generate_presigned_url": in_thread(
+            lambda n: utils.generate_presigned_url(get_client("s3"), f"s3://{BENCH_BUCKET}/{BENCH_PREFIX}cv_{n % 100:04d}.pdf")
+        ),
+        "s3_upload_file": in_thread(
+            lambda n: upload.s3_service.upload_file(unique_payload(), f"stage_{n}.pdf", "application/pdf", BENCH_CATEGORY)
+        )
+    }
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict:
+    """
+    Runs every selected scenario at every concurrency level against the in-process app.
+
+    Args:
+        args (argparse.Namespace): The parsed command line options.
+
+    Returns:
+        dict: The run metadata and one result per scenario and concurrency level.
+    """
+    from main import app
+
+    install_fakes(args)
+    logging.getLogger().setLevel(args.log_level)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        scenarios = build_scenarios(client, args)
+        loop = asyncio.get_running_loop()
+
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                # Stage scenarios run in threads: give each level as many threads as callers
+                executor = ThreadPoolExecutor(max_workers=concurrency)
+                loop.set_default_executor(executor)
+                if args.warmup:
+                    await run_level(scenarios[name], min(concurrency, args.warmup), args.warmup)
+                result = await run_level(scenarios[name], concurrency, args.requests)
+                executor.shutdown(wait=True)
+                results.append({"scenario": name, **result})
+                print(
+                    f"{name:<24} c={concurrency:<4} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                    f"p99={result['p99_ms']}ms {result['throughput_rps']} req/s rss={result['peak_rss_mb']}MB "
+                    f"errors={result['errors']}",
+                    file=sys.stderr
+                )
+
+    return {"meta": run_metadata(args), "results": results}
+
+def run_metadata(args: argparse.Namespace) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "log_level")}
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config
+    }
+
+def compare_results(before_path: str, after_path: str) -> str:
+    """
+    Compares two benchmark result files, scenario by scenario and level by level.
+
+    Args:
+        before_path (str): The baseline result file.
+        after_path (str): The result file to compare against the baseline.
+
+    Returns:
+        str: A text table with the before/after values and relative changes.
+    """
+    with open(before_path, "r", encoding="utf-8") as file:
+        before = json.load(file)
+    with open(after_path, "r", encoding="utf-8") as file:
+        after = json.load(file)
+
+    baseline = {(r["scenario"], r["concurrency"]): r for r in before["results"]}
+    metrics = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb")
+    lines = [
+        f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}",
+        f"{'scenario':<24}{'c':>5}  " + "".join(f"{metric:>26}" for metric in metrics)
+    ]
+    for result in after["results"]:
+        old = baseline.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        cells = []
+        for metric in metrics:
+            old_value, new_value = old.get(metric), result.get(metric)
+            if old_value and new_value is not None:
+                cells.append(f"{old_value:>9} -> {new_value:<9} {(new_value - old_value) / old_value:+6.1%}")
+            else:
+                cells.append(f"{old_value} -> {new_value}".rjust(26))
+        lines.append(f"{result['scenario']:<24}{result['concurrency']:>5}  " + "".join(f"{cell:>26}" for cell in cells))
+    return "\n".join(lines)
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the chat and upload pipelines against local stand-ins (moto S3, fake Bedrock)."
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each level")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds before the model answers")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds between two streamed tokens")
+    parser.add_argument("--answer-tokens", type=int, default=200, help="Words per model answer")
+    parser.add_argument("--retrieve-latency", type=float, default=0.1, help="Seconds per knowledge base retrieval")
+    parser.add_argument("--results", type=int, default=5, help="Chunks per retrieval")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Characters per retrieved chunk")
+    parser.add_argument("--upload-size", type=int, default=256 * 1024, help="Bytes per uploaded file")
+    parser.add_argument("--cache", action="store_true", help="Keep the query cache enabled")
+    parser.add_argument("--log-level", default="ERROR", help="Log level of the app while benchmarking")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    if args.compare:
+        print(compare_results(*args.compare))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir, mock_aws():
+        configure_environment(args, workdir)
+        import boto3
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BENCH_BUCKET)
+        report = asyncio.run(run_benchmarks(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
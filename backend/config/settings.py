@@ -9,6 +9,9 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 S3_PREFIX = os.getenv("S3_PREFIX", "uploads/dev/")
+# Multipart uploads: part size in bytes (at least 5 MiB) and parts uploaded in parallel per file
+S3_MULTIPART_PART_SIZE = int(os.getenv("S3_MULTIPART_PART_SIZE", 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))
 
 # Bedrock
 BEDROCK_MODEL = os.getenv("BEDROCK_MODEL", "anthropic.claude-v2")
@@ -21,7 +24,83 @@ KNOWLEDGE_BASE_ID = os.getenv("KNOWLEDGE_BASE_ID")
 RETRIEVER_TOP_K = int(os.getenv("RETRIEVER_TOP_K", 3))
 SYSTEM_PROMPT = os.getenv("SYSTEM_PROMPT", "You are a helpful assistant.")
 
+# Context assembly: token budget of the retrieved context and overlap (0-1) above which chunks are duplicates
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+CONTEXT_OVERLAP_THRESHOLD = float(os.getenv("CONTEXT_OVERLAP_THRESHOLD", 0.8))
+
+# Reranking: candidates retrieved, results kept after the BM25 + knowledge base score fusion (0 disables reranking),
+# and weight (0-1) of the BM25 score in the fusion
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 5))
+RERANK_BM25_WEIGHT = float(os.getenv("RERANK_BM25_WEIGHT", 0.3))
+
+# Retrieval backend: "bedrock" (Amazon Knowledge Bases) or "local" (in-process NumPy index)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "bedrock")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "local_index")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 1024))
+
+# Structured field index (JSONL, built by the local ingestion) answering exact-match and count questions
+# without the model (empty path disables it), and maximum candidates listed in those answers. Its sources
+# are the local paths of the ingested CVs, which only the local backend retrieves, so it is off by default
+# with Knowledge Bases
+FIELD_INDEX_PATH = os.getenv("FIELD_INDEX_PATH", "field_index.jsonl" if RETRIEVER_BACKEND == "local" else "")
+QUERY_ROUTER_MAX_RESULTS = int(os.getenv("QUERY_ROUTER_MAX_RESULTS", 20))
+
+# Job description ranking (/api/rank): default and maximum candidates returned, and weight (0-1)
+# of the skill overlap against the embedding similarity in the score
+RANK_TOP_N = int(os.getenv("RANK_TOP_N", 10))
+RANK_MAX_TOP_N = int(os.getenv("RANK_MAX_TOP_N", 100))
+RANK_SKILL_WEIGHT = float(os.getenv("RANK_SKILL_WEIGHT", 0.4))
+
+# Local ingestion (text extraction and chunking)
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", 0))
+
+# Chat concurrency
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", 32))
+CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", 8))
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", 200))
+
+# AWS clients (services/aws_clients.py): connections per client (at least CHAT_MAX_CONCURRENCY, so
+# every in-flight chat request can hold one), connect and read timeouts (seconds), and retries
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", max(64, CHAT_MAX_CONCURRENCY)))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", 5))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", 120))
+AWS_MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", 5))
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive")
+
+# Query cache (keep the TTL below the 1 hour expiration of the citation download URLs)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 1024))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", 600))
+
+# Chat sessions: maximum number of sessions, idle time before one expires, and the turns
+# (with answers cut to CHAT_SESSION_ANSWER_CHARS characters) kept as history for follow-ups
+CHAT_SESSION_MAX_ENTRIES = int(os.getenv("CHAT_SESSION_MAX_ENTRIES", 1000))
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", 1800))
+CHAT_SESSION_HISTORY_TURNS = int(os.getenv("CHAT_SESSION_HISTORY_TURNS", 3))
+CHAT_SESSION_ANSWER_CHARS = int(os.getenv("CHAT_SESSION_ANSWER_CHARS", 500))
+
+# CV generation: folder of the pre-built, content-addressed photo pool
+PHOTO_POOL_DIR = os.getenv("PHOTO_POOL_DIR", "photo_pool")
+
 # API
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", 8000))
 KNOWLEDGE_BASE_ROLE_ARN = os.getenv("KNOWLEDGE_BASE_ROLE_ARN")
+KNOWLEDGE_BASE_DATA_SOURCE_ID = os.getenv("KNOWLEDGE_BASE_DATA_SOURCE_ID")
+# Assumed-role credentials: background refresh and blocking refresh windows before expiration (seconds).
+# Keep them wider than botocore's own windows (15 and 10 minutes) so botocore always finds fresh credentials.
+STS_REFRESH_AHEAD_SECONDS = float(os.getenv("STS_REFRESH_AHEAD_SECONDS", 1200))
+STS_MANDATORY_REFRESH_SECONDS = float(os.getenv("STS_MANDATORY_REFRESH_SECONDS", 660))
+
+# Ingestion scheduling: quiet period after the last upload, maximum wait, and job polling interval (seconds)
+INGESTION_DEBOUNCE_SECONDS = float(os.getenv("INGESTION_DEBOUNCE_SECONDS", 30))
+INGESTION_MAX_DELAY_SECONDS = float(os.getenv("INGESTION_MAX_DELAY_SECONDS", 300))
+INGESTION_POLL_SECONDS = float(os.getenv("INGESTION_POLL_SECONDS", 15))
+
+# Content hash index used to detect duplicate uploads (SQLite file)
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "dedup_index.sqlite3")
+
+# Bulk upload: files uploaded to S3 in parallel per request
+UPLOAD_BULK_CONCURRENCY = int(os.getenv("UPLOAD_BULK_CONCURRENCY", 8))
@@ -1,7 +1,10 @@
 import os
+import argparse
 import json
-import boto3
 import base64
+import hashlib
+import zlib
+import numpy as np
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -11,8 +14,14 @@ from reportlab.lib.units import inch
 from PIL import Image as PILImage
 import random
 import logging
+import threading
+import time
 import requests
-from config.settings import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, BEDROCK_MODEL
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from config.settings import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, BEDROCK_MODEL, S3_BUCKET_NAME, S3_PREFIX, PHOTO_POOL_DIR
+from services.aws_clients import get_client
+from services.s3_service import S3Service
 
 # ===== AWS CREDENTIAL CONFIGURATION =====
 os.environ['AWS_ACCESS_KEY_ID'] = AWS_ACCESS_KEY_ID
@@ -22,8 +31,8 @@ os.environ['AWS_DEFAULT_REGION'] = AWS_REGION
 # ===== CONFIGURATION =====
 NOVA_MODEL = BEDROCK_MODEL
 
-# AWS Bedrock client
-bedrock_runtime = boto3.client('bedrock-runtime', region_name=AWS_REGION)
+# AWS Bedrock client (shared, with the pool, timeouts and retries of services/aws_clients.py)
+bedrock_runtime = get_client('bedrock-runtime')
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,32 +42,96 @@ def load_profiles_json(path):
     with open(path, 'r', encoding='utf-8') as file:
         return json.load(file)
 
+# -------------------- Rate Limiting and Retries --------------------
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `requests_per_second`."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def wait(self):
+        """Blocks until the caller is allowed to make the next request."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def call_with_retry(func, *args, retries=3, backoff=1.0, limiter=None, **kwargs):
+    """Calls `func`, retrying with exponential backoff and jitter; each attempt waits for the limiter."""
+    for attempt in range(retries + 1):
+        try:
+            if limiter:
+                limiter.wait()
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            logger.warning(f"{func.__name__} failed ({e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
 # -------------------- Photo Generation --------------------
-def generate_ai_photo(cv_number, gender=None):
-    """Generates a professional photo using a free external API."""
+def save_photo(cv_number, photo_bytes):
+    """Writes a photo to `generated_cvs/` and returns its path."""
+    photo_path = f'generated_cvs/photo_{cv_number}.png'
+    os.makedirs('generated_cvs', exist_ok=True)
+    with open(photo_path, 'wb') as f:
+        f.write(photo_bytes)
+    return photo_path
+
+def download_ai_photo_bytes(cv_number):
+    """Downloads a professional photo from a free external API and returns it as PNG bytes; raises on failure."""
+    logger.info(f"Generating photo #{cv_number} with AI...")
+    response = requests.get(
+        'https://thispersondoesnotexist.com/',
+        headers={'User-Agent': 'Mozilla/5.0'},
+        timeout=10
+    )
+    response.raise_for_status()
+    image = PILImage.open(BytesIO(response.content))
+    image = image.resize((150, 150), PILImage.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    logger.info(f"Photo #{cv_number} generated")
+    return buffer.getvalue()
+
+def fetch_ai_photo_bytes(cv_number):
+    """Fetches a professional photo from a free external API and returns it as PNG bytes (a placeholder on failure)."""
     try:
-        logger.info(f"Generating photo #{cv_number} with AI...")
-        response = requests.get(
-            'https://thispersondoesnotexist.com/',
-            headers={'User-Agent': 'Mozilla/5.0'},
-            timeout=10
-        )
-        if response.status_code == 200:
-            photo_path = f'generated_cvs/photo_{cv_number}.png'
-            os.makedirs('generated_cvs', exist_ok=True)
-            image = PILImage.open(BytesIO(response.content))
-            image = image.resize((150, 150), PILImage.Resampling.LANCZOS)
-            image.save(photo_path)
-            logger.info(f"Photo generated: {photo_path}")
-            return photo_path
-        else:
-            return generate_placeholder_photo(cv_number)
+        return download_ai_photo_bytes(cv_number)
     except Exception as e:
         logger.warning(f"Could not generate AI photo: {e}. Using placeholder.")
-        return generate_placeholder_photo(cv_number)
+        return generate_placeholder_photo_bytes(cv_number)
+
+def generate_ai_photo_bytes(cv_number, seed=0, limiter=None):
+    """Returns a photo as PNG bytes, from the photo pool if one was built, else from the external API.
+    Only the external fetch waits for `limiter`; pool photos are read from disk right away."""
+    pool_photo = pick_pool_photo(cv_number, seed)
+    if pool_photo:
+        with open(pool_photo, 'rb') as f:
+            return f.read()
+    if limiter:
+        limiter.wait()
+    return fetch_ai_photo_bytes(cv_number)
+
+def generate_ai_photo(cv_number, gender=None, seed=0, limiter=None):
+    """Returns the path of a photo, from the photo pool if one was built, else generated with a free external API.
+    Only the external fetch waits for `limiter`; pool photos are used right away."""
+    pool_photo = pick_pool_photo(cv_number, seed)
+    if pool_photo:
+        return pool_photo
+    if limiter:
+        limiter.wait()
+    photo_path = save_photo(cv_number, fetch_ai_photo_bytes(cv_number))
+    logger.info(f"Photo generated: {photo_path}")
+    return photo_path
 
-def generate_placeholder_photo(cv_number):
-    """Generates a professional style avatar."""
+def generate_placeholder_photo_bytes(cv_number):
+    """Generates a professional style avatar and returns it as PNG bytes."""
     try:
         seed = f"cv{cv_number}{random.randint(1000, 9999)}"
         styles = ['avataaars', 'bottts', 'personas', 'lorelei', 'notionists']
@@ -66,10 +139,7 @@ def generate_placeholder_photo(cv_number):
         url = f'https://api.dicebear.com/7.x/{style}/png?seed={seed}&size=150'
         response = requests.get(url, timeout=5)
         if response.status_code == 200:
-            photo_path = f'generated_cvs/photo_{cv_number}.png'
-            with open(photo_path, 'wb') as f:
-                f.write(response.content)
-            return photo_path
+            return response.content
     except:
         pass
     from PIL import ImageDraw
@@ -79,9 +149,151 @@ def generate_placeholder_photo(cv_number):
     draw = ImageDraw.Draw(img)
     draw.ellipse([40, 30, 110, 100], fill='white')
     draw.ellipse([60, 90, 90, 130], fill='white')
-    photo_path = f'generated_cvs/photo_{cv_number}.png'
-    img.save(photo_path)
-    return photo_path
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def generate_placeholder_photo(cv_number):
+    """Generates a professional style avatar."""
+    return save_photo(cv_number, generate_placeholder_photo_bytes(cv_number))
+
+# -------------------- Photo Pool --------------------
+PHOTO_SIZE = 150
+PHOTO_POOL_INDEX = 'index.json'
+
+# Palettes for procedural avatars (RGB)
+AVATAR_BACKGROUNDS = np.array([[52, 152, 219], [231, 76, 60], [46, 204, 113], [243, 156, 18],
+                               [155, 89, 182], [26, 188, 156], [236, 240, 241], [149, 165, 166]], dtype=np.uint8)
+AVATAR_SKIN_TONES = np.array([[255, 224, 189], [241, 194, 125], [224, 172, 105],
+                              [198, 134, 66], [141, 85, 36], [92, 58, 33]], dtype=np.uint8)
+AVATAR_HAIR_COLORS = np.array([[35, 25, 20], [80, 50, 30], [150, 100, 50], [220, 190, 120],
+                               [170, 170, 170], [120, 40, 20]], dtype=np.uint8)
+AVATAR_CLOTHES = np.array([[44, 62, 80], [52, 73, 94], [255, 255, 255], [127, 140, 141],
+                           [41, 128, 185], [22, 160, 133]], dtype=np.uint8)
+
+def render_avatars(count, rng):
+    """Draws `count` procedural avatars at once with NumPy; returns a (count, 150, 150, 3) uint8 array."""
+    y, x = np.mgrid[0:PHOTO_SIZE, 0:PHOTO_SIZE].astype(np.float32)
+
+    def pick(palette):
+        return palette[rng.integers(len(palette), size=count)][:, None, None, :]
+
+    def param(low, high):
+        return rng.uniform(low, high, size=count).astype(np.float32)[:, None, None]
+
+    # Face geometry, one value per avatar, broadcast over the pixel grid
+    cx, cy, rx, ry = param(68, 82), param(56, 66), param(25, 31), param(31, 37)
+    hair_line = cy - ry * param(0.2, 0.55)
+
+    head = ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1
+    hair = ((x - cx) / (rx + 5)) ** 2 + ((y - cy + 5) / (ry + 5)) ** 2 <= 1
+    neck = (np.abs(x - cx) <= rx * 0.45) & (y > cy) & (y < cy + ry + 14)
+    shoulders = ((x - cx) / param(55, 72)) ** 2 + ((y - 168) / param(45, 58)) ** 2 <= 1
+    eye_y, eye_dx = cy - ry * 0.05, rx * 0.38
+    eyes = ((x - cx + eye_dx) ** 2 + (y - eye_y) ** 2 <= 7) | ((x - cx - eye_dx) ** 2 + (y - eye_y) ** 2 <= 7)
+
+    skin, hair_color = pick(AVATAR_SKIN_TONES), pick(AVATAR_HAIR_COLORS)
+    images = np.broadcast_to(pick(AVATAR_BACKGROUNDS), (count, PHOTO_SIZE, PHOTO_SIZE, 3))
+    # Layers from back to front; the hair is drawn behind the head and again over the forehead
+    layers = (
+        (shoulders, pick(AVATAR_CLOTHES)),
+        (hair & (y < cy + ry * param(0.0, 0.6)), hair_color),
+        (neck, skin),
+        (head, skin),
+        (hair & (y < hair_line), hair_color),
+        (eyes, np.uint8(40))
+    )
+    for mask, color in layers:
+        images = np.where(mask[..., None], color, images)
+    return images.astype(np.uint8)
+
+def encode_png(image):
+    """Encodes an RGB array or PIL image as 150x150 PNG bytes."""
+    if isinstance(image, np.ndarray):
+        image = PILImage.fromarray(image)
+    image = image.convert('RGB')
+    if image.size != (PHOTO_SIZE, PHOTO_SIZE):
+        image = image.resize((PHOTO_SIZE, PHOTO_SIZE), PILImage.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def build_photo_pool(pool_dir=PHOTO_POOL_DIR, size=500, fetch=False, seed=0, batch_size=256, workers=8,
+                     requests_per_second=2.0, retries=3):
+    """
+    Fills the photo pool once, so CV generation needs no network for photos.
+
+    Photos are 150x150 PNGs stored under their SHA-256 (identical photos are kept once)
+    and listed in `index.json`. By default they are procedural avatars rendered with
+    NumPy `batch_size` at a time; with `fetch=True` they are fetched once from the
+    external photo API instead, at most `requests_per_second` with `retries` retries.
+    A photo that still cannot be fetched is left out of the pool (the pool is for real
+    photos, not placeholders), and the build fails if no photo could be fetched.
+    Running it again adds to the existing pool.
+    """
+    os.makedirs(pool_dir, exist_ok=True)
+    photos = list(load_photo_pool_index(pool_dir))
+    known = set(photos)
+
+    def add(photo_bytes):
+        sha256 = hashlib.sha256(photo_bytes).hexdigest()
+        if sha256 in known:
+            return
+        with open(os.path.join(pool_dir, f'{sha256}.png'), 'wb') as f:
+            f.write(photo_bytes)
+        known.add(sha256)
+        photos.append(sha256)
+
+    if fetch:
+        limiter = RateLimiter(requests_per_second)
+
+        def fetch_photo(number):
+            try:
+                return call_with_retry(download_ai_photo_bytes, number, retries=retries, limiter=limiter)
+            except Exception as e:
+                logger.warning(f"Photo #{number} could not be fetched for the pool: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = [photo_bytes for photo_bytes in pool.map(fetch_photo, range(1, size + 1)) if photo_bytes]
+        if size and not fetched:
+            raise RuntimeError(f"None of the {size} photos could be fetched for the pool")
+        if len(fetched) < size:
+            logger.warning(f"{size - len(fetched)} of {size} photos could not be fetched and were left out of the pool")
+        for photo_bytes in fetched:
+            add(encode_png(PILImage.open(BytesIO(photo_bytes))))
+    else:
+        rng = np.random.default_rng(seed)
+        for start in range(0, size, batch_size):
+            for image in render_avatars(min(batch_size, size - start), rng):
+                add(encode_png(image))
+
+    with open(os.path.join(pool_dir, PHOTO_POOL_INDEX), 'w', encoding='utf-8') as f:
+        json.dump({'size': PHOTO_SIZE, 'photos': photos}, f)
+    load_photo_pool.cache_clear()
+    logger.info(f"Photo pool '{pool_dir}' ready with {len(photos)} photos")
+    return len(photos)
+
+def load_photo_pool_index(pool_dir):
+    """Returns the content hashes listed in a photo pool index, or an empty list if there is no pool."""
+    index_path = os.path.join(pool_dir, PHOTO_POOL_INDEX)
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)['photos']
+
+@lru_cache(maxsize=None)
+def load_photo_pool(pool_dir=PHOTO_POOL_DIR):
+    """Loads the photo pool once per process; returns the photo paths, in index order."""
+    return tuple(os.path.join(pool_dir, f'{sha256}.png') for sha256 in load_photo_pool_index(pool_dir))
+
+def pick_pool_photo(cv_number, seed=0, pool_dir=PHOTO_POOL_DIR):
+    """Picks the pool photo of a CV in O(1). The same CV number and seed always get the same photo,
+    and consecutive CV numbers get different photos until the pool is exhausted. Returns None without a pool."""
+    photos = load_photo_pool(pool_dir)
+    if not photos:
+        return None
+    return photos[(zlib.crc32(str(seed).encode()) + cv_number) % len(photos)]
 
 # -------------------- Content Generation with Nova --------------------
 def generate_cv_content_with_nova(profile, language='en'):
@@ -192,120 +404,210 @@ def normalize_cv(cv_data):
     return cv_data
 
 # -------------------- PDF Creation --------------------
-def create_cv_pdf(cv_number, profile, language='en'):
+@lru_cache(maxsize=None)
+def get_cv_styles():
+    """Builds the paragraph styles of the CV layout once per process and reuses them for every CV."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=26,
+                                   textColor=colors.HexColor('#1a1a1a'), spaceAfter=8,
+                                   alignment=1, fontName='Helvetica-Bold')
+    section_style = ParagraphStyle('Section', parent=styles['Heading2'], fontSize=13,
+                                    textColor=colors.HexColor('#2c3e50'), spaceAfter=8,
+                                    spaceBefore=16, fontName='Helvetica-Bold')
+    subsection_style = ParagraphStyle('Subsection', parent=styles['Heading3'], fontSize=11,
+                                       textColor=colors.HexColor('#34495e'), spaceAfter=2,
+                                       fontName='Helvetica-Bold')
+    normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'], fontSize=10,
+                                  leading=13, textColor=colors.HexColor('#2c3e50'))
+    return title_style, section_style, subsection_style, normal_style
+
+def cv_file_name(cv_number, cv_data):
+    """Returns the PDF file name of a CV (without folder)."""
+    clean_name = cv_data.get("name", "Full_Name").replace(" ", "_").replace("/", "-")
+    return f'CV_{cv_number:03d}_{clean_name}.pdf'
+
+def build_cv_pdf(cv_number, cv_data, photo_path, language='en'):
+    """Renders the PDF of a CV from its normalized content and photo (CPU only, no network)."""
     try:
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Generating CV #{cv_number} for {profile['name']} in {language.upper()}...")
-        logger.info(f"{'='*60}")
-
-        cv_data = generate_cv_content_with_nova(profile, language)
-        cv_data = normalize_cv(cv_data)
-        photo_path = generate_ai_photo(cv_number)
-
-        clean_name = cv_data.get("name", "Full_Name").replace(" ", "_").replace("/", "-")
-        file_name = f'generated_cvs/CV_{cv_number:03d}_{clean_name}.pdf'
-
-        doc = SimpleDocTemplate(file_name, pagesize=A4,
-                                leftMargin=0.75*inch, rightMargin=0.75*inch,
-                                topMargin=0.75*inch, bottomMargin=0.75*inch)
-
-        elements = []
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=26,
-                                       textColor=colors.HexColor('#1a1a1a'), spaceAfter=8,
-                                       alignment=1, fontName='Helvetica-Bold')
-        section_style = ParagraphStyle('Section', parent=styles['Heading2'], fontSize=13,
-                                        textColor=colors.HexColor('#2c3e50'), spaceAfter=8,
-                                        spaceBefore=16, fontName='Helvetica-Bold')
-        subsection_style = ParagraphStyle('Subsection', parent=styles['Heading3'], fontSize=11,
-                                           textColor=colors.HexColor('#34495e'), spaceAfter=2,
-                                           fontName='Helvetica-Bold')
-        normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'], fontSize=10,
-                                      leading=13, textColor=colors.HexColor('#2c3e50'))
-
-        # Photo
-        if os.path.exists(photo_path):
-            img = Image(photo_path, width=1.2*inch, height=1.2*inch)
-            elements.append(img)
-            elements.append(Spacer(1, 10))
-
-        # Name
-        elements.append(Paragraph(cv_data.get('name'), title_style))
-        elements.append(Spacer(1, 2))
-
-        # Contact info
-        contact = f"""
-        <b>Email:</b> {cv_data.get('email')} | <b>Phone:</b> {cv_data.get('phone')}<br/>
-        <b>Address:</b> {cv_data.get('address')}<br/>
-        <b>LinkedIn:</b> {cv_data.get('linkedin')}
-        """
-        elements.append(Paragraph(contact, normal_style))
-        elements.append(Spacer(1, 16))
-
-        # Titles based on language
-        titles = {
-            'en': {'summary': 'PROFESSIONAL SUMMARY', 'experience': 'WORK EXPERIENCE',
-                   'education': 'EDUCATION', 'skills': 'SKILLS',
-                   'languages': 'LANGUAGES', 'certifications': 'CERTIFICATIONS'},
-            'es': {'summary': 'RESUMEN PROFESIONAL', 'experience': 'EXPERIENCIA LABORAL',
-                   'education': 'EDUCACIÓN', 'skills': 'HABILIDADES',
-                   'languages': 'IDIOMAS', 'certifications': 'CERTIFICACIONES'}
-        }
-        t = titles.get(language, titles['en'])
-
-        # Summary
-        elements.append(Paragraph(t['summary'], section_style))
-        elements.append(Paragraph(cv_data.get('summary'), normal_style))
-        elements.append(Spacer(1, 12))
-
-        # Experience
-        elements.append(Paragraph(t['experience'], section_style))
-        for exp in cv_data.get('experience', []):
-            elements.append(Paragraph(f"<b>{exp.get('position')}</b> | {exp.get('company')}", subsection_style))
-            elements.append(Paragraph(f"<i>{exp.get('start')} - {exp.get('end')}</i>", normal_style))
-            elements.append(Spacer(1, 4))
-            elements.append(Paragraph(exp.get('description'), normal_style))
-            elements.append(Spacer(1, 10))
-
-        # Education
-        elements.append(Paragraph(t['education'], section_style))
-        for edu in cv_data.get('education', []):
-            edu_title = f"<b>{edu.get('degree')}</b>"
-            if edu.get('specialty'):
-                edu_title += f" | {edu.get('specialty')}"
-            elements.append(Paragraph(edu_title, subsection_style))
-            elements.append(Paragraph(f"{edu.get('university')} | {edu.get('year')}", normal_style))
-            elements.append(Spacer(1, 8))
-
-        # Skills
-        elements.append(Paragraph(t['skills'], section_style))
-        skills_text = " • ".join(cv_data.get('skills', []))
-        elements.append(Paragraph(skills_text, normal_style))
-        elements.append(Spacer(1, 10))
-
-        # Languages
-        if cv_data.get('languages'):
-            elements.append(Paragraph(t['languages'], section_style))
-            languages_text = " | ".join([f"<b>{lang.get('language')}</b>: {lang.get('level')}" for lang in cv_data['languages']])
-            elements.append(Paragraph(languages_text, normal_style))
-            elements.append(Spacer(1, 10))
-
-        # Certifications
-        if cv_data.get('certifications'):
-            elements.append(Paragraph(t['certifications'], section_style))
-            cert_text = " • ".join(cv_data['certifications'])
-            elements.append(Paragraph(cert_text, normal_style))
-
-        # Build PDF
-        doc.build(elements)
+        file_name = f'generated_cvs/{cv_file_name(cv_number, cv_data)}'
+        render_cv_pdf(file_name, cv_data, photo_path if os.path.exists(photo_path) else None, language)
         logger.info(f"CV #{cv_number} completed: {file_name}")
         return file_name
     except Exception as e:
         logger.error(f"Error generating CV #{cv_number}: {e}")
         raise
 
+def build_cv_pdf_bytes(cv_number, cv_data, photo_bytes, language='en'):
+    """Renders the PDF of a CV into memory; returns its file name and content, nothing touches the disk."""
+    try:
+        buffer = BytesIO()
+        render_cv_pdf(buffer, cv_data, BytesIO(photo_bytes) if photo_bytes else None, language)
+        logger.info(f"CV #{cv_number} rendered in memory ({buffer.tell()} bytes)")
+        return cv_file_name(cv_number, cv_data), buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Error generating CV #{cv_number}: {e}")
+        raise
+
+def render_cv_pdf(target, cv_data, photo, language='en'):
+    """Lays out a CV and writes the PDF to `target` (a file path or a binary buffer).
+
+    `photo` is a file path or a binary buffer with the image, or None for no photo.
+    """
+    doc = SimpleDocTemplate(target, pagesize=A4,
+                            leftMargin=0.75*inch, rightMargin=0.75*inch,
+                            topMargin=0.75*inch, bottomMargin=0.75*inch)
+
+    elements = []
+    title_style, section_style, subsection_style, normal_style = get_cv_styles()
+
+    # Photo
+    if photo is not None:
+        img = Image(photo, width=1.2*inch, height=1.2*inch)
+        elements.append(img)
+        elements.append(Spacer(1, 10))
+
+    # Name
+    elements.append(Paragraph(cv_data.get('name'), title_style))
+    elements.append(Spacer(1, 2))
+
+    # Contact info
+    contact = f"""
+    <b>Email:</b> {cv_data.get('email')} | <b>Phone:</b> {cv_data.get('phone')}<br/>
+    <b>Address:</b> {cv_data.get('address')}<br/>
+    <b>LinkedIn:</b> {cv_data.get('linkedin')}
+    """
+    elements.append(Paragraph(contact, normal_style))
+    elements.append(Spacer(1, 16))
+
+    # Titles based on language
+    titles = {
+        'en': {'summary': 'PROFESSIONAL SUMMARY', 'experience': 'WORK EXPERIENCE',
+               'education': 'EDUCATION', 'skills': 'SKILLS',
+               'languages': 'LANGUAGES', 'certifications': 'CERTIFICATIONS'},
+        'es': {'summary': 'RESUMEN PROFESIONAL', 'experience': 'EXPERIENCIA LABORAL',
+               'education': 'EDUCACIÓN', 'skills': 'HABILIDADES',
+               'languages': 'IDIOMAS', 'certifications': 'CERTIFICACIONES'}
+    }
+    t = titles.get(language, titles['en'])
+
+    # Summary
+    elements.append(Paragraph(t['summary'], section_style))
+    elements.append(Paragraph(cv_data.get('summary'), normal_style))
+    elements.append(Spacer(1, 12))
+
+    # Experience
+    elements.append(Paragraph(t['experience'], section_style))
+    for exp in cv_data.get('experience', []):
+        elements.append(Paragraph(f"<b>{exp.get('position')}</b> | {exp.get('company')}", subsection_style))
+        elements.append(Paragraph(f"<i>{exp.get('start')} - {exp.get('end')}</i>", normal_style))
+        elements.append(Spacer(1, 4))
+        elements.append(Paragraph(exp.get('description'), normal_style))
+        elements.append(Spacer(1, 10))
+
+    # Education
+    elements.append(Paragraph(t['education'], section_style))
+    for edu in cv_data.get('education', []):
+        edu_title = f"<b>{edu.get('degree')}</b>"
+        if edu.get('specialty'):
+            edu_title += f" | {edu.get('specialty')}"
+        elements.append(Paragraph(edu_title, subsection_style))
+        elements.append(Paragraph(f"{edu.get('university')} | {edu.get('year')}", normal_style))
+        elements.append(Spacer(1, 8))
+
+    # Skills
+    elements.append(Paragraph(t['skills'], section_style))
+    skills_text = " • ".join(cv_data.get('skills', []))
+    elements.append(Paragraph(skills_text, normal_style))
+    elements.append(Spacer(1, 10))
+
+    # Languages
+    if cv_data.get('languages'):
+        elements.append(Paragraph(t['languages'], section_style))
+        languages_text = " | ".join([f"<b>{lang.get('language')}</b>: {lang.get('level')}" for lang in cv_data['languages']])
+        elements.append(Paragraph(languages_text, normal_style))
+        elements.append(Spacer(1, 10))
+
+    # Certifications
+    if cv_data.get('certifications'):
+        elements.append(Paragraph(t['certifications'], section_style))
+        cert_text = " • ".join(cv_data['certifications'])
+        elements.append(Paragraph(cert_text, normal_style))
+
+    # Build PDF
+    doc.build(elements)
+
+# -------------------- Run Manifest --------------------
+def load_manifest(path):
+    """Loads a run manifest (JSONL) and returns the latest record of each profile index."""
+    records = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['index']] = record
+    return records
+
+def append_manifest(path, records, index, **updates):
+    """Merges `updates` into the record of a profile index and appends it to the manifest."""
+    record = {**records.get(index, {'index': index}), **updates, 'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    records[index] = record
+    if path:
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
 # -------------------- Batch Generation --------------------
-def generate_cvs_batch(count=1, languages=['en'], profiles_json_path="profiles.json"):
+def fetch_cv_assets(cv_number, profile, language, nova_limiter=None, photo_limiter=None, retries=3,
+                    cached_cv_data=None, cached_photo_path=None, in_memory=False, photo_seed=0):
+    """Network stage of the pipeline: CV content from Nova (rate limited, retried) and the photo.
+
+    Content and photo already recorded in the run manifest are reused instead of fetched again.
+    Photos come from the pool (picked with `photo_seed`) when one was built; only photos fetched
+    from the external API wait for `photo_limiter`. With `in_memory=True` the photo is returned
+    as PNG bytes instead of a path.
+    """
+    if cached_cv_data is not None:
+        cv_data = cached_cv_data
+    else:
+        cv_data = call_with_retry(generate_cv_content_with_nova, profile, language, retries=retries, limiter=nova_limiter)
+        cv_data = normalize_cv(cv_data)
+    if not in_memory and cached_photo_path and os.path.exists(cached_photo_path):
+        return cv_data, cached_photo_path
+    if in_memory:
+        return cv_data, generate_ai_photo_bytes(cv_number, photo_seed, photo_limiter)
+    photo_path = generate_ai_photo(cv_number, seed=photo_seed, limiter=photo_limiter)
+    return cv_data, photo_path
+
+def upload_cv_pdf(s3_service, file_name, pdf_bytes, category, retries=3):
+    """Upload stage of the in-memory pipeline: sends a rendered PDF to S3 with its category sidecar."""
+    return call_with_retry(s3_service.upload_file, pdf_bytes, file_name, "application/pdf", category, retries=retries)
+
+def generate_cvs_batch(count=1, languages=['en'], profiles_json_path="profiles.json",
+                       pipelined=False, workers=8, requests_per_second=2.0, pdf_workers=None, retries=3,
+                       manifest_path="generated_cvs/manifest.jsonl", resume=False, retry_failures_only=False,
+                       upload_to_s3=False, photo_seed=0):
+    """
+    Generates `count` CVs from the profiles file.
+
+    By default CVs are generated one after another. With `pipelined=True`, Nova calls and
+    photo fetches run in a pool of `workers` threads, limited to `requests_per_second` each
+    and retried with backoff, while PDFs are built in a pool of `pdf_workers` processes
+    (all cores by default) as soon as their content is ready.
+
+    Every stage is recorded in the run manifest (`manifest_path`, JSONL). With `resume=True`,
+    the run picks up the manifest of previous runs: it skips CVs whose PDF already exists and
+    re-renders from the cached Nova content instead of calling the model again. With
+    `retry_failures_only=True`, only the CVs that failed in a previous run are processed.
+    Otherwise every CV is generated again. Pass `manifest_path=None` to disable the manifest.
+
+    With `upload_to_s3=True`, photos and PDFs are rendered into memory and each PDF is
+    uploaded through `S3Service.upload_file` with the profile's `role` as its category,
+    instead of being written to `generated_cvs/`.
+
+    When a photo pool was built (`build_photo_pool`), photos are picked from it with
+    `photo_seed`; another seed gives every CV number another photo.
+    """
     print(f"\n{'='*70}")
     print(f"🚀 AI CV GENERATOR")
     print(f"{'='*70}")
@@ -313,33 +615,166 @@ def generate_cvs_batch(count=1, languages=['en'], profiles_json_path="profiles.j
     print(f"🤖 Model: Amazon Nova Pro (EU)")
     print(f"📊 Count: {count} CVs")
     print(f"🌍 Languages: {', '.join([i.upper() for i in languages])}")
+    if pipelined:
+        print(f"⚡ Pipelined: {workers} workers, {requests_per_second} req/s, {pdf_workers or os.cpu_count()} PDF processes")
+    if upload_to_s3:
+        print(f"☁️  Upload: s3://{S3_BUCKET_NAME}/{S3_PREFIX} (in memory, category = role)")
+    if manifest_path:
+        mode = ' (retrying failures only)' if retry_failures_only else ' (resuming)' if resume else ''
+        print(f"📒 Manifest: {manifest_path}{mode}")
     print(f"{'='*70}\n")
 
     os.makedirs('generated_cvs', exist_ok=True)
-    successes, failures = [], []
+    successes, failures, skipped = [], [], []
 
     profiles = load_profiles_json(profiles_json_path)
-
+    # Previous runs only count when resuming; a fresh run regenerates every CV
+    manifest = load_manifest(manifest_path) if resume or retry_failures_only else {}
+    s3_service = S3Service() if upload_to_s3 else None
+
+    def is_done(record):
+        if record.get('status') != 'done':
+            return False
+        if upload_to_s3:
+            return bool(record.get('s3_key'))
+        return bool(record.get('pdf_path')) and os.path.exists(record['pdf_path'])
+
+    # Decide what each profile still needs, based on the manifest of previous runs
+    jobs = []
     for i, profile in enumerate(profiles[:count], 1):
-        try:
-            language = random.choice(languages)
-            file = create_cv_pdf(i, profile, language)
-            successes.append(file)
-            print(f"✓ Progress: {i}/{count} | ✅ {len(successes)} | ❌ {len(failures)}")
-        except Exception as e:
-            logger.error(f"Error in CV #{i}: {str(e)[:100]}")
-            failures.append(i)
-            print(f"✗ Progress: {i}/{count} | ✅ {len(successes)} | ❌ {len(failures)}")
+        record = manifest.get(i, {})
+        if is_done(record):
+            skipped.append(i)
+            continue
+        if retry_failures_only and record.get('status') != 'failed':
+            continue
+        language = record.get('language') or random.choice(languages)
+        jobs.append((i, profile, language, record.get('cv_data'), record.get('photo_path')))
+    count = len(jobs)
+    if skipped:
+        logger.info(f"Resuming from {manifest_path}: skipping {len(skipped)} CVs already completed in a previous run")
+        print(f"⏭  Skipping {len(skipped)} CVs already completed in a previous run")
+
+    def report(ok, cv_number, error=None):
+        if ok:
+            print(f"✓ Progress: {len(successes) + len(failures)}/{count} | ✅ {len(successes)} | ❌ {len(failures)}")
+        else:
+            logger.error(f"Error in CV #{cv_number}: {str(error)[:100]}")
+            print(f"✗ Progress: {len(successes) + len(failures)}/{count} | ✅ {len(successes)} | ❌ {len(failures)}")
+
+    def record_content(i, profile, language, cv_data, photo):
+        append_manifest(manifest_path, manifest, i, name=profile['name'], role=profile.get('role'),
+                        language=language, status='content', cv_data=cv_data,
+                        photo_path=None if upload_to_s3 else photo)
+
+    def record_done(i, result):
+        successes.append(i)
+        if upload_to_s3:
+            append_manifest(manifest_path, manifest, i, status='done', s3_key=result['s3_key'], url=result['url'], error=None)
+        else:
+            append_manifest(manifest_path, manifest, i, status='done', pdf_path=result, error=None)
+        report(True, i)
+
+    def record_failure(i, profile, language, error):
+        failures.append(i)
+        append_manifest(manifest_path, manifest, i, name=profile['name'], role=profile.get('role'),
+                        language=language, status='failed', error=str(error)[:500])
+        report(False, i, error)
+
+    if not pipelined:
+        for i, profile, language, cached_cv_data, cached_photo_path in jobs:
+            try:
+                logger.info(f"Generating CV #{i} for {profile['name']} in {language.upper()}...")
+                cv_data, photo = fetch_cv_assets(i, profile, language, retries=0, cached_cv_data=cached_cv_data,
+                                                 cached_photo_path=cached_photo_path, in_memory=upload_to_s3,
+                                                 photo_seed=photo_seed)
+                record_content(i, profile, language, cv_data, photo)
+                if upload_to_s3:
+                    file_name, pdf_bytes = build_cv_pdf_bytes(i, cv_data, photo, language)
+                    record_done(i, upload_cv_pdf(s3_service, file_name, pdf_bytes, profile.get('role'), retries=0))
+                else:
+                    record_done(i, build_cv_pdf(i, cv_data, photo, language))
+            except Exception as e:
+                record_failure(i, profile, language, e)
+    else:
+        nova_limiter = RateLimiter(requests_per_second)
+        photo_limiter = RateLimiter(requests_per_second)
+        profiles_by_index = {i: profile for i, profile, *_ in jobs}
+        with ThreadPoolExecutor(max_workers=workers) as io_pool, ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool:
+            # Each future maps to (stage, cv_number, language)
+            pending = {
+                io_pool.submit(fetch_cv_assets, i, profile, language, nova_limiter, photo_limiter, retries,
+                               cached_cv_data, cached_photo_path, upload_to_s3, photo_seed): ("fetch", i, language)
+                for i, profile, language, cached_cv_data, cached_photo_path in jobs
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, i, language = pending.pop(future)
+                    profile = profiles_by_index[i]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        record_failure(i, profile, language, e)
+                        continue
+                    if stage == "fetch":
+                        # Content is ready: record it, then hand the CPU-bound rendering to the process pool
+                        cv_data, photo = result
+                        record_content(i, profile, language, cv_data, photo)
+                        build = build_cv_pdf_bytes if upload_to_s3 else build_cv_pdf
+                        pending[pdf_pool.submit(build, i, cv_data, photo, language)] = ("build", i, language)
+                    elif stage == "build" and upload_to_s3:
+                        # The PDF is in memory: upload it from the thread pool
+                        file_name, pdf_bytes = result
+                        pending[io_pool.submit(upload_cv_pdf, s3_service, file_name, pdf_bytes, profile.get('role'),
+                                               retries)] = ("upload", i, language)
+                    else:
+                        record_done(i, result)
 
     print(f"\n{'='*70}")
     print(f"📊 FINAL SUMMARY")
     print(f"{'='*70}")
-    print(f"✅ Successful CVs: {len(successes)}/{count} ({len(successes)/count*100:.1f}%)")
+    print(f"✅ Successful CVs: {len(successes)}/{count} ({len(successes)/count*100 if count else 0:.1f}%)")
     print(f"❌ Failed CVs: {len(failures)}/{count}")
     if failures:
-        print(f"   Failed numbers: {failures}")
-    print(f"📁 Folder: generated_cvs/")
+        print(f"   Failed numbers: {sorted(failures)}")
+    if skipped:
+        print(f"⏭  Already completed (skipped): {len(skipped)}")
+    if upload_to_s3:
+        print(f"☁️  Uploaded to: s3://{S3_BUCKET_NAME}/{S3_PREFIX}")
+    else:
+        print(f"📁 Folder: generated_cvs/")
     print(f"{'='*70}\n")
 
 if __name__ == "__main__":
-    generate_cvs_batch(count=2, languages=['en'])
+    parser = argparse.ArgumentParser(description="Generate synthetic CVs with Amazon Nova.")
+    parser.add_argument("--count", type=int, default=2, help="Number of CVs to generate (0 = none, e.g. to only build the photo pool)")
+    parser.add_argument("--languages", nargs="+", default=['en'], help="Languages to pick from, e.g. en es")
+    parser.add_argument("--profiles", default="profiles.json", help="Path of the profiles file")
+    parser.add_argument("--pipelined", action="store_true", help="Overlap network calls and PDF rendering")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Threads for Nova calls and photo fetches (pipelined mode and --fetch-photos)")
+    parser.add_argument("--requests-per-second", type=float, default=2.0,
+                        help="Rate limit for Nova calls and, separately, external photo fetches (pipelined mode and --fetch-photos)")
+    parser.add_argument("--manifest", metavar="PATH", default="generated_cvs/manifest.jsonl",
+                        help="Run manifest recording every CV (empty to disable)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the CVs the manifest records as done and reuse its Nova content")
+    parser.add_argument("--retry-failures", action="store_true", help="Only process the CVs the manifest records as failed")
+    parser.add_argument("--upload", action="store_true", help="Render in memory and upload each CV to S3 under its role")
+    parser.add_argument("--photo-seed", type=int, default=0,
+                        help="Seed picking the pool photo of each CV (and rendering the avatars of --build-photo-pool)")
+    parser.add_argument("--build-photo-pool", type=int, metavar="SIZE", default=None,
+                        help=f"Build (or extend) the photo pool in '{PHOTO_POOL_DIR}' with SIZE photos before generating")
+    parser.add_argument("--fetch-photos", action="store_true",
+                        help="Fill the photo pool from the external photo API instead of rendering avatars")
+    args = parser.parse_args()
+
+    if args.build_photo_pool:
+        build_photo_pool(size=args.build_photo_pool, fetch=args.fetch_photos, seed=args.photo_seed,
+                         workers=args.workers, requests_per_second=args.requests_per_second)
+    if args.count:
+        generate_cvs_batch(count=args.count, languages=args.languages, profiles_json_path=args.profiles,
+                           pipelined=args.pipelined, workers=args.workers, requests_per_second=args.requests_per_second,
+                           manifest_path=args.manifest or None, resume=args.resume,
+                           retry_failures_only=args.retry_failures, upload_to_s3=args.upload, photo_seed=args.photo_seed)
@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from api import upload, chat
+from api import upload, chat, ingestion, rank
 from config.settings import API_HOST, API_PORT
+from services.metrics_service import render_metrics
+from services.tracing_service import TRACE_ID_HEADER, TracingMiddleware, configure_trace_logging
+
+# Prefix every log line with the trace ID of the request that emitted it
+configure_trace_logging()
 
 app = FastAPI(title="CV Assistant API")
 
@@ -11,17 +16,28 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["Server-Timing", TRACE_ID_HEADER]
 )
+# Give every request a trace ID and a Server-Timing stage breakdown
+app.add_middleware(TracingMiddleware)
 
 # Include routers
 app.include_router(upload.router, prefix="/api")
 app.include_router(chat.router, prefix="/api")
+app.include_router(ingestion.router, prefix="/api")
+app.include_router(rank.router, prefix="/api")
 
 @app.get("/")
 async def root():
     return {"message": "CV Assistant API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Per-stage latency, error and in-flight metrics in the Prometheus text format."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=API_HOST, port=API_PORT)
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class ChatRequest(BaseModel):
     """
@@ -7,9 +8,22 @@ class ChatRequest(BaseModel):
     Attributes:
         message (str): The message content sent by the user.
         category (str, optional): The category to classify the message. Defaults to None.
+        categories (List[str], optional): Several categories to search at once. Combined with
+            `category`; when neither is set, every category is searched.
+        session_id (str, optional): The chat session of the message, chosen by the client.
+            Follow-up questions of a session reuse its retrieved chunks and history.
+        follow_up (bool, optional): Whether the message follows up on the previous answer of the
+            session. When not set, it is detected from explicit references ("which of them...").
     """
     message: str
-    category: str = None
+    category: Optional[str] = None
+    categories: Optional[List[str]] = None
+    session_id: Optional[str] = None
+    follow_up: Optional[bool] = None
+
+    def category_filter(self) -> List[str]:
+        """Returns the categories to search (`category` and `categories`); an empty list means all of them."""
+        return list(dict.fromkeys(filter(None, [self.category, *(self.categories or [])])))
 
 class ChatResponse(BaseModel):
     """
@@ -17,5 +31,53 @@ class ChatResponse(BaseModel):
     
     Attributes:
         response (str): The response message to return to the user.
+        session_id (str, optional): The chat session of the message, as sent in the request.
     """
     response: str
+    session_id: Optional[str] = None
+
+class BatchChatItem(BaseModel):
+    """
+    Model representing one question of a batch chat request.
+
+    Attributes:
+        message (str): The message content sent by the user.
+        category (str, optional): The category to classify the message. Defaults to None.
+    """
+    message: str
+    category: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    """
+    Model representing a batch of questions sent to the chat service.
+
+    Attributes:
+        items (List[BatchChatItem]): The questions to answer.
+    """
+    items: List[BatchChatItem]
+
+class BatchChatResult(BaseModel):
+    """
+    Model representing the answer to one question of a batch.
+
+    Attributes:
+        index (int): The position of the question in the request.
+        message (str): The question.
+        category (str, optional): The category of the question.
+        response (str, optional): The answer, including citations. None if the question failed.
+        error (str, optional): The error message if the question failed.
+    """
+    index: int
+    message: str
+    category: Optional[str] = None
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    """
+    Model representing the response to a batch chat request.
+
+    Attributes:
+        results (List[BatchChatResult]): One result per question, in request order.
+    """
+    results: List[BatchChatResult]
@@ -0,0 +1,56 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from config.settings import RANK_TOP_N
+
+class RankRequest(BaseModel):
+    """
+    Model representing a request to rank the CVs of a category against a job description.
+
+    Attributes:
+        job_description (str): The job description to rank the CVs against.
+        category (str): The category whose CVs are ranked.
+        top_n (int, optional): Number of candidates to return. Defaults to `RANK_TOP_N`.
+    """
+    job_description: str
+    category: str
+    top_n: int = RANK_TOP_N
+
+class RankedCandidate(BaseModel):
+    """
+    Model representing one ranked CV.
+
+    Attributes:
+        rank (int): The rank of the CV, from 1.
+        name (str): The candidate name (the file name if the CV is not in the field index).
+        filename (str): The file name of the CV.
+        source (str): The source URI of the CV.
+        download_url (str, optional): A URL to download the CV (None for local sources or if it could not be presigned).
+        category (str): The category of the CV.
+        score (float): The combined score.
+        similarity (float): The similarity of the CV with the job description.
+        skill_overlap (float): The share of the required skills held by the candidate.
+        matched_skills (List[str]): The required skills held by the candidate.
+    """
+    rank: int
+    name: str
+    filename: str
+    source: str
+    download_url: Optional[str] = None
+    category: str
+    score: float
+    similarity: float
+    skill_overlap: float
+    matched_skills: List[str]
+
+class RankResponse(BaseModel):
+    """
+    Model representing the ranking of the CVs of a category.
+
+    Attributes:
+        candidates (List[RankedCandidate]): The best candidates, best first.
+        total_candidates (int): The number of CVs scored.
+        job_skills (List[str]): The skills, certifications and languages found in the job description.
+    """
+    candidates: List[RankedCandidate]
+    total_candidates: int
+    job_skills: List[str]
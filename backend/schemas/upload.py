@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class UploadResponse(BaseModel):
     """
@@ -9,8 +10,48 @@ class UploadResponse(BaseModel):
         file_id (str): A unique identifier for the uploaded file.
         url (str): The URL where the uploaded file can be accessed.
         filename (str): The name of the uploaded file.
+        duplicate (bool): Whether identical content was already stored, so nothing was uploaded.
     """
     message: str
     file_id: str
     url: str
     filename: str
+    duplicate: bool = False
+
+class BulkUploadItem(BaseModel):
+    """
+    Model representing the outcome of one file in a bulk upload.
+
+    Attributes:
+        filename (str): The name of the file.
+        category (str, optional): The category the file was uploaded under.
+        status (str): "uploaded", "duplicate" (identical content already stored) or "failed".
+        file_id (str, optional): A unique identifier for the uploaded file.
+        url (str, optional): The URL where the uploaded file can be accessed.
+        error (str, optional): The error message if the upload failed.
+    """
+    filename: str
+    category: Optional[str] = None
+    status: str
+    file_id: Optional[str] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkUploadResponse(BaseModel):
+    """
+    Model representing the response after a bulk upload.
+
+    Attributes:
+        message (str): A message summarizing the upload.
+        uploaded (int): The number of uploaded files.
+        duplicates (int): The number of files whose content was already stored.
+        failed (int): The number of files that could not be uploaded.
+        results (List[BulkUploadItem]): The outcome of each file.
+        ingestion_scheduled (bool): Whether an ingestion job was scheduled for the batch.
+    """
+    message: str
+    uploaded: int
+    duplicates: int = 0
+    failed: int
+    results: List[BulkUploadItem]
+    ingestion_scheduled: bool = False
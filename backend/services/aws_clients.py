@@ -0,0 +1,81 @@
+import boto3
+import logging
+import threading
+from botocore.config import Config
+from config.settings import (
+    AWS_REGION,
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_CONNECT_TIMEOUT,
+    AWS_READ_TIMEOUT,
+    AWS_MAX_ATTEMPTS,
+    AWS_RETRY_MODE
+)
+
+# Set up logger to track client creation
+logger = logging.getLogger(__name__)
+
+def client_config(**overrides) -> Config:
+    """
+    Returns the botocore configuration shared by every AWS client of the app.
+
+    - `max_pool_connections`: sized for the chat and upload concurrency, so concurrent
+      calls do not queue for one of the 10 connections of the default pool.
+    - Connect and read timeouts, so a stalled connection fails instead of holding a worker.
+    - Retries in adaptive mode, which also rate-limits the client when AWS throttles it.
+
+    Args:
+        **overrides: Options replacing the shared ones (e.g., `read_timeout` for a slow call).
+
+    Returns:
+        Config: The client configuration.
+    """
+    options = {
+        "max_pool_connections": AWS_MAX_POOL_CONNECTIONS,
+        "connect_timeout": AWS_CONNECT_TIMEOUT,
+        "read_timeout": AWS_READ_TIMEOUT,
+        "retries": {"total_max_attempts": AWS_MAX_ATTEMPTS, "mode": AWS_RETRY_MODE}
+    }
+    options.update(overrides)
+    return Config(**options)
+
+_clients = {}
+_clients_lock = threading.Lock()
+# Creating clients from the default boto3 session is not thread-safe, so the factory has its own
+_session = None
+
+def get_client(service_name: str, region_name: str = AWS_REGION, **kwargs):
+    """
+    Returns the shared client of an AWS service, creating it on first use.
+
+    Clients are thread-safe once created, so one client per service (and region and
+    credentials) serves every request; only its creation is guarded by a lock.
+
+    Args:
+        service_name (str): The AWS service (e.g., "s3" or "bedrock-runtime").
+        region_name (str): The AWS region.
+        **kwargs: Extra `boto3` client arguments, e.g. explicit credentials. Each distinct
+            set of arguments gets its own client.
+
+    Returns:
+        botocore.client.BaseClient: The shared client.
+    """
+    global _session
+    key = (service_name, region_name, tuple(sorted(kwargs.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                if _session is None:
+                    _session = boto3.Session()
+                client = _session.client(service_name, region_name=region_name, config=client_config(), **kwargs)
+                _clients[key] = client
+                logger.info(f"AWS client created for '{service_name}' in '{region_name}'")
+    return client
+
+def clear_clients() -> None:
+    """Drops the shared clients (and their session), so the next calls create new ones."""
+    global _session
+    with _clients_lock:
+        _clients.clear()
+        _session = None
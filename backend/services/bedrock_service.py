@@ -1,10 +1,140 @@
 import boto3
+import botocore.session
 import logging
-from config.settings import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, KNOWLEDGE_BASE_ROLE_ARN
+import threading
+from datetime import datetime, timezone
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
+from services.aws_clients import client_config, get_client
+from config.settings import (
+    AWS_REGION,
+    AWS_ACCESS_KEY_ID,
+    AWS_SECRET_ACCESS_KEY,
+    KNOWLEDGE_BASE_ROLE_ARN,
+    STS_REFRESH_AHEAD_SECONDS,
+    STS_MANDATORY_REFRESH_SECONDS
+)
 
 # Set up logger to track events, errors, and general info
 logger = logging.getLogger(__name__)
 
+class AssumedRoleCredentialProvider(CredentialProvider):
+    """
+    Caches the temporary credentials of an assumed role and refreshes them before they expire.
+
+    It is a botocore credential provider, so a botocore session resolves its credentials
+    through it (see `load`).
+
+    - Within `refresh_ahead_seconds` of expiration, the first caller starts a single
+      background refresh and every caller keeps using the current credentials meanwhile.
+    - Within `mandatory_refresh_seconds` of expiration (or before the first fetch), callers
+      block on the refresh, but only one of them calls STS; the others wait for its result.
+    """
+
+    METHOD = "sts-assume-role"
+
+    def __init__(
+        self,
+        sts_client,
+        role_arn: str,
+        session_name: str = "BedrockSyncSession",
+        refresh_ahead_seconds: float = STS_REFRESH_AHEAD_SECONDS,
+        mandatory_refresh_seconds: float = STS_MANDATORY_REFRESH_SECONDS
+    ):
+        """
+        Args:
+            sts_client (boto3.client): The STS client used to assume the role.
+            role_arn (str): The ARN of the role to assume.
+            session_name (str): The name of the assumed role session.
+            refresh_ahead_seconds (float): Seconds before expiration when a background refresh starts.
+            mandatory_refresh_seconds (float): Seconds before expiration when callers must wait for fresh credentials.
+        """
+        super().__init__()
+        self.sts_client = sts_client
+        self.role_arn = role_arn
+        self.session_name = session_name
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.mandatory_refresh_seconds = mandatory_refresh_seconds
+        self._credentials = None
+        self._refresh_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._background_refresh = False
+
+    def _fetch(self) -> dict:
+        # Assume the KB role to gain temporary security credentials for accessing the Bedrock service
+        assumed_role = self.sts_client.assume_role(
+            RoleArn=self.role_arn,  # ARN of the KB role
+            RoleSessionName=self.session_name  # A unique name for the assumed role session
+        )
+        credentials = assumed_role['Credentials']
+        logger.info(f"Assumed role credentials refreshed, expiring at {credentials['Expiration']}")
+        return {
+            "access_key": credentials['AccessKeyId'],
+            "secret_key": credentials['SecretAccessKey'],
+            "token": credentials['SessionToken'],
+            "expiry_time": credentials['Expiration'].isoformat()
+        }
+
+    def _seconds_left(self, credentials: dict) -> float:
+        if credentials is None:
+            return 0
+        expiry_time = datetime.fromisoformat(credentials["expiry_time"])
+        return (expiry_time - datetime.now(timezone.utc)).total_seconds()
+
+    def _refresh_in_background(self) -> None:
+        with self._state_lock:
+            if self._background_refresh:
+                return
+            self._background_refresh = True
+
+        def refresh():
+            try:
+                with self._refresh_lock:
+                    if self._seconds_left(self._credentials) < self.refresh_ahead_seconds:
+                        self._credentials = self._fetch()
+            except Exception:
+                # The current credentials are still valid; the next caller retries
+                logger.exception("Background refresh of assumed role credentials failed")
+            finally:
+                with self._state_lock:
+                    self._background_refresh = False
+
+        threading.Thread(target=refresh, name="sts-refresh", daemon=True).start()
+
+    def get_credentials(self) -> dict:
+        """
+        Returns valid credentials, refreshing them if needed.
+
+        Returns:
+            dict: The `access_key`, `secret_key`, `token` and ISO `expiry_time`, in the
+                metadata format expected by botocore's `RefreshableCredentials`.
+        """
+        credentials = self._credentials
+        seconds_left = self._seconds_left(credentials)
+
+        if seconds_left < self.mandatory_refresh_seconds:
+            with self._refresh_lock:
+                # Another caller may have refreshed while this one was waiting
+                if self._seconds_left(self._credentials) < self.mandatory_refresh_seconds:
+                    self._credentials = self._fetch()
+                return self._credentials
+
+        if seconds_left < self.refresh_ahead_seconds:
+            self._refresh_in_background()
+        return credentials
+
+    def load(self) -> RefreshableCredentials:
+        """
+        Returns credentials that botocore refreshes through `get_credentials` before they expire.
+
+        Returns:
+            RefreshableCredentials: The assumed role credentials.
+        """
+        return RefreshableCredentials.create_from_metadata(
+            metadata=self.get_credentials(),
+            refresh_using=self.get_credentials,
+            method=self.METHOD
+        )
+
 class BedrockService:
     """
     A service to interact with Amazon Bedrock using AWS SDK.
@@ -12,17 +142,20 @@ class BedrockService:
     and synchronize data sources with the Knowledge Base (KB).
     """
 
-    def __init__(self):
+    def __init__(self, client=None):
         """
         Initialize the BedrockService instance.
         
         This will configure the STS client needed to assume a role 
         to interact with Amazon Bedrock Knowledge Base services.
+
+        Args:
+            client (optional): A ready-made `bedrock-agent` client to use instead of assuming
+                the role (e.g., `services.fakes.FakeBedrockAgentClient` to run offline).
         """
         # Create an STS (Security Token Service) client to assume a role
-        self.sts_client = boto3.client(
+        self.sts_client = get_client(
             "sts",
-            region_name=AWS_REGION,
             aws_access_key_id=AWS_ACCESS_KEY_ID,
             aws_secret_access_key=AWS_SECRET_ACCESS_KEY
         )
@@ -30,37 +163,42 @@ class BedrockService:
         # ARN (Amazon Resource Name) for the Knowledge Base role that we need to assume
         self.kb_role_arn = KNOWLEDGE_BASE_ROLE_ARN
 
+        # Assumed-role credentials are cached and refreshed ahead of expiration
+        self.credential_provider = AssumedRoleCredentialProvider(self.sts_client, self.kb_role_arn)
+        self._cached_client = client
+        self._client_lock = threading.Lock()
+
     def get_bedrock_client(self):
         """
         Assumes a role in the Knowledge Base and returns a client for Bedrock API.
 
-        This function assumes the specified IAM role to acquire temporary credentials
-        and uses these credentials to create a Bedrock agent client.
+        The client is created once, on the first call, and reused afterwards. Its
+        temporary credentials come from `credential_provider`, which caches them and
+        refreshes them before they expire, so later calls make no STS round trip.
 
         Returns:
             bedrock_agent_client (boto3.client): The Bedrock agent client with temporary credentials.
         """
-        try:
-            # Assume the KB role to gain temporary security credentials for accessing the Bedrock service
-            assumed_role = self.sts_client.assume_role(
-                RoleArn=self.kb_role_arn,  # ARN of the KB role
-                RoleSessionName="BedrockSyncSession"  # A unique name for the assumed role session
-            )
+        if self._cached_client is not None:
+            return self._cached_client
 
-            # Extract the temporary credentials from the assumed role response
-            credentials = assumed_role['Credentials']
+        try:
+            with self._client_lock:
+                if self._cached_client is None:
+                    # The session resolves its credentials through the assumed role provider only
+                    botocore_session = botocore.session.get_session()
+                    botocore_session.register_component(
+                        "credential_provider", CredentialResolver(providers=[self.credential_provider])
+                    )
 
-            # Create the Bedrock agent client with the temporary credentials
-            bedrock_agent_client = boto3.client(
-                "bedrock-agent",
-                region_name=AWS_REGION,
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken']  # Include the session token for authorization
-            )
+                    # Create the Bedrock agent client once; it stays valid across credential refreshes
+                    self._cached_client = boto3.Session(
+                        botocore_session=botocore_session,
+                        region_name=AWS_REGION
+                    ).client("bedrock-agent", config=client_config())
+                    logger.info("Successfully assumed role and created Bedrock client.")
 
-            logger.info("Successfully assumed role and created Bedrock client.")
-            return bedrock_agent_client
+            return self._cached_client
 
         except Exception as e:
             # Log any error encountered during the role assumption or client creation
@@ -93,9 +231,35 @@ class BedrockService:
 
             # Log the successful initiation of the sync job
             logger.info(f"Sync initiated with Bedrock. Job details: {response}")
+
             return response
 
         except Exception as e:
             # Log the error if the sync process fails
             logger.exception(f"Error syncing with Bedrock for data source '{data_source_id}'")
             raise e
+
+    def get_ingestion_job(self, knowledge_base_id: str, data_source_id: str, ingestion_job_id: str) -> dict:
+        """
+        Retrieve the current state of an ingestion job.
+
+        Args:
+            knowledge_base_id (str): The ID of the knowledge base.
+            data_source_id (str): The ID of the data source being ingested.
+            ingestion_job_id (str): The ID of the ingestion job.
+
+        Returns:
+            dict: The `ingestionJob` details, including its `status` and `statistics`.
+        """
+        try:
+            client = self.get_bedrock_client()
+            response = client.get_ingestion_job(
+                knowledgeBaseId=knowledge_base_id,
+                dataSourceId=data_source_id,
+                ingestionJobId=ingestion_job_id
+            )
+            return response["ingestionJob"]
+
+        except Exception as e:
+            logger.exception(f"Error retrieving ingestion job '{ingestion_job_id}'")
+            raise e
@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from config.settings import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS
+
+# Set up logger to track cache activity
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query so that trivially different phrasings share a cache entry.
+
+    - Converts to lowercase.
+    - Collapses repeated whitespace.
+    - Removes trailing punctuation (e.g., "?" or ".").
+
+    Args:
+        query (str): The user query.
+
+    Returns:
+        str: The normalized query.
+    """
+    query = re.sub(r"\s+", " ", query.lower()).strip()
+    return query.rstrip("?!. ")
+
+class QueryCache:
+    """
+    A bounded, thread-safe answer cache keyed by normalized query and categories.
+
+    Entries expire after `ttl_seconds` and the least recently used entry is evicted
+    once `max_entries` is reached. Entries can be invalidated per category when new
+    documents for that category are uploaded or ingested.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached answers (0 disables the cache).
+            ttl_seconds (float): Time to live of each entry, in seconds.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, category: Union[str, List[str]] = None) -> Tuple[Tuple[str, ...], str]:
+        """
+        Builds the cache key for a query and category filter.
+
+        Args:
+            query (str): The user query.
+            category (str or list, optional): The category filter: one category, a list of categories, or None for all.
+
+        Returns:
+            tuple: The (sorted categories, normalized query) key; no categories means all of them.
+        """
+        categories = [category] if isinstance(category, str) else category or []
+        return (tuple(sorted(set(filter(None, categories)))), normalize_query(query))
+
+    def get(self, query: str, category: Union[str, List[str]] = None) -> Optional[Dict]:
+        """
+        Returns the cached result for a query and category filter, if present and not expired.
+
+        Args:
+            query (str): The user query.
+            category (str or list, optional): The category filter.
+
+        Returns:
+            dict or None: The cached result, or None on a miss.
+        """
+        if self.max_entries <= 0:
+            return None
+
+        key = self.make_key(query, category)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, query: str, category: Union[str, List[str]], value: Dict) -> None:
+        """
+        Stores a result, evicting the least recently used entries if the cache is full.
+
+        Args:
+            query (str): The user query.
+            category (str or list): The category filter.
+            value (dict): The result to cache.
+        """
+        if self.max_entries <= 0:
+            return
+
+        key = self.make_key(query, category)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_category(self, category: str = None) -> int:
+        """
+        Removes every entry whose category filter includes a category. Entries cached
+        without a category filter span all categories, so they are always removed too.
+
+        Args:
+            category (str, optional): The category to invalidate. If None, the whole cache is cleared.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            if category is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if not key[0] or category in key[0]]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+        logger.info(f"Query cache invalidated for category '{category}': {len(keys)} entries removed")
+        return len(keys)
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict:
+        """
+        Returns the cache counters, used to size the cache.
+
+        Returns:
+            dict: Size, capacity, TTL, hits, misses, hit ratio, evictions and invalidations.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+# Shared answer cache for the chat pipeline
+query_cache = QueryCache()
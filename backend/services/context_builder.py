@@ -0,0 +1,86 @@
+import logging
+import math
+import re
+from typing import Dict, List, Set
+from config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_OVERLAP_THRESHOLD
+
+# Set up logger to track context assembly
+logger = logging.getLogger(__name__)
+
+# Rough number of characters per token for English text
+CHARS_PER_TOKEN = 4
+# Number of words per shingle used to detect overlapping chunks
+SHINGLE_SIZE = 5
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text (about 4 characters per token).
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _shingles(text: str) -> Set[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def _overlaps(shingles: Set[str], other: Set[str], threshold: float) -> bool:
+    # Overlap coefficient: share of the smaller chunk that also appears in the other one
+    smaller = min(len(shingles), len(other))
+    return smaller > 0 and len(shingles & other) / smaller >= threshold
+
+def build_context(
+    results: List[Dict],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    overlap_threshold: float = CONTEXT_OVERLAP_THRESHOLD
+) -> Dict:
+    """
+    Builds the prompt context from retrieval results within a token budget.
+
+    Results are taken best score first. A chunk is skipped when it duplicates or
+    largely overlaps a chunk already kept from the same source URI, or when it
+    does not fit in the remaining budget (smaller chunks further down may still fit).
+
+    Args:
+        results (list): Retrieval results shaped like Knowledge Bases `retrievalResults`.
+        token_budget (int): Maximum number of estimated tokens in the context.
+        overlap_threshold (float): Overlap coefficient (0-1) above which two chunks of the same source are duplicates.
+
+    Returns:
+        dict: The context text, the kept results, and the kept/dropped token and chunk counts.
+    """
+    kept = []
+    kept_shingles = {}
+    stats = {"tokens_kept": 0, "tokens_dropped": 0, "chunks_kept": 0, "chunks_dropped": 0, "duplicates": 0}
+
+    for result in sorted(results, key=lambda r: r.get("score", 0), reverse=True):
+        text = result["content"]["text"].strip()
+        source = result.get("metadata", {}).get("x-amz-bedrock-kb-source-uri", "")
+        tokens = estimate_tokens(text)
+        shingles = _shingles(text)
+
+        if not text or any(_overlaps(shingles, other, overlap_threshold) for other in kept_shingles.get(source, [])):
+            stats["duplicates"] += 1
+        elif stats["tokens_kept"] + tokens <= token_budget:
+            kept.append(result)
+            kept_shingles.setdefault(source, []).append(shingles)
+            stats["tokens_kept"] += tokens
+            stats["chunks_kept"] += 1
+            continue
+
+        stats["tokens_dropped"] += tokens
+        stats["chunks_dropped"] += 1
+
+    logger.info(
+        f"Context built: {stats['chunks_kept']} chunks / {stats['tokens_kept']} tokens kept, "
+        f"{stats['chunks_dropped']} chunks / {stats['tokens_dropped']} tokens dropped "
+        f"({stats['duplicates']} duplicates)"
+    )
+    context = "\n\n".join(result["content"]["text"].strip() for result in kept)
+    return {"context": context, "results": kept, **stats}
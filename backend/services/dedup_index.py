@@ -0,0 +1,90 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from config.settings import DEDUP_INDEX_PATH
+
+# Set up logger to track de-duplication activity
+logger = logging.getLogger(__name__)
+
+class ContentHashIndex:
+    """
+    A persistent SHA-256 → S3 object index, stored in a small SQLite file.
+
+    It lets uploads of byte-identical documents be recognized, whatever their file
+    name, and answered with the already stored object instead of a new copy.
+    """
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH):
+        """
+        Opens (and creates if needed) the index.
+
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    sha256 TEXT PRIMARY KEY,
+                    s3_key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    category TEXT,
+                    uploaded_at TEXT NOT NULL
+                )
+                """
+            )
+        logger.info(f"Content hash index opened at '{path}'")
+
+    def get(self, sha256: str) -> Optional[Dict]:
+        """
+        Looks up a document by content hash.
+
+        Args:
+            sha256 (str): The hex SHA-256 of the document content.
+
+        Returns:
+            dict or None: The stored `s3_key`, `url`, `filename` and `category`, or None if unknown.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT s3_key, url, filename, category FROM content_hashes WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"s3_key": row[0], "url": row[1], "filename": row[2], "category": row[3]}
+
+    def add(self, sha256: str, result: Dict, category: str = None) -> None:
+        """
+        Records an uploaded document. The first upload of a given content wins, and the
+        entry of any other content previously stored under the same S3 key is evicted,
+        since the upload overwrote it.
+
+        Args:
+            sha256 (str): The hex SHA-256 of the document content.
+            result (dict): The upload result with `s3_key`, `url` and `filename`.
+            category (str, optional): The category the document was uploaded under.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM content_hashes WHERE s3_key = ? AND sha256 != ?", (result["s3_key"], sha256)
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO content_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, result["s3_key"], result["url"], result["filename"], category, datetime.utcnow().isoformat())
+            )
+
+    def remove(self, sha256: str) -> None:
+        """
+        Forgets a document, e.g. once its S3 object was overwritten or deleted.
+
+        Args:
+            sha256 (str): The hex SHA-256 of the document content.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM content_hashes WHERE sha256 = ?", (sha256,))
@@ -0,0 +1,176 @@
+import io
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Vocabulary used to make up chunk text, so fake chunks do not look like duplicates of each other
+FAKE_WORDS = (
+    "python", "java", "aws", "kubernetes", "security", "engineer", "senior", "lead", "project",
+    "cloud", "data", "pipeline", "team", "design", "architecture", "machine", "learning", "react",
+    "backend", "frontend", "devops", "terraform", "docker", "sql", "analytics", "mentoring",
+    "university", "degree", "certified", "network", "incident", "response", "compliance", "agile"
+)
+
+class FakeBedrockAgentClient:
+    """
+    An offline stand-in for the boto3 `bedrock-agent` client, covering the ingestion job calls.
+
+    Jobs go from STARTING to IN_PROGRESS to COMPLETE over `job_duration` seconds. Like the
+    real service, starting a job while another one is running on the same data source
+    raises an error, which makes duplicate ingestion jobs easy to spot.
+    """
+
+    def __init__(self, job_duration: float = 1.0, fail_jobs: bool = False):
+        """
+        Args:
+            job_duration (float): Seconds an ingestion job takes to complete.
+            fail_jobs (bool): If True, jobs end in the FAILED status instead of COMPLETE.
+        """
+        self.job_duration = job_duration
+        self.fail_jobs = fail_jobs
+        self.jobs = {}
+        self.started_jobs = []
+        self._lock = threading.Lock()
+
+    def _job_view(self, job: dict) -> dict:
+        elapsed = time.monotonic() - job["started"]
+        if elapsed < self.job_duration / 4:
+            status = "STARTING"
+        elif elapsed < self.job_duration:
+            status = "IN_PROGRESS"
+        else:
+            status = "FAILED" if self.fail_jobs else "COMPLETE"
+        return {
+            "knowledgeBaseId": job["knowledgeBaseId"],
+            "dataSourceId": job["dataSourceId"],
+            "ingestionJobId": job["ingestionJobId"],
+            "status": status,
+            "startedAt": job["startedAt"],
+            "updatedAt": datetime.now(timezone.utc),
+            "statistics": {"numberOfDocumentsScanned": 0}
+        }
+
+    def start_ingestion_job(self, knowledgeBaseId: str, dataSourceId: str, **kwargs) -> dict:
+        with self._lock:
+            for job in self.jobs.values():
+                if job["dataSourceId"] == dataSourceId and self._job_view(job)["status"] in ("STARTING", "IN_PROGRESS"):
+                    raise RuntimeError(f"An ingestion job is already running on data source '{dataSourceId}'")
+
+            job = {
+                "knowledgeBaseId": knowledgeBaseId,
+                "dataSourceId": dataSourceId,
+                "ingestionJobId": uuid.uuid4().hex[:10].upper(),
+                "started": time.monotonic(),
+                "startedAt": datetime.now(timezone.utc)
+            }
+            self.jobs[job["ingestionJobId"]] = job
+            self.started_jobs.append(job["ingestionJobId"])
+            return {"ingestionJob": self._job_view(job)}
+
+    def get_ingestion_job(self, knowledgeBaseId: str, dataSourceId: str, ingestionJobId: str) -> dict:
+        with self._lock:
+            return {"ingestionJob": self._job_view(self.jobs[ingestionJobId])}
+
+class FakeBedrockRuntimeClient:
+    """
+    An offline stand-in for the boto3 `bedrock-runtime` client, covering `invoke_model`
+    and `invoke_model_with_response_stream` with Nova-shaped payloads.
+
+    Calls block for `latency` seconds before the first token, then `token_latency`
+    seconds per streamed token, so the client behaves like a slow remote model.
+    """
+
+    def __init__(self, latency: float = 0.5, answer_tokens: int = 200, token_latency: float = 0.0):
+        """
+        Args:
+            latency (float): Seconds before the response (or the first streamed token) is returned.
+            answer_tokens (int): Number of words in each answer.
+            token_latency (float): Seconds between two streamed tokens.
+        """
+        self.latency = latency
+        self.answer_tokens = answer_tokens
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def _answer_tokens(self):
+        rng = random.Random(self.calls)
+        return [f"{rng.choice(FAKE_WORDS)} " for _ in range(self.answer_tokens)]
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        payload = {"output": {"message": {"role": "assistant", "content": [{"text": "".join(self._answer_tokens())}]}}}
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8")), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> dict:
+        self.calls += 1
+        tokens = self._answer_tokens()
+
+        def events():
+            time.sleep(self.latency)
+            for token in tokens:
+                if self.token_latency:
+                    time.sleep(self.token_latency)
+                chunk = {"contentBlockDelta": {"delta": {"text": token}, "contentBlockIndex": 0}}
+                yield {"chunk": {"bytes": json.dumps(chunk).encode("utf-8")}}
+
+        return {"body": events(), "contentType": "application/json"}
+
+class FakeBedrockAgentRuntimeClient:
+    """
+    An offline stand-in for the boto3 `bedrock-agent-runtime` client, covering `retrieve`.
+
+    Every call blocks for `latency` seconds and returns `results` chunks (or the requested
+    `numberOfResults`) of about `chunk_size` characters, each from a different `s3://`
+    source in `bucket`, shaped like Knowledge Bases `retrievalResults`.
+    """
+
+    def __init__(self, latency: float = 0.1, results: int = 5, chunk_size: int = 1000,
+                 bucket: str = "fake-bucket", prefix: str = "uploads/dev/", documents: int = 100):
+        """
+        Args:
+            latency (float): Seconds each retrieval takes.
+            results (int): Number of chunks returned per retrieval.
+            chunk_size (int): Approximate number of characters per chunk.
+            bucket (str): Bucket of the source URIs.
+            prefix (str): Key prefix of the source URIs.
+            documents (int): Number of distinct source documents to draw from.
+        """
+        self.latency = latency
+        self.results = results
+        self.chunk_size = chunk_size
+        self.bucket = bucket
+        self.prefix = prefix
+        self.documents = documents
+        self.calls = 0
+
+    def retrieve(self, knowledgeBaseId: str, retrievalQuery: dict, retrievalConfiguration: dict = None, **kwargs) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+
+        query = retrievalQuery.get("text", "")
+        category = (
+            (retrievalConfiguration or {}).get("vectorSearchConfiguration", {})
+            .get("filter", {}).get("equals", {}).get("value", "Uncategorized")
+        )
+        count = (retrievalConfiguration or {}).get("vectorSearchConfiguration", {}).get("numberOfResults", self.results)
+        rng = random.Random(f"{query}:{category}:{self.calls}")
+        results = []
+        for rank, document in enumerate(rng.sample(range(self.documents), min(count, self.documents))):
+            words = []
+            while sum(len(word) + 1 for word in words) < self.chunk_size:
+                words.append(rng.choice(FAKE_WORDS))
+            results.append({
+                "content": {"text": " ".join(words)},
+                "location": {"type": "S3", "s3Location": {"uri": f"s3://{self.bucket}/{self.prefix}cv_{document:04d}.pdf"}},
+                "metadata": {
+                    "x-amz-bedrock-kb-source-uri": f"s3://{self.bucket}/{self.prefix}cv_{document:04d}.pdf",
+                    "x-amz-bedrock-kb-document-page-number": 1.0,
+                    "category": category
+                },
+                "score": round(0.9 - rank * 0.05, 4)
+            })
+        return {"retrievalResults": results}
@@ -0,0 +1,275 @@
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Set
+from config.settings import FIELD_INDEX_PATH, RETRIEVER_BACKEND
+from services.vector_store import tokenize
+
+# Set up logger to track field index activity
+logger = logging.getLogger(__name__)
+
+# Section headings of the CV layout (see `render_cv_pdf` in generator_cvs_ia.py), in English and Spanish
+SECTION_TITLES = {
+    "PROFESSIONAL SUMMARY": "summary", "RESUMEN PROFESIONAL": "summary",
+    "WORK EXPERIENCE": "experience", "EXPERIENCIA LABORAL": "experience",
+    "EDUCATION": "education", "EDUCACIÓN": "education",
+    "SKILLS": "skills", "HABILIDADES": "skills",
+    "LANGUAGES": "languages", "IDIOMAS": "languages",
+    "CERTIFICATIONS": "certifications", "CERTIFICACIONES": "certifications"
+}
+# Fields with an inverted index
+INDEXED_FIELDS = ("skills", "certifications", "languages", "positions", "education")
+# Language levels that count as fluent
+FLUENT_LEVELS = {"native", "fluent", "bilingual", "proficient", "advanced", "c1", "c2",
+                 "nativo", "nativa", "fluido", "fluida", "bilingüe", "avanzado", "avanzada"}
+# Words meaning "until now" in the end date of a job
+PRESENT_WORDS = {"present", "current", "now", "actual", "actualidad", "presente"}
+
+# List separators: "•" (rendered as "\x7f" by some PDF text extractors)
+_BULLETS = re.compile(r"[•\x7f]")
+_DATE_RANGE = re.compile(r"^(.*\d.*?)\s+-\s+(.+)$")
+_YEAR = re.compile(r"\b(19|20)\d{2}\b")
+_ACRONYM = re.compile(r"\(([^)]+)\)")
+
+def normalize_term(value: str) -> str:
+    """
+    Normalizes a field value or query phrase for lookups (lowercase word tokens).
+
+    Args:
+        value (str): The value to normalize.
+
+    Returns:
+        str: The normalized term, e.g. "aws certified security specialty".
+    """
+    return " ".join(tokenize(value))
+
+def is_fluent(level: str) -> bool:
+    """
+    Tells whether a language level (e.g., "Fluent (C1)" or "Nativo") is fluent or better.
+
+    Args:
+        level (str): The language level.
+
+    Returns:
+        bool: True for fluent, native, C1 and C2 levels.
+    """
+    return any(word in FLUENT_LEVELS for word in re.findall(r"\w+", level.lower()))
+
+def _year(text: str, current_year: int) -> int:
+    match = _YEAR.search(text)
+    if match:
+        return int(match.group(0))
+    if any(word in PRESENT_WORDS for word in re.findall(r"\w+", text.lower())):
+        return current_year
+    return None
+
+def _split_list(lines: List[str]) -> List[str]:
+    # Wrapped lines are joined first, so items spanning two lines stay whole
+    return [item.strip() for item in _BULLETS.split(" ".join(lines)) if item.strip()]
+
+def parse_cv_fields(text: str) -> Dict:
+    """
+    Extracts the structured fields of a CV from its text, using the section headings
+    of the CV layout.
+
+    Args:
+        text (str): The full text of the CV.
+
+    Returns:
+        dict: `name`, `skills`, `certifications`, `languages` ({language: level}),
+            `positions`, `education` and `years_experience` (None if no dates were found).
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    sections = {}
+    current = None
+    for line in lines:
+        if line in SECTION_TITLES:
+            current = SECTION_TITLES[line]
+            sections.setdefault(current, [])
+        elif current:
+            sections[current].append(line)
+
+    languages = {}
+    for entry in " ".join(sections.get("languages", [])).split("|"):
+        language, _, level = entry.partition(":")
+        if language.strip():
+            languages[language.strip()] = level.strip()
+
+    # Job titles are the "Position | Company" lines followed by a "start - end" line
+    experience = sections.get("experience", [])
+    current_year = datetime.date.today().year
+    positions, years = [], []
+    for line, next_line in zip(experience, experience[1:]):
+        dates = _DATE_RANGE.match(next_line)
+        if "|" in line and dates:
+            positions.append(line.split("|")[0].strip())
+            start, end = _year(dates.group(1), current_year), _year(dates.group(2), current_year)
+            if start and end:
+                years.append((start, end))
+
+    # Degrees are the "Degree | Specialty" lines followed by a "University | Year" line
+    education_lines = sections.get("education", [])
+    education = [
+        line.split("|")[0].strip()
+        for line, next_line in zip(education_lines, education_lines[1:])
+        if _YEAR.search(next_line.split("|")[-1])
+    ]
+
+    return {
+        "name": lines[0] if lines else "",
+        "skills": _split_list(sections.get("skills", [])),
+        "certifications": _split_list(sections.get("certifications", [])),
+        "languages": languages,
+        "positions": positions,
+        "education": education,
+        "years_experience": max(end for _, end in years) - min(start for start, _ in years) if years else None
+    }
+
+def _terms(value: str) -> Set[str]:
+    # A value is found by its full name and by the acronym in parentheses, e.g. "... Professional (CISSP)"
+    terms = {normalize_term(value)}
+    terms.update(normalize_term(acronym) for acronym in _ACRONYM.findall(value))
+    terms.add(normalize_term(_ACRONYM.sub("", value)))
+    return {term for term in terms if term}
+
+class FieldIndex:
+    """
+    In-memory index of the structured fields of the CVs, for exact-match, filter and count questions.
+
+    Every document is a row of a column store (`sources`, `names`, `categories`,
+    `years_experience`, `languages`). Each field of `INDEXED_FIELDS` and the category
+    have an inverted index from normalized term to the set of matching rows, so a
+    question is answered with a few set intersections.
+    """
+
+    def __init__(self, documents: Iterable[Dict] = ()):
+        """
+        Initializes the index.
+
+        Args:
+            documents (iterable): Document records, as written by `write_field_index`.
+        """
+        self.sources = []
+        self.names = []
+        self.categories = []
+        self.years_experience = []
+        self.languages = []
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        self.category_postings = {}
+        self.labels = {}
+        for document in documents:
+            self.add(document)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, document: Dict) -> None:
+        """
+        Adds a document record (`source`, `category` and the fields of `parse_cv_fields`).
+
+        Args:
+            document (dict): The document record.
+        """
+        row = len(self.sources)
+        category = document.get("category") or "Uncategorized"
+        self.sources.append(document["source"])
+        self.names.append(document.get("name", ""))
+        self.categories.append(category)
+        self.years_experience.append(document.get("years_experience"))
+        self.languages.append(document.get("languages", {}))
+        self.category_postings.setdefault(normalize_term(category), set()).add(row)
+
+        for field in INDEXED_FIELDS:
+            for value in document.get(field, []):
+                for term in _terms(value):
+                    self.postings[field].setdefault(term, set()).add(row)
+                    # Keep the first spelling of a term to show in answers
+                    self.labels.setdefault((field, term), value)
+
+    def lookup(self, field: str, term: str) -> Set[int]:
+        """
+        Returns the rows whose field holds a normalized term.
+
+        Args:
+            field (str): One of `INDEXED_FIELDS`, or "category".
+            term (str): The normalized term (see `normalize_term`).
+
+        Returns:
+            set: The matching rows.
+        """
+        if field == "category":
+            return self.category_postings.get(term, set())
+        return self.postings[field].get(term, set())
+
+    def label(self, field: str, term: str) -> str:
+        """Returns how a normalized term is written in the CVs (the category name for "category")."""
+        if field == "category":
+            row = next(iter(self.category_postings.get(term, ())), None)
+            return self.categories[row] if row is not None else term
+        return self.labels.get((field, term), term)
+
+def iter_field_records(path: str) -> Iterable[Dict]:
+    """
+    Reads document records from a JSONL field index file. A later record of the same
+    source replaces the earlier one.
+
+    Args:
+        path (str): Path to the field index file.
+
+    Returns:
+        iterable: The latest record of each source.
+    """
+    records = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                records[record["source"]] = record
+    return records.values()
+
+def write_field_index(records: Iterable[Dict], path: str = FIELD_INDEX_PATH) -> int:
+    """
+    Writes document records to a JSONL field index file.
+
+    Args:
+        records (iterable): Document records with `source`, `category` and the fields of `parse_cv_fields`.
+        path (str): Path of the field index file.
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    logger.info(f"Field index written to '{path}': {count} documents")
+    return count
+
+_field_index = None
+_field_index_lock = threading.Lock()
+
+def get_field_index() -> FieldIndex:
+    """
+    Returns the shared field index, loading it from `FIELD_INDEX_PATH` on first use.
+
+    Returns:
+        FieldIndex: The shared index, or None if there is no field index file.
+    """
+    global _field_index
+    if _field_index is None:
+        with _field_index_lock:
+            if _field_index is None:
+                if not FIELD_INDEX_PATH or not os.path.exists(FIELD_INDEX_PATH):
+                    return None
+                _field_index = FieldIndex(iter_field_records(FIELD_INDEX_PATH))
+                logger.info(f"Field index loaded from '{FIELD_INDEX_PATH}': {len(_field_index)} documents")
+                if RETRIEVER_BACKEND != "local" and not all(source.startswith("s3://") for source in _field_index.sources):
+                    logger.warning(
+                        f"Field index '{FIELD_INDEX_PATH}' holds local paths but RETRIEVER_BACKEND is "
+                        f"'{RETRIEVER_BACKEND}': routed answers cite files the knowledge base does not return"
+                    )
+    return _field_index
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List
+from config.settings import (
+    KNOWLEDGE_BASE_ID,
+    KNOWLEDGE_BASE_DATA_SOURCE_ID,
+    INGESTION_DEBOUNCE_SECONDS,
+    INGESTION_MAX_DELAY_SECONDS,
+    INGESTION_POLL_SECONDS
+)
+from services.bedrock_service import BedrockService
+from services.cache_service import query_cache
+
+# Set up logger to track ingestion scheduling
+logger = logging.getLogger(__name__)
+
+# Ingestion job statuses that mean the job is still running
+RUNNING_STATUSES = ("STARTING", "IN_PROGRESS", "STOPPING")
+
+class IngestionScheduler:
+    """
+    Coalesces uploads into as few knowledge base ingestion jobs as possible.
+
+    Uploads mark a data source dirty. Once no new upload has arrived for
+    `debounce_seconds` (or `max_delay_seconds` after the first one, so a steady
+    stream of uploads cannot postpone ingestion forever), a single ingestion job
+    is started. At most one job runs per data source; uploads that arrive while a
+    job is running are gathered into one follow-up job once it finishes.
+    """
+
+    def __init__(
+        self,
+        bedrock_service: BedrockService = None,
+        knowledge_base_id: str = KNOWLEDGE_BASE_ID,
+        debounce_seconds: float = INGESTION_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = INGESTION_MAX_DELAY_SECONDS,
+        poll_seconds: float = INGESTION_POLL_SECONDS
+    ):
+        """
+        Initializes the scheduler.
+
+        Args:
+            bedrock_service (BedrockService, optional): The service used to start and poll jobs.
+                Created on first use if not provided.
+            knowledge_base_id (str): The ID of the knowledge base.
+            debounce_seconds (float): Quiet period after the last upload before a job starts.
+            max_delay_seconds (float): Maximum wait after the first pending upload before a job starts.
+            poll_seconds (float): Interval between two job status checks.
+        """
+        self._bedrock_service = bedrock_service
+        self.knowledge_base_id = knowledge_base_id
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_seconds = poll_seconds
+        self._states = {}
+
+    @property
+    def bedrock_service(self) -> BedrockService:
+        if self._bedrock_service is None:
+            self._bedrock_service = BedrockService()
+        return self._bedrock_service
+
+    def _state(self, data_source_id: str) -> Dict:
+        if data_source_id not in self._states:
+            self._states[data_source_id] = {
+                "state": "idle",
+                "dirty": False,
+                "first_marked": None,
+                "last_marked": None,
+                "pending_categories": set(),
+                "current_job": None,
+                "last_job": None,
+                "jobs_started": 0,
+                "last_error": None,
+                "task": None
+            }
+        return self._states[data_source_id]
+
+    def mark_dirty(self, categories: List[str] = None, data_source_id: str = KNOWLEDGE_BASE_DATA_SOURCE_ID) -> bool:
+        """
+        Records that new documents were uploaded and schedules an ingestion job for them.
+
+        Must be called from the event loop (e.g., from an endpoint).
+
+        Args:
+            categories (list, optional): The categories of the uploaded documents. Their cached
+                answers are invalidated once the ingestion job completes.
+            data_source_id (str): The ID of the knowledge base data source.
+
+        Returns:
+            bool: True if ingestion was scheduled, False if no data source is configured.
+        """
+        if not data_source_id:
+            logger.warning("No knowledge base data source configured; ingestion not scheduled")
+            return False
+
+        loop = asyncio.get_running_loop()
+        state = self._state(data_source_id)
+        state["dirty"] = True
+        state["last_marked"] = loop.time()
+        if state["first_marked"] is None:
+            state["first_marked"] = state["last_marked"]
+        state["pending_categories"].update(categories or [])
+
+        # A single worker per data source; a running worker picks up the new uploads itself
+        if state["task"] is None or state["task"].done():
+            state["task"] = asyncio.ensure_future(self._run(data_source_id))
+        return True
+
+    async def _run(self, data_source_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        state = self._state(data_source_id)
+
+        while state["dirty"]:
+            # Debounce: wait for a quiet period, bounded by the maximum delay
+            state["state"] = "debouncing"
+            while True:
+                now = loop.time()
+                deadline = min(
+                    state["last_marked"] + self.debounce_seconds,
+                    state["first_marked"] + self.max_delay_seconds
+                )
+                if now >= deadline:
+                    break
+                await asyncio.sleep(deadline - now)
+
+            categories = sorted(state["pending_categories"])
+            state["dirty"] = False
+            state["first_marked"] = None
+            state["pending_categories"] = set()
+
+            try:
+                await self._run_job(data_source_id, categories)
+            except Exception as e:
+                logger.exception(f"Ingestion job for data source '{data_source_id}' failed")
+                state["last_error"] = str(e)
+                # A job whose status could no longer be polled is not running as far as we know
+                if state["current_job"] is not None:
+                    state["last_job"], state["current_job"] = {**state["current_job"], "error": str(e)}, None
+                # Keep the categories pending so the next upload retries them
+                state["pending_categories"].update(categories)
+
+        state["state"] = "idle"
+
+    async def _run_job(self, data_source_id: str, categories: List[str]) -> None:
+        state = self._state(data_source_id)
+        state["state"] = "running"
+
+        response = await asyncio.to_thread(
+            self.bedrock_service.sync_with_bedrock, self.knowledge_base_id, data_source_id
+        )
+        job = response["ingestionJob"]
+        state["jobs_started"] += 1
+        state["current_job"] = {
+            "ingestion_job_id": job["ingestionJobId"],
+            "status": job.get("status", "STARTING"),
+            "categories": categories,
+            "started_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat(),
+            "statistics": job.get("statistics", {})
+        }
+        logger.info(f"Ingestion job {job['ingestionJobId']} started for data source '{data_source_id}' - Categories: {categories}")
+
+        # Poll until the job finishes
+        while state["current_job"]["status"] in RUNNING_STATUSES:
+            await asyncio.sleep(self.poll_seconds)
+            job = await asyncio.to_thread(
+                self.bedrock_service.get_ingestion_job,
+                self.knowledge_base_id,
+                data_source_id,
+                state["current_job"]["ingestion_job_id"]
+            )
+            state["current_job"]["status"] = job["status"]
+            state["current_job"]["updated_at"] = datetime.utcnow().isoformat()
+            state["current_job"]["statistics"] = job.get("statistics", {})
+
+        logger.info(f"Ingestion job {state['current_job']['ingestion_job_id']} finished: {state['current_job']['status']}")
+        state["last_job"], state["current_job"] = state["current_job"], None
+
+        # Answers cached while the job was running may predate the new documents
+        for category in categories or [None]:
+            query_cache.invalidate_category(category)
+
+    def status(self) -> Dict:
+        """
+        Returns the scheduling state and job history of every known data source.
+
+        Returns:
+            dict: The status of each data source, keyed by data source ID.
+        """
+        return {
+            data_source_id: {
+                "state": state["state"],
+                "dirty": state["dirty"],
+                "pending_categories": sorted(state["pending_categories"]),
+                "current_job": state["current_job"],
+                "last_job": state["last_job"],
+                "jobs_started": state["jobs_started"],
+                "last_error": state["last_error"]
+            }
+            for data_source_id, state in self._states.items()
+        }
+
+# Shared scheduler for the upload endpoints
+ingestion_scheduler = IngestionScheduler()
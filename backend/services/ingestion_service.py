@@ -0,0 +1,282 @@
+import argparse
+import json
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Tuple
+from PyPDF2 import PdfReader
+from config.settings import CHUNK_SIZE, CHUNK_OVERLAP, INGESTION_WORKERS
+from services.field_index import parse_cv_fields, write_field_index
+
+try:
+    import docx
+except ImportError:  # python-docx is only needed for .docx files
+    docx = None
+
+# Set up logger to track ingestion activity
+logger = logging.getLogger(__name__)
+
+# File types with a local text extractor (.doc needs the managed KB ingestion)
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+def extract_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Extracts the text of a document page by page.
+
+    - PDF: one item per page.
+    - TXT: one item per form-feed separated page (usually a single page).
+    - DOCX: a single page, since Word documents carry no page layout.
+
+    Args:
+        path (str): Path to the document.
+
+    Yields:
+        tuple: The 1-based page number and the page text.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".pdf":
+        reader = PdfReader(path)
+        for page_number, page in enumerate(reader.pages, 1):
+            yield page_number, page.extract_text() or ""
+    elif extension == ".txt":
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            for page_number, page in enumerate(file.read().split("\f"), 1):
+                yield page_number, page
+    elif extension == ".docx":
+        if docx is None:
+            raise RuntimeError("python-docx is required to extract text from .docx files")
+        document = docx.Document(path)
+        yield 1, "\n".join(paragraph.text for paragraph in document.paragraphs)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Splits a text into overlapping chunks of about `chunk_size` characters.
+
+    Chunk boundaries are moved back to the nearest whitespace when possible,
+    so words are not cut in half.
+
+    Args:
+        text (str): The text to split.
+        chunk_size (int): Maximum number of characters per chunk.
+        overlap (int): Number of characters shared by consecutive chunks.
+
+    Returns:
+        list: The chunks, in order.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("Chunk overlap must be smaller than the chunk size")
+
+    text = re.sub(r"[ \t]+", " ", text).strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Break on whitespace in the second half of the window
+            split = text.rfind(" ", start + chunk_size // 2, end)
+            if split != -1:
+                end = split
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # Start the next chunk on a word boundary inside the overlap window
+        next_start = end - overlap
+        space = text.find(" ", next_start, end)
+        if overlap and space != -1:
+            next_start = space + 1
+        start = max(next_start, start + 1)
+    return chunks
+
+def read_sidecar_category(path: str) -> str:
+    """
+    Reads the category from a `<file>.metadata.json` sidecar, as written by `S3Service.upload_file`.
+
+    Args:
+        path (str): Path to the document.
+
+    Returns:
+        str: The category, or None if there is no sidecar.
+    """
+    sidecar_path = f"{path}.metadata.json"
+    if not os.path.exists(sidecar_path):
+        return None
+    with open(sidecar_path, "r", encoding="utf-8") as file:
+        return json.load(file).get("metadataAttributes", {}).get("category")
+
+def process_file(path: str, category: str = None, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[Dict]:
+    """
+    Extracts and chunks one document. Chunks never span pages, so each keeps its page number.
+
+    Args:
+        path (str): Path to the document.
+        category (str, optional): Category used when the document has no metadata sidecar.
+        chunk_size (int): Maximum number of characters per chunk.
+        overlap (int): Number of characters shared by consecutive chunks.
+
+    Returns:
+        list: Chunk records with `source`, `page`, `category`, `chunk_index` and `text`.
+    """
+    return chunk_pages(path, extract_pages(path), category, chunk_size, overlap)
+
+def chunk_pages(
+    path: str,
+    pages: Iterable[Tuple[int, str]],
+    category: str = None,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP
+) -> List[Dict]:
+    """
+    Chunks the already extracted pages of a document (see `process_file`).
+
+    Args:
+        path (str): Path to the document.
+        pages (iterable): The page numbers and texts, as yielded by `extract_pages`.
+        category (str, optional): Category used when the document has no metadata sidecar.
+        chunk_size (int): Maximum number of characters per chunk.
+        overlap (int): Number of characters shared by consecutive chunks.
+
+    Returns:
+        list: Chunk records with `source`, `page`, `category`, `chunk_index` and `text`.
+    """
+    category = read_sidecar_category(path) or category or "Uncategorized"
+    records = []
+    for page_number, page_text in pages:
+        for chunk in chunk_text(page_text, chunk_size, overlap):
+            records.append({
+                "source": path,
+                "page": page_number,
+                "category": category,
+                "chunk_index": len(records),
+                "text": chunk
+            })
+    return records
+
+def _process_file_safe(path: str, category: str, chunk_size: int, overlap: int, parse_fields: bool = False) -> Tuple[str, List[Dict], Dict, str]:
+    # Runs in a worker process; errors are returned so one bad file does not stop the run
+    try:
+        pages = list(extract_pages(path))
+        records = chunk_pages(path, pages, category, chunk_size, overlap)
+        fields = None
+        if parse_fields:
+            fields = {
+                "source": path,
+                "category": read_sidecar_category(path) or category or "Uncategorized",
+                **parse_cv_fields("\n".join(text for _, text in pages))
+            }
+        return path, records, fields, None
+    except Exception as e:
+        return path, [], None, str(e)
+
+def iter_documents(input_dir: str) -> Iterator[str]:
+    """
+    Walks a folder and yields every document with a supported extension.
+
+    Args:
+        input_dir (str): The folder to walk.
+
+    Yields:
+        str: The path of the next document.
+    """
+    for root, _, files in os.walk(input_dir):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(root, name)
+
+def run_ingestion(
+    input_dir: str,
+    output_path: str,
+    category: str = None,
+    workers: int = INGESTION_WORKERS,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    field_index_path: str = None
+) -> Dict:
+    """
+    Extracts and chunks every document in a folder across a process pool and writes the chunks as JSONL.
+
+    With `field_index_path`, the structured fields of every CV (skills, certifications,
+    languages...) are parsed from the same extracted text and written as a field index.
+
+    At most `2 * workers` documents are in flight at a time and chunks are written as soon
+    as a document is done, so memory stays bounded however many documents the folder holds.
+
+    Args:
+        input_dir (str): The folder with the documents (e.g., `generated_cvs/`).
+        output_path (str): Path of the JSONL chunk file to write.
+        category (str, optional): Category used for documents without a metadata sidecar.
+        workers (int): Number of worker processes (0 uses every core).
+        chunk_size (int): Maximum number of characters per chunk.
+        overlap (int): Number of characters shared by consecutive chunks.
+        field_index_path (str, optional): Path of the JSONL field index to write.
+
+    Returns:
+        dict: The number of processed documents, written chunks and failed documents.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {"documents": 0, "chunks": 0, "failed": []}
+    field_records = []
+    logger.info(f"Ingesting '{input_dir}' into '{output_path}' with {workers} workers")
+
+    with open(output_path, "w", encoding="utf-8") as output, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                path, records, fields, error = future.result()
+                if error:
+                    logger.warning(f"Could not ingest '{path}': {error}")
+                    stats["failed"].append(path)
+                    continue
+                for record in records:
+                    output.write(json.dumps(record) + "\n")
+                if fields is not None:
+                    field_records.append(fields)
+                stats["documents"] += 1
+                stats["chunks"] += len(records)
+
+        for path in iter_documents(input_dir):
+            pending.add(executor.submit(_process_file_safe, path, category, chunk_size, overlap, field_index_path is not None))
+            if len(pending) >= 2 * workers:
+                drain(FIRST_COMPLETED)
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    if field_index_path:
+        write_field_index(field_records, field_index_path)
+
+    logger.info(
+        f"Ingestion finished: {stats['documents']} documents, {stats['chunks']} chunks, "
+        f"{len(stats['failed'])} failed"
+    )
+    return stats
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Extract and chunk CVs into a JSONL chunk file.")
+    parser.add_argument("input_dir", help="Folder with the documents, e.g. generated_cvs/")
+    parser.add_argument("--output", default="chunks.jsonl", help="Path of the JSONL chunk file")
+    parser.add_argument("--category", default=None, help="Category for documents without a metadata sidecar")
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS, help="Worker processes (0 = all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--field-index", metavar="PATH", default=None,
+                        help="Also write the structured field index (skills, certifications, languages...) to this file")
+    parser.add_argument("--build-index", metavar="INDEX_DIR", default=None,
+                        help="Also build a local vector index from the chunks in this folder")
+    args = parser.parse_args()
+
+    run_ingestion(args.input_dir, args.output, args.category, args.workers, args.chunk_size, args.chunk_overlap,
+                  args.field_index)
+
+    if args.build_index:
+        from services.vector_store import build_local_index
+        build_local_index(args.output, args.build_index)
@@ -0,0 +1,173 @@
+import functools
+import inspect
+import time
+from functools import lru_cache
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from services.tracing_service import record_stage_timing
+
+# Latency buckets (seconds) covering in-memory stages up to slow model calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_LATENCY = Histogram(
+    "cv_assistant_stage_duration_seconds",
+    "Latency of each pipeline stage",
+    ["pipeline", "stage"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "cv_assistant_stage_errors_total",
+    "Errors raised by each pipeline stage",
+    ["pipeline", "stage"]
+)
+STAGE_IN_FLIGHT = Gauge(
+    "cv_assistant_stage_in_flight",
+    "Calls currently running in each pipeline stage",
+    ["pipeline", "stage"]
+)
+RETRIEVED_RESULTS = Histogram(
+    "cv_assistant_retrieved_results",
+    "Number of chunks returned by a retrieval",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+CONTEXT_CHUNKS = Histogram(
+    "cv_assistant_context_chunks",
+    "Number of retrieved chunks kept in the prompt context",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+PROMPT_CHARACTERS = Histogram(
+    "cv_assistant_prompt_characters",
+    "Size of the prompt sent to the model, in characters",
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+)
+PROMPT_TOKENS = Histogram(
+    "cv_assistant_prompt_tokens",
+    "Estimated size of the prompt sent to the model, in tokens",
+    buckets=(125, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+QUERY_ROUTES = Counter(
+    "cv_assistant_query_routes_total",
+    "Chat questions by route: answered from the field index or by retrieval and the model",
+    ["route"]
+)
+UPLOADS = Counter(
+    "cv_assistant_uploads_total",
+    "Uploaded documents by outcome",
+    ["outcome"]
+)
+
+@lru_cache(maxsize=None)
+def _stage_children(pipeline: str, stage: str):
+    # Resolve the labelled children once, so tracking a stage costs no label lookups
+    return (
+        STAGE_LATENCY.labels(pipeline, stage),
+        STAGE_ERRORS.labels(pipeline, stage),
+        STAGE_IN_FLIGHT.labels(pipeline, stage)
+    )
+
+class StageTimer:
+    """
+    Context manager that records the latency, errors and in-flight calls of a pipeline stage,
+    and adds the latency to the `Server-Timing` breakdown of the current request.
+
+    The metric children are resolved once per (pipeline, stage), so entering and leaving
+    a stage only costs a clock read, a histogram observation and two gauge updates.
+    """
+
+    __slots__ = ("_stage", "_latency", "_errors", "_in_flight", "_start")
+
+    def __init__(self, pipeline: str, stage: str):
+        """
+        Args:
+            pipeline (str): The pipeline the stage belongs to (e.g., "chat" or "upload").
+            stage (str): The stage name (e.g., "retrieve" or "generate").
+        """
+        self._stage = stage
+        self._latency, self._errors, self._in_flight = _stage_children(pipeline, stage)
+
+    def __enter__(self):
+        self._in_flight.inc()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._start
+        self._latency.observe(elapsed)
+        self._in_flight.dec()
+        record_stage_timing(self._stage, elapsed)
+        # GeneratorExit and cancellation (a client going away) are not stage errors
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self._errors.inc()
+        return False
+
+def track_stage(pipeline: str, stage: str) -> StageTimer:
+    """
+    Times a pipeline stage. Stages can be nested, and the timer works across `await`:
+
+        with track_stage("chat", "total"):
+            with track_stage("chat", "retrieve"):
+                ...
+
+    Args:
+        pipeline (str): The pipeline the stage belongs to (e.g., "chat" or "upload").
+        stage (str): The stage name (e.g., "retrieve" or "generate").
+
+    Returns:
+        StageTimer: The context manager timing the stage.
+    """
+    return StageTimer(pipeline, stage)
+
+def timed(pipeline: str, stage: str):
+    """
+    Decorator that times every call of a function, coroutine function or async generator
+    function as a pipeline stage (for an async generator, until it is exhausted or closed).
+
+    Args:
+        pipeline (str): The pipeline the stage belongs to.
+        stage (str): The stage name.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                try:
+                    with track_stage(pipeline, stage):
+                        async for item in generator:
+                            yield item
+                finally:
+                    await generator.aclose()
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with track_stage(pipeline, stage):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with track_stage(pipeline, stage):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_prompt(prompt: str, tokens: int) -> None:
+    """
+    Records the size of a prompt sent to the model.
+
+    Args:
+        prompt (str): The prompt text.
+        tokens (int): The estimated number of tokens of the prompt.
+    """
+    PROMPT_CHARACTERS.observe(len(prompt))
+    PROMPT_TOKENS.observe(tokens)
+
+def render_metrics() -> tuple:
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+        tuple: The payload (bytes) and its content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
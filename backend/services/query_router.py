@@ -0,0 +1,285 @@
+import logging
+import re
+from typing import Dict, List, Set, Tuple, Union
+from config.settings import QUERY_ROUTER_MAX_RESULTS
+from services.field_index import INDEXED_FIELDS, FieldIndex, get_field_index, is_fluent, normalize_term
+from services.vector_store import tokenize
+
+# Set up logger to track routing decisions
+logger = logging.getLogger(__name__)
+
+# Questions asking for a count, and questions asking for a list of candidates (English and Spanish)
+COUNT_INTENT = re.compile(r"^\W*(how many|count|number of|cu[aá]nt[oa]s)\b", re.IGNORECASE)
+LIST_INTENT = re.compile(
+    r"^\W*(which|who|whom|list|show|find|give me|what candidates|qui[eé]n(es)?|cu[aá]les|qu[eé] candidat[oa]s|lista)\b",
+    re.IGNORECASE
+)
+# Words asking for judgement or synthesis, which only the model can answer
+OPEN_ENDED = re.compile(
+    r"\b(best|better|most|least|why|compare|summar\w*|describe|explain|recommend\w*|suitab\w*|fit|strongest|"
+    r"weakest|rank\w*|should|mejor\w*|por qu[eé]|compar\w*|resum\w*|describ\w*|expli\w*|recomiend\w*)\b",
+    re.IGNORECASE
+)
+FLUENT_QUALIFIER = re.compile(r"\b(fluent\w*|native\w*|bilingual|fluid[oa]s?|fluidez|nativ[oa]s?|biling[uü]es?)\b", re.IGNORECASE)
+YEARS_FILTER = re.compile(r"(more than|over|at least|m[aá]s de|al menos)?\s*(\d+)\s*(\+)?\s*(years?|a[nñ]os)\b", re.IGNORECASE)
+OR_QUERY = re.compile(r"\b(or|o)\b", re.IGNORECASE)
+
+# Longest field value looked up in a question, in words
+MAX_TERM_WORDS = 8
+# Words never taken as a field value on their own
+STOPWORDS = {"a", "an", "the", "and", "or", "of", "in", "on", "with", "who", "which", "has", "have", "do", "does",
+             "is", "are", "any", "all", "candidate", "candidates", "de", "la", "el", "los", "las", "y", "o", "con", "en"}
+# Words a field question is phrased with, which map to no field value but need no retrieval either
+QUESTION_WORDS = {
+    "how", "many", "count", "number", "list", "show", "find", "give", "me", "what", "whom", "whose", "that",
+    "there", "know", "knows", "speak", "speaks", "hold", "holds", "having", "had", "got", "worked", "work",
+    "works", "working", "as", "at", "least", "more", "than", "over", "plus", "year", "years", "experience",
+    "experienced", "skill", "skills", "skilled", "certification", "certifications", "certified", "certificate",
+    "certificates", "language", "languages", "degree", "degrees", "position", "positions", "role", "roles",
+    "fluent", "fluently", "native", "natively", "bilingual", "people", "profiles", "cv", "cvs", "resumes",
+    "both", "either", "also", "currently", "can", "be", "been", "were", "please", "them", "those", "these",
+    "among", "from", "same", "ones",
+    "cuántos", "cuántas", "cuáles", "quién", "quiénes", "qué", "candidatos", "candidatas", "saben", "sabe",
+    "hablan", "habla", "tienen", "tiene", "conocen", "conoce", "experiencia", "años", "más", "al", "menos",
+    "que", "lista", "ellos", "ellas", "estos", "estas", "esos", "esas", "entre", "fluido", "fluidos", "fluida", "fluidas", "fluidez", "nativo", "nativos", "nativa", "nativas"
+}
+# QUESTION_WORDS as the tokens they are split into (accented words split like the field values)
+QUESTION_TOKENS = set(tokenize(" ".join(QUESTION_WORDS)))
+FIELD_NAMES = {"skills": "skill", "certifications": "certification", "languages": "language",
+               "positions": "position", "education": "degree"}
+
+def _scan_terms(index: FieldIndex, tokens: List[str]) -> Tuple[List[Tuple[str, str]], List[str]]:
+    # Returns the (field, term) matches of the tokens, longest phrase first, and the tokens left unmatched
+    matches, unmatched = [], []
+    i = 0
+    while i < len(tokens):
+        for n in range(min(MAX_TERM_WORDS, len(tokens) - i), 0, -1):
+            phrase = " ".join(tokens[i:i + n])
+            if n == 1 and phrase in STOPWORDS:
+                continue
+            singular = phrase[:-1] if phrase.endswith("s") else phrase
+            found = [("category", term) for term in (phrase, singular) if index.lookup("category", term)][:1]
+            if not found:
+                found = [(field, phrase) for field in INDEXED_FIELDS if index.lookup(field, phrase)]
+            if found:
+                matches.extend(found)
+                i += n
+                break
+        else:
+            unmatched.append(tokens[i])
+            i += 1
+    return matches, unmatched
+
+def match_terms(index: FieldIndex, query: str) -> List[Tuple[str, str]]:
+    """
+    Finds the categories and field values of the index mentioned in a question.
+
+    The question is scanned left to right, trying the longest phrase first, so
+    "AWS Certified Security Specialty" is one certification rather than a skill "AWS".
+    Categories are matched first and also in plural ("Security Engineers").
+
+    Args:
+        index (FieldIndex): The field index.
+        query (str): The question.
+
+    Returns:
+        list: The `(field, term)` pairs found, in order; a term held by several fields appears once per field.
+    """
+    return _scan_terms(index, tokenize(query))[0]
+
+def _content_words(tokens: List[str]) -> List[str]:
+    # Drops the stopwords, question words and numbers (years filters) from unmatched tokens
+    return [token for token in tokens if token not in STOPWORDS and token not in QUESTION_TOKENS and not token.isdigit()]
+
+def _years_filter(query: str):
+    # Returns (minimum years, strict) from "more than 5 years", "5+ years", "at least 3 years"...
+    match = YEARS_FILTER.search(query)
+    if not match:
+        return None
+    qualifier = (match.group(1) or "").lower()
+    strict = qualifier in ("more than", "over") or qualifier.startswith("m")
+    return int(match.group(2)), strict
+
+def _fluent_in(index: FieldIndex, row: int, term: str) -> bool:
+    return any(normalize_term(language) == term and is_fluent(level) for language, level in index.languages[row].items())
+
+def route_query(query: str, category: Union[str, List[str]] = None, sources: List[str] = None) -> Dict:
+    """
+    Answers exact-match, filter and count questions about CV fields straight from the field index.
+
+    A question is answered here when it asks for a list ("which Security Engineers hold CISSP?")
+    or a count ("how many candidates speak Spanish fluently?"), mentions at least one category,
+    field value or years-of-experience filter, asks for no judgement ("best", "compare"...) and
+    mentions nothing the index does not hold ("...and has worked at Google?").
+    Values of the same field must all match, unless the question says "or"; values of different
+    fields must all match; a CV matches any of the categories. Any other question returns None
+    and goes through retrieval and the model. A follow-up question ("which of them hold CISSP?")
+    passes the sources of the previous answer as `sources` to narrow them down.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        sources (list, optional): Only consider the CVs with these sources.
+
+    Returns:
+        dict: The `answer` text, the `count` of matching CVs and the listed CVs as `results`
+            shaped like Knowledge Bases `retrievalResults`; or None if the question needs retrieval.
+    """
+    index = get_field_index()
+    if index is None or OPEN_ENDED.search(query):
+        return None
+    counting = COUNT_INTENT.search(query) is not None
+    if not counting and not LIST_INTENT.search(query):
+        return None
+
+    matches, unmatched = _scan_terms(index, tokenize(query))
+    years = _years_filter(query)
+    for name in [category] if isinstance(category, str) else category or []:
+        if not index.lookup("category", normalize_term(name)):
+            return None
+        matches.append(("category", normalize_term(name)))
+    if not matches and years is None:
+        return None
+    unmapped = _content_words(unmatched)
+    if unmapped:
+        logger.info(f"Query left to retrieval: {', '.join(unmapped)} not in the field index")
+        return None
+
+    fluent = FLUENT_QUALIFIER.search(query) is not None
+    any_value = OR_QUERY.search(query) is not None
+
+    # Rows holding each matched value; a term held by several fields matches any of them
+    by_term = {}
+    in_categories = None
+    for field, term in matches:
+        rows = index.lookup(field, term)
+        if field == "category":
+            # A CV has a single category, so categories always combine with "or"
+            in_categories = (in_categories or set()) | rows
+            continue
+        if field == "languages" and fluent:
+            rows = {row for row in rows if _fluent_in(index, row, term)}
+        by_term.setdefault(term, set()).update(rows)
+
+    rows = set(range(len(index)))
+    if by_term and any_value:
+        # "Spanish or French": any value of the question
+        rows = set().union(*by_term.values())
+    else:
+        for found in by_term.values():
+            rows &= found
+    if in_categories is not None:
+        rows &= in_categories
+    if sources is not None:
+        sources = set(sources)
+        rows = {row for row in rows if index.sources[row] in sources}
+    if years is not None:
+        minimum, strict = years
+        rows = {
+            row for row in rows
+            if index.years_experience[row] is not None
+            and (index.years_experience[row] > minimum if strict else index.years_experience[row] >= minimum)
+        }
+
+    description = describe_filters(index, matches, fluent, years, any_value)
+    if sources is not None:
+        description += f", among the {len(sources)} previous candidates"
+    listed = sorted(rows, key=lambda row: index.names[row].lower())[:QUERY_ROUTER_MAX_RESULTS]
+    logger.info(f"Query answered from the field index: {len(rows)} matches for {description}")
+    return {
+        "answer": format_routed_answer(index, listed, len(rows), description, counting),
+        "count": len(rows),
+        "results": [field_result(index, row, matches) for row in listed]
+    }
+
+def describe_filters(index: FieldIndex, matches: List[Tuple[str, str]], fluent: bool, years, any_value: bool) -> str:
+    """
+    Describes the filters of a routed question, e.g. `certification "CISSP", category "Security Engineer"`.
+
+    Args:
+        index (FieldIndex): The field index.
+        matches (list): The `(field, term)` pairs of the question.
+        fluent (bool): Whether languages must be spoken fluently.
+        years (tuple): The `(minimum, strict)` years of experience, or None.
+        any_value (bool): Whether any value (rather than all) must match.
+
+    Returns:
+        str: The description.
+    """
+    parts, categories = [], []
+    seen: Set[Tuple[str, str]] = set()
+    for field, term in matches:
+        if (field, term) in seen:
+            continue
+        seen.add((field, term))
+        if field == "category":
+            categories.append(f'"{index.label(field, term)}"')
+            continue
+        part = f'{FIELD_NAMES[field]} "{index.label(field, term)}"'
+        if field == "languages" and fluent:
+            part += " (fluent)"
+        parts.append(part)
+
+    filters = [(" or " if any_value else ", ").join(parts)] if parts else []
+    if categories:
+        filters.append(f"category {' or '.join(categories)}")
+    if years is not None:
+        minimum, strict = years
+        filters.append(f"{'more than' if strict else 'at least'} {minimum} years of experience")
+    return ", ".join(filters)
+
+def format_routed_answer(index: FieldIndex, listed: List[int], count: int, description: str, counting: bool) -> str:
+    """
+    Writes the answer to a routed question, listing the matching candidates with their citation number.
+
+    Args:
+        index (FieldIndex): The field index.
+        listed (list): The rows to list, in citation order.
+        count (int): The total number of matching CVs.
+        description (str): The description of the filters.
+        counting (bool): Whether the question asked for a count.
+
+    Returns:
+        str: The answer text.
+    """
+    if count == 0:
+        return f"No candidates match {description}."
+    if counting:
+        lines = [f"**{count}** candidate{'s' if count != 1 else ''} match {description}:", ""]
+    else:
+        lines = [f"Candidates matching {description}:", ""]
+    lines += [f"- **{index.names[row]}** ({index.categories[row]}) [{i}]" for i, row in enumerate(listed, 1)]
+    if count > len(listed):
+        lines.append(f"- ... and {count - len(listed)} more")
+    return "\n".join(lines)
+
+def field_result(index: FieldIndex, row: int, matches: List[Tuple[str, str]]) -> Dict:
+    """
+    Shapes a matching CV like a Knowledge Bases retrieval result, so it can be cited.
+
+    Args:
+        index (FieldIndex): The field index.
+        row (int): The row of the CV.
+        matches (list): The `(field, term)` pairs of the question, shown in the snippet.
+
+    Returns:
+        dict: The retrieval result.
+    """
+    matched = sorted({
+        index.label(field, term) for field, term in matches
+        if field != "category" and row in index.lookup(field, term)
+    })
+    text = f"{index.names[row]} - {index.categories[row]}"
+    if index.years_experience[row] is not None:
+        text += f" - {index.years_experience[row]} years of experience"
+    if matched:
+        text += f" - {', '.join(matched)}"
+    return {
+        "content": {"text": text},
+        "metadata": {
+            "x-amz-bedrock-kb-source-uri": index.sources[row],
+            "x-amz-bedrock-kb-document-page-number": 1,
+            "category": index.categories[row]
+        },
+        "score": 1.0
+    }
@@ -0,0 +1,173 @@
+import logging
+import threading
+import numpy as np
+from typing import Dict, List, Tuple
+from config.settings import RANK_TOP_N, RANK_SKILL_WEIGHT
+from services.aws_clients import get_client
+from services.field_index import FieldIndex, get_field_index
+from services.metrics_service import track_stage
+from services.query_router import match_terms
+from services.vector_store import LocalVectorStore, get_local_vector_store
+from utils.utils import extract_filename_from_uri, generate_presigned_url
+
+# Set up logger to track ranking activity
+logger = logging.getLogger(__name__)
+
+# Field index fields compared with the requirements of a job description
+SKILL_FIELDS = ("skills", "certifications", "languages")
+
+# The row map of the last (store, index) pair; it holds the pair itself, so a reloaded
+# store or index is never mistaken for the one the map was built for
+_field_rows_cache = None
+_field_rows_lock = threading.Lock()
+
+def document_field_rows(store: LocalVectorStore, index: FieldIndex) -> np.ndarray:
+    """
+    Maps every document of the local index to its row in the field index.
+
+    Args:
+        store (LocalVectorStore): The local vector store.
+        index (FieldIndex): The field index.
+
+    Returns:
+        np.ndarray: The field index row of each document, or `len(index)` for documents
+            missing from the field index (a padding row that never matches).
+    """
+    global _field_rows_cache
+    with _field_rows_lock:
+        if _field_rows_cache is None or _field_rows_cache[0] is not store or _field_rows_cache[1] is not index:
+            rows = {source: row for row, source in enumerate(index.sources)}
+            _field_rows_cache = (store, index, np.array(
+                [rows.get(document["source"], len(index)) for document in store.documents], dtype=np.int64
+            ))
+        return _field_rows_cache[2]
+
+def extract_job_skills(index: FieldIndex, job_description: str) -> List[Tuple[str, str]]:
+    """
+    Finds the skills, certifications and languages of the field index mentioned in a job description.
+
+    Args:
+        index (FieldIndex): The field index.
+        job_description (str): The job description.
+
+    Returns:
+        list: The distinct `(field, term)` pairs, in order of appearance.
+    """
+    return list(dict.fromkeys((field, term) for field, term in match_terms(index, job_description) if field in SKILL_FIELDS))
+
+def rank_candidates(
+    job_description: str,
+    category: str,
+    top_n: int = RANK_TOP_N,
+    skill_weight: float = RANK_SKILL_WEIGHT
+) -> Dict:
+    """
+    Ranks every CV of a category against a job description, without calling the model.
+
+    The score of a CV is `(1 - skill_weight) * similarity + skill_weight * skill_overlap`:
+    - `similarity`: cosine similarity of the job description with the CV embedding (the mean
+      of its chunk embeddings), computed for the whole category in one matrix-vector product.
+    - `skill_overlap`: share of the skills, certifications and languages named in the job
+      description that the CV holds, according to the field index.
+
+    Without a field index, or when the job description names no known skill, CVs are ranked
+    by similarity alone.
+
+    Args:
+        job_description (str): The job description.
+        category (str): The category whose CVs are ranked.
+        top_n (int): Number of candidates to return.
+        skill_weight (float): Weight (0-1) of the skill overlap in the score.
+
+    Returns:
+        dict: The `candidates` (best first, with scores and a download URL), the number of
+            CVs scored as `total_candidates`, and the `job_skills` found in the job description.
+    """
+    store = get_local_vector_store()
+    index = get_field_index()
+
+    with track_stage("rank", "similarity"):
+        start, similarity = store.score_documents(job_description, category)
+
+    with track_stage("rank", "skills"):
+        job_skills = extract_job_skills(index, job_description) if index is not None else []
+        if job_skills:
+            # Count the required skills of every field index row, then gather them for the category
+            held = np.zeros(len(index) + 1, dtype=np.float32)
+            for field, term in job_skills:
+                rows = index.lookup(field, term)
+                held[np.fromiter(rows, dtype=np.int64, count=len(rows))] += 1
+            field_rows = document_field_rows(store, index)[start:start + len(similarity)]
+            overlap = held[field_rows] / len(job_skills)
+            scores = (1 - skill_weight) * similarity + skill_weight * overlap
+        else:
+            overlap = np.zeros(len(similarity), dtype=np.float32)
+            scores = similarity
+
+    with track_stage("rank", "select"):
+        # Select the top-n without sorting the scores of the whole category
+        k = min(top_n, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=np.int64)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+    with track_stage("rank", "presign"):
+        candidates = [
+            format_candidate(store, index, start + int(i), rank, float(scores[i]), float(similarity[i]), float(overlap[i]), job_skills)
+            for rank, i in enumerate(top, 1)
+        ]
+
+    logger.info(f"Ranked {len(scores)} CVs of category '{category}' against a job description with {len(job_skills)} known skills")
+    return {
+        "candidates": candidates,
+        "total_candidates": len(scores),
+        "job_skills": [index.label(field, term) for field, term in job_skills]
+    }
+
+def format_candidate(
+    store: LocalVectorStore,
+    index: FieldIndex,
+    document: int,
+    rank: int,
+    score: float,
+    similarity: float,
+    overlap: float,
+    job_skills: List[Tuple[str, str]]
+) -> Dict:
+    """
+    Describes a ranked CV, with the required skills it holds and a download URL.
+
+    Args:
+        store (LocalVectorStore): The local vector store.
+        index (FieldIndex): The field index, or None.
+        document (int): The row of the CV in `store.documents`.
+        rank (int): The rank of the CV, from 1.
+        score (float): The combined score.
+        similarity (float): The similarity with the job description.
+        overlap (float): The skill overlap.
+        job_skills (list): The `(field, term)` pairs of the job description.
+
+    Returns:
+        dict: The candidate.
+    """
+    source = store.documents[document]["source"]
+    filename = extract_filename_from_uri(source)
+    name, matched = filename, []
+    if index is not None:
+        row = document_field_rows(store, index)[document]
+        if row < len(index):
+            name = index.names[row] or filename
+            matched = [index.label(field, term) for field, term in job_skills if row in index.lookup(field, term)]
+
+    return {
+        "rank": rank,
+        "name": name,
+        "filename": filename,
+        "source": source,
+        # Only S3 sources can be presigned; a local path is no URL a client can download from
+        "download_url": generate_presigned_url(get_client("s3"), source, expiration=3600) if source.startswith("s3://") else None,
+        "category": store.documents[document]["category"],
+        "score": round(score, 4),
+        "similarity": round(similarity, 4),
+        "skill_overlap": round(overlap, 4),
+        "matched_skills": matched
+    }
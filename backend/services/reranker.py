@@ -0,0 +1,104 @@
+import logging
+import math
+from collections import Counter
+from typing import Dict, List
+from config.settings import RERANK_TOP_N, RERANK_BM25_WEIGHT
+from services.vector_store import tokenize
+
+# Set up logger to track reranking
+logger = logging.getLogger(__name__)
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def bm25_scores(query: str, texts: List[str], k1: float = BM25_K1, b: float = BM25_B) -> List[float]:
+    """
+    Scores texts against a query with BM25, using the texts themselves as the corpus.
+
+    Document frequencies come from the candidate texts, so words found in every
+    candidate (e.g., "experience" in a set of CVs) weigh little and rare query
+    words that only some candidates contain decide the ranking.
+
+    Args:
+        query (str): The search query.
+        texts (list): The candidate texts.
+        k1 (float): Term frequency saturation.
+        b (float): Document length normalization (0 disables it).
+
+    Returns:
+        list: One BM25 score per text, in the same order.
+    """
+    query_terms = set(tokenize(query))
+    if not texts or not query_terms:
+        return [0.0] * len(texts)
+
+    # Only the query terms matter, so count nothing else
+    term_counts = []
+    lengths = []
+    document_frequency = Counter()
+    for text in texts:
+        tokens = tokenize(text)
+        counts = Counter(token for token in tokens if token in query_terms)
+        term_counts.append(counts)
+        lengths.append(len(tokens))
+        document_frequency.update(counts.keys())
+
+    total = len(texts)
+    average_length = sum(lengths) / total or 1.0
+    idf = {
+        term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+        for term, frequency in document_frequency.items()
+    }
+
+    scores = []
+    for counts, length in zip(term_counts, lengths):
+        norm = k1 * (1 - b + b * length / average_length)
+        scores.append(sum(idf[term] * count * (k1 + 1) / (count + norm) for term, count in counts.items()))
+    return scores
+
+def _normalize(values: List[float]) -> List[float]:
+    # Min-max scaling to 0-1; a constant list carries no ranking signal
+    low, high = min(values), max(values)
+    if high == low:
+        return [0.0] * len(values)
+    return [(value - low) / (high - low) for value in values]
+
+def rerank(
+    query: str,
+    results: List[Dict],
+    top_n: int = RERANK_TOP_N,
+    bm25_weight: float = RERANK_BM25_WEIGHT
+) -> List[Dict]:
+    """
+    Reorders retrieval results by a fusion of their BM25 score and their knowledge base score,
+    and keeps the best ones.
+
+    Both scores are min-max scaled over the candidates and mixed as
+    `bm25_weight * bm25 + (1 - bm25_weight) * kb`. The fused score replaces `score`
+    (so the context builder and the citations follow the new order) and the original
+    one is kept as `kb_score`. Ties keep the knowledge base order.
+
+    Args:
+        query (str): The search query.
+        results (list): Retrieval results shaped like Knowledge Bases `retrievalResults`.
+        top_n (int): Number of results to keep (0 keeps them all).
+        bm25_weight (float): Weight (0-1) of the lexical score in the fused score.
+
+    Returns:
+        list: Copies of the kept results, best first.
+    """
+    if not results:
+        return []
+
+    kb_scores = [result.get("score", 0) for result in results]
+    lexical = _normalize(bm25_scores(query, [result["content"]["text"] for result in results]))
+    semantic = _normalize(kb_scores)
+    fused = [bm25_weight * l + (1 - bm25_weight) * s for l, s in zip(lexical, semantic)]
+
+    order = sorted(range(len(results)), key=lambda i: fused[i], reverse=True)
+    if top_n > 0:
+        order = order[:top_n]
+
+    logger.info(f"Reranked {len(results)} results, kept {len(order)}")
+    return [{**results[i], "score": round(fused[i], 4), "kb_score": kb_scores[i]} for i in order]
@@ -1,19 +1,60 @@
-import boto3
+import asyncio
+import contextvars
+import functools
 import logging
 import json
-from typing import Dict, List
-from config.settings import BEDROCK_MODEL, SYSTEM_PROMPT, AWS_REGION, KNOWLEDGE_BASE_ID
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+from config.settings import BEDROCK_MODEL, SYSTEM_PROMPT, KNOWLEDGE_BASE_ID, CHAT_MAX_CONCURRENCY, CHAT_BATCH_MAX_CONCURRENCY, RETRIEVER_BACKEND, RETRIEVER_TOP_K, RERANK_CANDIDATES, RERANK_TOP_N
+from services.aws_clients import get_client
+from services.cache_service import query_cache
+from services.context_builder import build_context, estimate_tokens
+from services.query_router import route_query
+from services.reranker import rerank
+from services.session_service import chat_sessions, format_history, strip_follow_up
+from services.metrics_service import CONTEXT_CHUNKS, QUERY_ROUTES, RETRIEVED_RESULTS, record_prompt, timed, track_stage
+from services.vector_store import get_local_vector_store
 from utils.utils import extract_filename_from_uri, generate_presigned_url
 
-# Initialize clients
-bedrock_runtime_client = boto3.client('bedrock-runtime', region_name=AWS_REGION)
-bedrock_agent_client = boto3.client('bedrock-agent-runtime', region_name=AWS_REGION)
-s3_client = boto3.client('s3', region_name=AWS_REGION)
+# Shared clients, with connection pools sized so every in-flight chat request can hold a connection
+bedrock_runtime_client = get_client('bedrock-runtime')
+bedrock_agent_client = get_client('bedrock-agent-runtime')
+s3_client = get_client('s3')
+
+# Dedicated thread pool for the blocking boto3 calls, so they never run on the event loop
+bedrock_executor = ThreadPoolExecutor(max_workers=CHAT_MAX_CONCURRENCY, thread_name_prefix="bedrock")
+# Thread pool for the per-category retrievals of multi-category questions (separate from
+# `bedrock_executor`, whose workers wait for them)
+retrieval_executor = ThreadPoolExecutor(max_workers=CHAT_MAX_CONCURRENCY, thread_name_prefix="retrieval")
+# Caps the number of Bedrock calls in flight on this worker
+bedrock_semaphore = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
 
 # Set up logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking function in the Bedrock thread pool without blocking the event loop.
+
+    The call waits for a free slot in `bedrock_semaphore` first, so no more than
+    `CHAT_MAX_CONCURRENCY` blocking calls are in flight at the same time. It runs in a
+    copy of the caller's context, so the request's trace ID and stage timings follow it.
+
+    Args:
+        func (callable): The blocking function to run.
+        *args: Positional arguments for `func`.
+        **kwargs: Keyword arguments for `func`.
+
+    Returns:
+        Any: The return value of `func`.
+    """
+    async with bedrock_semaphore:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(bedrock_executor, functools.partial(context.run, func, *args, **kwargs))
+
 def call_bedrock(prompt: str) -> str:
     """
     Calls the Amazon Bedrock model to generate a response for a given prompt.
@@ -29,125 +70,734 @@ def call_bedrock(prompt: str) -> str:
             "messages": [{"role": "user", "content": [{"text": prompt}]}]
         })
 
-        response = bedrock_runtime_client.invoke_model(
+        with track_stage("chat", "generate"):
+            response = bedrock_runtime_client.invoke_model(
+                modelId=BEDROCK_MODEL,
+                body=body,
+                contentType="application/json",
+                accept="application/json"
+            )
+            result = json.loads(response["body"].read())
+
+        return result["output"]["message"]["content"][0]["text"]
+
+    except Exception as e:
+        logger.exception("Error invoking Bedrock model")
+        raise e
+
+def extract_stream_text(chunk: Dict) -> str:
+    """
+    Extracts the text delta from a decoded response-stream chunk.
+
+    Supports the Nova/Converse event shape (`contentBlockDelta`) and the
+    Anthropic messages event shape (`content_block_delta`).
+
+    Args:
+        chunk (dict): The decoded JSON payload of one stream chunk.
+
+    Returns:
+        str: The text carried by the chunk, or an empty string for non-text events.
+    """
+    delta = chunk.get("contentBlockDelta", {}).get("delta", {})
+    if "text" in delta:
+        return delta["text"]
+    if chunk.get("type") == "content_block_delta":
+        return chunk.get("delta", {}).get("text", "")
+    return ""
+
+def call_bedrock_stream(prompt: str) -> Iterator[str]:
+    """
+    Calls the Amazon Bedrock model with response streaming and yields the text as it is generated.
+
+    Args:
+        prompt (str): The text prompt to send to the model.
+
+    Yields:
+        str: The next piece of the model's response text.
+    """
+    try:
+        body = json.dumps({
+            "messages": [{"role": "user", "content": [{"text": prompt}]}]
+        })
+
+        response = bedrock_runtime_client.invoke_model_with_response_stream(
             modelId=BEDROCK_MODEL,
             body=body,
             contentType="application/json",
             accept="application/json"
         )
 
-        result = json.loads(response["body"].read())
-        return result["output"]["message"]["content"][0]["text"]
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            text = extract_stream_text(json.loads(chunk["bytes"]))
+            if text:
+                yield text
 
     except Exception as e:
-        logger.exception("Error invoking Bedrock model")
+        logger.exception("Error invoking Bedrock model with response stream")
         raise e
 
-def retrieve_documents(query: str, category: str = None) -> Dict:
+async def call_bedrock_async(prompt: str) -> str:
     """
-    Retrieves documents from the knowledge base related to the query and category.
+    Async variant of `call_bedrock` that keeps the event loop free while the model runs.
 
     Args:
-        query (str): The search query to retrieve relevant documents.
+        prompt (str): The text prompt to send to the model.
+
+    Returns:
+        str: The model's response text.
+    """
+    return await run_blocking(call_bedrock, prompt)
+
+async def stream_blocking(iterable_factory: Callable[[], Iterable]) -> AsyncIterator:
+    """
+    Consumes a blocking iterable in the Bedrock thread pool and yields its items on the event loop.
+
+    The slot in `bedrock_semaphore` is held for as long as the iterable is being consumed.
+    If the consumer stops early (e.g. the client disconnects), the producer thread stops
+    at the next item.
+
+    Args:
+        iterable_factory (callable): A function returning the blocking iterable to consume.
+
+    Yields:
+        Any: The items produced by the iterable, in order.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable_factory():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    async with bedrock_semaphore:
+        producer = loop.run_in_executor(bedrock_executor, contextvars.copy_context().run, produce)
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            await producer
+
+def search_knowledge_base(query: str, category: str = None) -> List[Dict]:
+    """
+    Queries the Amazon Knowledge Base for the chunks related to the query and category.
+
+    Args:
+        query (str): The search query.
         category (str, optional): A category filter to narrow down the search.
 
     Returns:
-        dict: A dictionary containing the retrieved context and citations.
+        list: The `retrievalResults` returned by the knowledge base.
     """
-    try:
-        logger.info(f"Retrieving documents for query: '{query}' - Category: '{category}'")
-        
-        retrieval_configuration = {}
-        if category:
-            retrieval_configuration["vectorSearchConfiguration"] = {
-                "filter": {"equals": {"key": "category", "value": category}}
+    vector_search_configuration = {}
+    if category:
+        vector_search_configuration["filter"] = {"equals": {"key": "category", "value": category}}
+    if RERANK_TOP_N > 0:
+        # Fetch a wider candidate set for the reranker to choose from
+        vector_search_configuration["numberOfResults"] = RERANK_CANDIDATES
+    retrieval_configuration = {}
+    if vector_search_configuration:
+        retrieval_configuration["vectorSearchConfiguration"] = vector_search_configuration
+
+    response = bedrock_agent_client.retrieve(
+        knowledgeBaseId=KNOWLEDGE_BASE_ID,
+        retrievalQuery={"text": query},
+        retrievalConfiguration=retrieval_configuration
+    )
+    return response.get('retrievalResults', [])
+
+def category_list(category: Union[str, List[str]] = None) -> List[str]:
+    """
+    Returns the distinct categories of a category filter, in order.
+
+    Args:
+        category (str or list, optional): One category, a list of categories, or None for all.
+
+    Returns:
+        list: The categories; empty means all of them.
+    """
+    categories = [category] if isinstance(category, str) else category or []
+    return list(dict.fromkeys(filter(None, categories)))
+
+def search_knowledge_base_categories(query: str, categories: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Queries the Amazon Knowledge Base once per category, concurrently.
+
+    A single `in` filter would return one global top-k that the best matching category
+    can fill on its own; one query per category gives every category its own top-k.
+
+    Args:
+        query (str): The search query.
+        categories (list): The categories to search.
+
+    Returns:
+        dict: The `retrievalResults` of each category.
+    """
+    # Each retrieval runs in its own copy of the context, so it keeps the request's trace ID
+    futures = {
+        category: retrieval_executor.submit(contextvars.copy_context().run, search_knowledge_base, query, category)
+        for category in categories
+    }
+    return {category: future.result() for category, future in futures.items()}
+
+def merge_category_results(results_by_category: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    Merges the retrieval results of several categories into one ranking.
+
+    All categories are scored against the same index, so their scores are comparable:
+    they are min-max scaled over the union of the results, and a category whose chunks
+    all score low stays below a category with better matches. Equal scores alternate
+    between categories by rank. A chunk returned for several categories is kept once.
+
+    Args:
+        results_by_category (dict): The retrieval results of each category.
+
+    Returns:
+        list: Copies of the results with normalized scores (the original one as `raw_score`), best first.
+    """
+    scores = [result.get("score", 0) for results in results_by_category.values() for result in results]
+    low, high = min(scores, default=0), max(scores, default=0)
+
+    merged = {}
+    for results in results_by_category.values():
+        for rank, result in enumerate(results):
+            score = result.get("score", 0)
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            key = (result.get("metadata", {}).get("x-amz-bedrock-kb-source-uri", ""), result["content"]["text"])
+            if key not in merged or normalized > merged[key][0]:
+                merged[key] = (normalized, rank, {**result, "score": normalized, "raw_score": score})
+    return [result for _, _, result in sorted(merged.values(), key=lambda item: (-item[0], item[1]))]
+
+def build_citations(results: List[Dict]) -> List[Dict]:
+    """
+    Builds one citation per distinct source of the retrieval results, with a download URL.
+
+    Args:
+        results (list): Retrieval results shaped like Knowledge Bases `retrievalResults`.
+
+    Returns:
+        list: The citations, numbered from 1 in order of first appearance.
+    """
+    citations = []
+    seen_sources = {}
+
+    for result in results:
+        metadata = result.get('metadata', {})
+        s3_uri = metadata.get('x-amz-bedrock-kb-source-uri', '')
+
+        # Avoid duplicate citations
+        if s3_uri in seen_sources:
+            citation_id = seen_sources[s3_uri]
+        else:
+            citation_id = len(seen_sources) + 1
+            seen_sources[s3_uri] = citation_id
+
+            # Only S3 sources can be presigned; local index sources are linked as they are
+            if s3_uri.startswith('s3://'):
+                download_url = generate_presigned_url(get_client('s3'), s3_uri, expiration=3600)
+            else:
+                download_url = s3_uri
+            filename = extract_filename_from_uri(s3_uri)
+
+            citation = {
+                "id": citation_id,
+                "source": s3_uri,
+                "filename": filename,
+                "download_url": download_url,
+                "page": int(metadata.get('x-amz-bedrock-kb-document-page-number', 0)),
+                "category": metadata.get('category', 'Uncategorized'),
+                "score": round(result.get('score', 0), 4),
+                "snippet": result['content']['text'][:200] + "..."
             }
+            citations.append(citation)
 
-        response = bedrock_agent_client.retrieve(
-            knowledgeBaseId=KNOWLEDGE_BASE_ID,
-            retrievalQuery={"text": query},
-            retrievalConfiguration=retrieval_configuration
-        )
+    return citations
+
+def retrieve_documents(query: str, category: Union[str, List[str]] = None) -> Dict:
+    """
+    Retrieves documents from the knowledge base related to the query and category.
+
+    With several categories, every category is searched (concurrently on Knowledge Bases,
+    in one scoring pass on the local index) and the results are merged by normalized score,
+    so the model is called once over a single de-duplicated context.
+
+    Args:
+        query (str): The search query to retrieve relevant documents.
+        category (str or list, optional): The category filter: one category, a list of categories, or None for all.
+
+    Returns:
+        dict: A dictionary containing the retrieved context, citations and raw results, and the
+            `candidates` they were reranked from (kept by chat sessions for follow-up questions).
+    """
+    try:
+        logger.info(f"Retrieving documents for query: '{query}' - Category: '{category}' - Backend: '{RETRIEVER_BACKEND}'")
 
-        results = response.get('retrievalResults', [])
+        categories = category_list(category)
+        top_k = RERANK_CANDIDATES if RERANK_TOP_N > 0 else RETRIEVER_TOP_K
+        with track_stage("chat", "retrieve"):
+            if len(categories) > 1:
+                # Fan out over the categories and merge their results into one ranking
+                if RETRIEVER_BACKEND == "local":
+                    results_by_category = get_local_vector_store().search_categories(query, categories, top_k)
+                else:
+                    results_by_category = search_knowledge_base_categories(query, categories)
+                results = merge_category_results(results_by_category)
+            elif RETRIEVER_BACKEND == "local":
+                results = get_local_vector_store().search(query, categories[0] if categories else None, top_k)
+            else:
+                results = search_knowledge_base(query, categories[0] if categories else None)
+        RETRIEVED_RESULTS.observe(len(results))
         logger.info(f"Documents retrieved: {len(results)}")
+        candidates = results
+
+        # Keep the best candidates by keyword and knowledge base score, so fewer chunks are presigned and sent to the model
+        if RERANK_TOP_N > 0:
+            with track_stage("chat", "rerank"):
+                results = rerank(query, results, RERANK_TOP_N)
 
         # Combine context
         context = "\n\n".join(result['content']['text'] for result in results)
 
-        # Build citations
-        citations = []
-        seen_sources = {}
-        
-        for result in results:
-            metadata = result.get('metadata', {})
-            s3_uri = metadata.get('x-amz-bedrock-kb-source-uri', '')
-
-            # Avoid duplicate citations
-            if s3_uri in seen_sources:
-                citation_id = seen_sources[s3_uri]
-            else:
-                citation_id = len(seen_sources) + 1
-                seen_sources[s3_uri] = citation_id
-
-                download_url = generate_presigned_url(s3_uri, expiration=3600)
-                filename = extract_filename_from_uri(s3_uri)
-
-                citation = {
-                    "id": citation_id,
-                    "source": s3_uri,
-                    "filename": filename,
-                    "download_url": download_url,
-                    "page": int(metadata.get('x-amz-bedrock-kb-document-page-number', 0)),
-                    "category": metadata.get('category', 'Uncategorized'),
-                    "score": round(result.get('score', 0), 4),
-                    "snippet": result['content']['text'][:200] + "..."
-                }
-                citations.append(citation)
-
-        return {"context": context, "citations": citations}
+        # Build citations (presigning the S3 sources)
+        with track_stage("chat", "presign"):
+            citations = build_citations(results)
+
+        return {"context": context, "citations": citations, "results": results, "candidates": candidates}
 
     except Exception as e:
         logger.exception("Error retrieving documents")
         raise e
 
-def retriever_function(query: str, category: str = None) -> Dict:
+def retrieve_follow_up(query: str, session: Dict) -> Dict:
     """
-    Main function to retrieve documents and generate a response with citations.
+    Answers the retrieval of a follow-up question from the candidates cached in its chat
+    session, without querying the knowledge base.
+
+    The candidates of the question that started the thread are reranked against the
+    follow-up, so its keywords ("AWS certs") pick the chunks to keep while the knowledge
+    base score of the original question still counts.
+
+    Args:
+        query (str): The follow-up question.
+        session (dict): The chat session, with its cached `results`.
+
+    Returns:
+        dict: Same as `retrieve_documents`.
+    """
+    try:
+        candidates = session["results"]
+        logger.info(f"Follow-up question answered from {len(candidates)} session candidates")
+
+        results = candidates
+        if RERANK_TOP_N > 0:
+            with track_stage("chat", "rerank"):
+                results = rerank(query, candidates, RERANK_TOP_N)
+
+        context = "\n\n".join(result['content']['text'] for result in results)
+        with track_stage("chat", "presign"):
+            citations = build_citations(results)
+
+        return {"context": context, "citations": citations, "results": results, "candidates": candidates}
+
+    except Exception as e:
+        logger.exception("Error retrieving follow-up documents")
+        raise e
+
+def retrieve_with_session(query: str, category: Union[str, List[str]] = None, session: Dict = None) -> Dict:
+    """
+    Retrieves the documents of a question, reusing the candidates of its chat session for follow-ups.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): The category filter: one category, a list of categories, or None for all.
+        session (dict, optional): The chat session the question follows up on, or None.
+
+    Returns:
+        dict: Same as `retrieve_documents`.
+    """
+    if session is not None and session["results"]:
+        return retrieve_follow_up(query, session)
+    if session is not None:
+        # Nothing cached to narrow (the previous answer came from the field index or the
+        # answer cache), so search with the previous question for context
+        query = f"{session['turns'][-1][0]} {strip_follow_up(query)}"
+    return retrieve_documents(query, category)
+
+def assemble_context(retrieval_result: Dict) -> Dict:
+    """
+    Builds the token-budgeted, de-duplicated context from a `retrieve_documents` result.
+
+    Citations are narrowed to the sources whose chunks made it into the context and
+    renumbered, so the answer only cites documents the model has actually seen.
+
+    Args:
+        retrieval_result (dict): The result of `retrieve_documents`.
+
+    Returns:
+        dict: The context text, the matching citations and the context builder statistics.
+    """
+    with track_stage("chat", "context"):
+        built = build_context(retrieval_result["results"])
+    CONTEXT_CHUNKS.observe(built["chunks_kept"])
+    kept_sources = {
+        result.get("metadata", {}).get("x-amz-bedrock-kb-source-uri", "") for result in built["results"]
+    }
+    citations = [
+        {**citation, "id": citation_id}
+        for citation_id, citation in enumerate(
+            (c for c in retrieval_result["citations"] if c["source"] in kept_sources), 1
+        )
+    ]
+    return {"context": built["context"], "citations": citations, "stats": built}
+
+def build_prompt(query: str, context: str, history: str = "") -> str:
+    """
+    Builds the prompt sent to the model from the retrieved context and the user query,
+    and records its size.
 
     Args:
         query (str): The user query.
-        category (str, optional): Category filter.
+        context (str): The retrieved context.
+        history (str, optional): The previous turns of the conversation, for follow-up questions.
+
+    Returns:
+        str: The prompt text.
+    """
+    with track_stage("chat", "prompt"):
+        conversation = f"Conversation so far:\n{history}\n\n" if history else ""
+        prompt = f"{SYSTEM_PROMPT}\n\n{conversation}Context: {context}\n\nQuestion: {query}\nAnswer:\n"
+        record_prompt(prompt, estimate_tokens(prompt))
+    return prompt
+
+def format_citations(citations: List[Dict]) -> str:
+    """
+    Formats the citations as the Markdown block appended to the answer.
+
+    Args:
+        citations (list): The citations built by `retrieve_documents`.
+
+    Returns:
+        str: The Markdown citations block, or an empty string when there are no citations.
+    """
+    if not citations:
+        return ""
+
+    # Format citations in a nicer Markdown style
+    citations_text = "\n".join(
+        f"**Citation {c['id']}**: [{c['filename']}]({c['download_url']}) - "
+        f"Page {c['page']}"
+        for c in citations
+    )
+    return f"\n\n**Citations:**\n{citations_text}"
+
+def format_answer(answer: str, citations: List[Dict]) -> Dict:
+    """
+    Appends the Markdown citations to the model answer.
+
+    Args:
+        answer (str): The model's answer text.
+        citations (list): The citations built by `retrieve_documents`.
 
     Returns:
         dict: Dictionary containing answer text, citations, and total sources.
     """
-    try:
-        logger.info(f"Query received: '{query}' - Category: '{category}'")
-        retrieval_result = retrieve_documents(query, category)
-        context = retrieval_result["context"]
-        citations = retrieval_result["citations"]
-
-        if not context:
-            return {"answer": "No relevant documents found.", "citations": [], "total_sources": 0}
-
-        # Generate prompt
-        prompt = f"{SYSTEM_PROMPT}\n\nContext: {context}\n\nQuestion: {query}\nAnswer:\n"
-        answer = call_bedrock(prompt)
-
-        # Format citations in a nicer Markdown style
-        if citations:
-            citations_text = "\n".join(
-                f"**Citation {c['id']}**: [{c['filename']}]({c['download_url']}) - "
-                f"Page {c['page']}"
-                for c in citations
-            )
-            full_answer = f"{answer}\n\n**Citations:**\n{citations_text}"
+    full_answer = f"{answer}{format_citations(citations)}"
+
+    return {"answer": full_answer, "citations": citations, "total_sources": len(citations)}
+
+def answer_from_field_index(query: str, category: Union[str, List[str]] = None, session: Dict = None) -> Dict:
+    """
+    Answers a list or count question about CV fields from the field index, without the model.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        session (dict, optional): The chat session the question follows up on; the question
+            then only considers the candidates of the previous answer.
+
+    Returns:
+        dict: The `answer` text and its `citations`, or None if the question needs
+            retrieval and the model.
+    """
+    with track_stage("chat", "route"):
+        if session is not None:
+            routed = route_query(strip_follow_up(query), category, session["sources"])
         else:
-            full_answer = answer
+            routed = route_query(query, category)
+    if routed is None:
+        QUERY_ROUTES.labels("rag").inc()
+        return None
+    QUERY_ROUTES.labels("field_index").inc()
+    with track_stage("chat", "presign"):
+        citations = build_citations(routed["results"])
+    return {"answer": routed["answer"], "citations": citations}
+
+# Answer returned when retrieval finds nothing to build a context from
+NO_DOCUMENTS_ANSWER = "No relevant documents found."
+
+def prepare_answer(
+    query: str,
+    category: Union[str, List[str]] = None,
+    session_id: str = None,
+    follow_up: bool = None
+) -> Dict:
+    """
+    Runs the steps of the chat pipeline that come before generation, shared by
+    `retriever_function`, `retriever_function_async` and `stream_retriever_function`.
+
+    The question is answered without the model when possible: from the field index (list
+    and count questions), from the answer cache (repeated questions, except follow-ups,
+    which depend on the conversation), or with `NO_DOCUMENTS_ANSWER` when retrieval finds
+    nothing. Otherwise the documents are retrieved, reusing the session candidates for
+    follow-ups, and the prompt is built.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        session_id (str, optional): The chat session of the question.
+        follow_up (bool, optional): Whether the question follows up on the previous answer of
+            the session; None detects it from the wording.
+
+    Returns:
+        dict: The `answer` (None if the model has to generate it from `prompt`), its
+            `citations`, the `session` followed up on (or None) and the `results` a
+            follow-up question can reuse, for `finish_answer`.
+    """
+    session = chat_sessions.follow_up(session_id, query, category, follow_up)
+
+    # Answer list and count questions about CV fields without the model
+    routed = answer_from_field_index(query, category, session)
+    if routed is not None:
+        return {**routed, "session": session, "results": session and session["results"]}
+
+    # Serve repeated questions from the answer cache (follow-ups depend on the conversation)
+    cached = query_cache.get(query, category) if session is None else None
+    if cached is not None:
+        logger.info("Answer served from query cache")
+        return {"answer": cached["answer"], "citations": cached["citations"], "session": session, "results": None}
+
+    retrieval_result = retrieve_with_session(query, category, session)
+    assembled = assemble_context(retrieval_result)
+    if not assembled["context"]:
+        return {"answer": NO_DOCUMENTS_ANSWER, "citations": [], "session": session, "results": retrieval_result["candidates"]}
+
+    prompt = build_prompt(query, assembled["context"], format_history(session) if session else "")
+    return {
+        "answer": None,
+        "prompt": prompt,
+        "citations": assembled["citations"],
+        "session": session,
+        "results": retrieval_result["candidates"]
+    }
+
+def finish_answer(
+    query: str,
+    category: Union[str, List[str]],
+    session_id: str,
+    prepared: Dict,
+    answer: str = None
+) -> Dict:
+    """
+    Runs the steps of the chat pipeline that come after generation: a generated answer is
+    cached (unless it followed up on a session), and the turn is recorded in the chat
+    session however the answer was found.
+
+    Args:
+        query (str): The user query.
+        category (str or list): The category filter of the question.
+        session_id (str): The chat session of the question.
+        prepared (dict): The result of `prepare_answer`.
+        answer (str, optional): The generated answer; None when `prepare_answer` already answered.
+
+    Returns:
+        dict: Dictionary containing answer text, citations, and total sources.
+    """
+    if answer is None:
+        answer = prepared["answer"]
+    elif prepared["session"] is None:
+        query_cache.set(query, category, {"answer": answer, "citations": prepared["citations"]})
+    chat_sessions.record(session_id, query, category, answer, prepared["citations"], prepared["results"])
+    return format_answer(answer, prepared["citations"])
+
+@timed("chat", "total")
+def retriever_function(
+    query: str,
+    category: Union[str, List[str]] = None,
+    session_id: str = None,
+    follow_up: bool = None
+) -> Dict:
+    """
+    Main function to retrieve documents and generate a response with citations.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        session_id (str, optional): The chat session of the question. Follow-up questions
+            ("and which of them...?") reuse the candidates and history of the session.
+        follow_up (bool, optional): Whether the question follows up on the previous answer of
+            the session; None detects it from the wording.
 
-        return {"answer": full_answer, "citations": citations, "total_sources": len(citations)}
+    Returns:
+        dict: Dictionary containing answer text, citations, and total sources.
+    """
+    try:
+        logger.info(f"Query received: '{query}' - Category: '{category}' - Session: '{session_id}'")
+        prepared = prepare_answer(query, category, session_id, follow_up)
+        answer = call_bedrock(prepared["prompt"]) if prepared["answer"] is None else None
+        return finish_answer(query, category, session_id, prepared, answer)
 
     except Exception as e:
         logger.exception("Error in retriever_function")
         raise e
+
+@timed("chat", "total")
+async def retriever_function_async(
+    query: str,
+    category: Union[str, List[str]] = None,
+    session_id: str = None,
+    follow_up: bool = None
+) -> Dict:
+    """
+    Async variant of `retriever_function`.
+
+    Retrieval and generation run in the Bedrock thread pool, so a slow Bedrock call
+    only occupies one slot of `CHAT_MAX_CONCURRENCY` instead of the whole event loop.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        session_id (str, optional): The chat session of the question. Follow-up questions
+            ("and which of them...?") reuse the candidates and history of the session.
+        follow_up (bool, optional): Whether the question follows up on the previous answer of
+            the session; None detects it from the wording.
+
+    Returns:
+        dict: Dictionary containing answer text, citations, and total sources.
+    """
+    try:
+        logger.info(f"Query received: '{query}' - Category: '{category}' - Session: '{session_id}'")
+        prepared = await run_blocking(prepare_answer, query, category, session_id, follow_up)
+        answer = await call_bedrock_async(prepared["prompt"]) if prepared["answer"] is None else None
+        return finish_answer(query, category, session_id, prepared, answer)
+
+    except Exception as e:
+        logger.exception("Error in retriever_function_async")
+        raise e
+
+async def retriever_batch_async(queries: List[Tuple[str, str]], max_concurrency: int = CHAT_BATCH_MAX_CONCURRENCY) -> List:
+    """
+    Answers a batch of (query, category) pairs concurrently with a bounded fan-out.
+
+    Questions that are identical after normalization within the same category are
+    retrieved and answered once, and the result is shared by every occurrence.
+
+    Args:
+        queries (list): The (query, category) pairs to answer.
+        max_concurrency (int): Maximum number of questions answered at the same time.
+
+    Returns:
+        list: One entry per pair, in request order: the `retriever_function` result,
+            or the exception raised while answering that pair.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(query, category):
+        async with semaphore:
+            return await retriever_function_async(query, category)
+
+    tasks = {}
+    for query, category in queries:
+        key = query_cache.make_key(query, category)
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(bounded(query, category))
+
+    logger.info(f"Batch of {len(queries)} queries, {len(tasks)} distinct")
+    ordered = [tasks[query_cache.make_key(query, category)] for query, category in queries]
+    return await asyncio.gather(*ordered, return_exceptions=True)
+
+def citations_event(citations: List[Dict]) -> Dict:
+    """
+    Builds the final `citations` event of the answer stream.
+
+    Args:
+        citations (list): The citations built by `retrieve_documents`.
+
+    Returns:
+        dict: The `citations` event.
+    """
+    return {
+        "event": "citations",
+        "data": {
+            "citations": citations,
+            "total_sources": len(citations),
+            "markdown": format_citations(citations)
+        }
+    }
+
+@timed("chat", "stream_total")
+async def stream_retriever_function(
+    query: str,
+    category: Union[str, List[str]] = None,
+    token_stream: Callable[[str], Iterable[str]] = None,
+    session_id: str = None,
+    follow_up: bool = None
+) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of `retriever_function` that yields the answer as it is generated.
+
+    Events are dictionaries with an `event` name and a `data` payload:
+    - `token`: `{"text": str}` for every piece of generated text.
+    - `citations`: `{"citations": list, "total_sources": int, "markdown": str}`, sent once at the end.
+
+    Args:
+        query (str): The user query.
+        category (str or list, optional): Category filter: one category, a list of categories, or None for all.
+        token_stream (callable, optional): Function turning a prompt into an iterable of text pieces.
+            Defaults to `call_bedrock_stream`; a local fake can be passed for testing.
+        session_id (str, optional): The chat session of the question (see `retriever_function`).
+        follow_up (bool, optional): Whether the question is a follow-up (see `retriever_function`).
+
+    Yields:
+        dict: The next event of the stream.
+    """
+    token_stream = token_stream or call_bedrock_stream
+    try:
+        logger.info(f"Streaming query received: '{query}' - Category: '{category}' - Session: '{session_id}'")
+        prepared = await run_blocking(prepare_answer, query, category, session_id, follow_up)
+
+        # Answers found without the model (field index, answer cache, no documents) come as a single token
+        if prepared["answer"] is not None:
+            finish_answer(query, category, session_id, prepared)
+            yield {"event": "token", "data": {"text": prepared["answer"]}}
+            yield citations_event(prepared["citations"])
+            return
+
+        answer_parts = []
+        with track_stage("chat", "generate"):
+            async for text in stream_blocking(lambda: token_stream(prepared["prompt"])):
+                answer_parts.append(text)
+                yield {"event": "token", "data": {"text": text}}
+        finish_answer(query, category, session_id, prepared, "".join(answer_parts))
+
+        yield citations_event(prepared["citations"])
+
+    except Exception as e:
+        logger.exception("Error in stream_retriever_function")
+        raise e
@@ -1,12 +1,35 @@
-import boto3
+import asyncio
 import json
 from datetime import datetime
-from config.settings import AWS_REGION, S3_BUCKET_NAME, S3_PREFIX
+from config.settings import AWS_REGION, S3_BUCKET_NAME, S3_PREFIX, S3_MULTIPART_PART_SIZE, S3_MULTIPART_CONCURRENCY
+from services.aws_clients import get_client
 from utils.utils import normalize_filename
 import logging
 
 logger = logging.getLogger(__name__)
 
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+async def read_exact(stream, size: int) -> bytes:
+    """
+    Reads exactly `size` bytes from an async stream, or fewer only at the end of the stream.
+
+    Args:
+        stream: An object with an async `read(size)` method (e.g., FastAPI's `UploadFile`).
+        size (int): The number of bytes to read.
+
+    Returns:
+        bytes: The data read; shorter than `size` only at the end of the stream.
+    """
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = await stream.read(size - len(buffer))
+        if not data:
+            break
+        buffer.extend(data)
+    return bytes(buffer)
+
 class S3Service:
     """
     S3Service handles file uploads and metadata management for files stored in Amazon S3.
@@ -15,12 +38,12 @@ class S3Service:
 
     def __init__(self, prefix: str = S3_PREFIX):
         """
-        Initializes the S3Service instance, setting up the S3 client with AWS credentials and the specified S3 prefix.
+        Initializes the S3Service instance, using the shared S3 client and the specified S3 prefix.
 
         Args:
             prefix (str): The S3 prefix for organizing uploaded files (default is from settings).
         """
-        self.s3_client = boto3.client('s3', region_name=AWS_REGION)
+        self.s3_client = get_client('s3')
         self.bucket_name = S3_BUCKET_NAME
         self.prefix = prefix
         logger.info(f"S3Service initialized with bucket '{self.bucket_name}' and prefix '{self.prefix}'")
@@ -49,32 +72,210 @@ class S3Service:
                 Key=s3_key,
                 Body=file_content,
                 ContentType=content_type or "application/octet-stream",
-                Metadata={
-                    "original_filename": normalized_filename,
-                    "uploaded_at": datetime.utcnow().isoformat()
-                }
+                Metadata=self._object_metadata(normalized_filename)
             )
             logger.info(f"File uploaded: {s3_key}")
 
             # Create metadata JSON file
-            metadata = {
-                "metadataAttributes": {
-                    "category": category
-                }
-            }
-            json_key = f"{self.prefix}{normalized_filename}.metadata.json"
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=json_key,
-                Body=json.dumps(metadata),
-                ContentType="application/json"
-            )
-            logger.info(f"Metadata JSON uploaded: {json_key}")
+            self._put_metadata_json(normalized_filename, category)
+
+            return self._upload_result(s3_key, normalized_filename)
+
+        except Exception as e:
+            logger.exception(f"Error uploading file '{filename}'.")
+            raise e
+
+    async def upload_stream(
+        self,
+        stream,
+        filename: str,
+        content_type: str = None,
+        category: str = None,
+        part_size: int = S3_MULTIPART_PART_SIZE,
+        max_concurrency: int = S3_MULTIPART_CONCURRENCY,
+        sha256: str = None
+    ) -> dict:
+        """
+        Uploads a file to S3 from an async stream without holding the whole file in memory.
+
+        The stream is read one part at a time. Files that fit in a single part are sent
+        with one `put_object`; larger files are sent as a multipart upload with at most
+        `max_concurrency` parts in flight, so peak memory is about
+        `(max_concurrency + 1) * part_size` whatever the file size. The `.metadata.json`
+        sidecar is written once the main object is stored, so a failed upload leaves no
+        sidecar behind (nor replaces the sidecar of an existing object with the same name).
+
+        Args:
+            stream: An object with an async `read(size)` method (e.g., FastAPI's `UploadFile`).
+            filename (str): The name of the file to upload.
+            content_type (str, optional): The MIME type of the file (default is "application/octet-stream").
+            category (str, optional): The category to associate with the file for metadata purposes.
+            part_size (int): The size of each multipart part in bytes (at least 5 MiB).
+            max_concurrency (int): The maximum number of parts uploaded at the same time.
+            sha256 (str, optional): The hex SHA-256 of the content, stored in the object metadata.
+
+        Returns:
+            dict: A dictionary containing the S3 key, file URL, and normalized filename.
+        """
+        normalized_filename = normalize_filename(filename)
+        s3_key = f"{self.prefix}{normalized_filename}"
+        content_type = content_type or "application/octet-stream"
+        part_size = max(part_size, MIN_PART_SIZE)
+
+        try:
+            first_part = await read_exact(stream, part_size)
+            if len(first_part) < part_size:
+                # The whole file fits in a single part
+                await asyncio.to_thread(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Body=first_part,
+                    ContentType=content_type,
+                    Metadata=self._object_metadata(normalized_filename, sha256)
+                )
+            else:
+                await self._multipart_upload(
+                    stream, s3_key, normalized_filename, content_type, first_part, part_size, max_concurrency, sha256
+                )
+            logger.info(f"File uploaded: {s3_key}")
 
-            # Generate file URL
-            file_url = f"https://{self.bucket_name}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
-            return {"s3_key": s3_key, "url": file_url, "filename": normalized_filename}
+            await asyncio.to_thread(self._put_metadata_json, normalized_filename, category)
+            return self._upload_result(s3_key, normalized_filename)
 
         except Exception as e:
             logger.exception(f"Error uploading file '{filename}'.")
             raise e
+
+    async def _multipart_upload(
+        self,
+        stream,
+        s3_key: str,
+        normalized_filename: str,
+        content_type: str,
+        first_part: bytes,
+        part_size: int,
+        max_concurrency: int,
+        sha256: str = None
+    ) -> None:
+        """
+        Sends a stream as an S3 multipart upload with bounded part concurrency.
+
+        A part is only read from the stream once an upload slot is free, and the
+        multipart upload is aborted if any part fails.
+        """
+        response = await asyncio.to_thread(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            ContentType=content_type,
+            Metadata=self._object_metadata(normalized_filename, sha256)
+        )
+        upload_id = response["UploadId"]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = []
+
+        async def upload_part(part_number: int, data: bytes) -> dict:
+            try:
+                part = await asyncio.to_thread(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=data
+                )
+                return {"PartNumber": part_number, "ETag": part["ETag"]}
+            finally:
+                semaphore.release()
+
+        try:
+            data = first_part
+            while data:
+                await semaphore.acquire()
+                # Stop reading as soon as a part has failed
+                for task in tasks:
+                    if task.done() and task.exception():
+                        semaphore.release()
+                        raise task.exception()
+                tasks.append(asyncio.ensure_future(upload_part(len(tasks) + 1, data)))
+                data = await read_exact(stream, part_size)
+
+            parts = await asyncio.gather(*tasks)
+            await asyncio.to_thread(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts}
+            )
+            logger.info(f"Multipart upload completed: {s3_key} ({len(parts)} parts)")
+
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.to_thread(
+                self.s3_client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id
+            )
+            logger.warning(f"Multipart upload aborted: {s3_key}")
+            raise e
+
+    def stored_sha256(self, s3_key: str) -> str:
+        """
+        Returns the content hash recorded on an S3 object, to check that it still holds a given content.
+
+        Args:
+            s3_key (str): The S3 key of the object.
+
+        Returns:
+            str or None: The hex SHA-256 from the object metadata, or None if the object no
+                longer exists or was stored without one.
+        """
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise e
+        return head.get("Metadata", {}).get("sha256")
+
+    def _object_metadata(self, normalized_filename: str, sha256: str = None) -> dict:
+        """Returns the user metadata stored on the main S3 object."""
+        metadata = {
+            "original_filename": normalized_filename,
+            "uploaded_at": datetime.utcnow().isoformat()
+        }
+        if sha256:
+            metadata["sha256"] = sha256
+        return metadata
+
+    def _put_metadata_json(self, normalized_filename: str, category: str = None) -> None:
+        """
+        Writes the `.metadata.json` sidecar used by Knowledge Bases for metadata filtering.
+
+        Args:
+            normalized_filename (str): The normalized name of the main file.
+            category (str, optional): The category to associate with the file.
+        """
+        metadata = {
+            "metadataAttributes": {
+                "category": category
+            }
+        }
+        json_key = f"{self.prefix}{normalized_filename}.metadata.json"
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=json_key,
+            Body=json.dumps(metadata),
+            ContentType="application/json"
+        )
+        logger.info(f"Metadata JSON uploaded: {json_key}")
+
+    def _upload_result(self, s3_key: str, normalized_filename: str) -> dict:
+        """Builds the upload result, including the file URL."""
+        file_url = f"https://{self.bucket_name}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
+        return {"s3_key": s3_key, "url": file_url, "filename": normalized_filename}
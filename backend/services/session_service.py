@@ -0,0 +1,270 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from config.settings import CHAT_SESSION_MAX_ENTRIES, CHAT_SESSION_TTL_SECONDS, CHAT_SESSION_HISTORY_TURNS, CHAT_SESSION_ANSWER_CHARS
+
+# Set up logger to track session activity
+logger = logging.getLogger(__name__)
+
+# Words opening a follow-up question ("and which of them...?", "what about Spanish?"), in English and Spanish
+FOLLOW_UP_OPENER = re.compile(
+    r"^\W*(and|also|what about|how about|y|tambi[eé]n|qu[eé] hay de)\b[\s,]*",
+    re.IGNORECASE
+)
+# Words a follow-up question can start with to point at the previous candidates ("those with AWS certs?")
+FOLLOW_UP_START = re.compile(
+    r"^\W*(those|these|the same|estos|estas|esos|esas|los mismos|las mismas)\b",
+    re.IGNORECASE
+)
+# Explicit references to the candidates of the previous answer ("which of them...", "¿cuáles de ellos...")
+FOLLOW_UP_REFERENCE = re.compile(
+    r"\b((of|among|from) (them|those|these)|the same (ones|candidates|people)|"
+    r"(de|entre) (ellos|ellas|estos|estas|esos|esas))\b",
+    re.IGNORECASE
+)
+# Longest question (in words) an opener or a leading "those" can make a follow-up of; longer
+# questions are standalone ("and who knows Python and has worked at Google for five years?")
+FOLLOW_UP_MAX_WORDS = 8
+# Citation block appended to the answers, left out of the history
+_CITATIONS_BLOCK = re.compile(r"\n+\*\*Citations:\*\*.*", re.DOTALL)
+
+def is_follow_up(query: str) -> bool:
+    """
+    Tells whether a question refers to the previous answer, e.g. "and which of them has AWS certs?".
+
+    Only explicit references count: "of them", "among those", "the same ones" anywhere in
+    the question, or a short question opening with a connective ("what about Spanish?") or
+    with "those"/"these". Possessives and pronouns alone ("Which candidates list their Java
+    skills?") start a new question.
+
+    Args:
+        query (str): The user query.
+
+    Returns:
+        bool: True if the question explicitly refers to the candidates of the previous answer.
+    """
+    if FOLLOW_UP_REFERENCE.search(query) is not None:
+        return True
+    short = len(query.split()) <= FOLLOW_UP_MAX_WORDS
+    return short and (FOLLOW_UP_OPENER.search(query) is not None or FOLLOW_UP_START.search(query) is not None)
+
+def strip_follow_up(query: str) -> str:
+    """
+    Removes the connective opening a follow-up question ("and which of them..." becomes
+    "which of them..."), so it is parsed like a standalone question.
+
+    Args:
+        query (str): The user query.
+
+    Returns:
+        str: The question without its opening connective.
+    """
+    return FOLLOW_UP_OPENER.sub("", query, count=1) or query
+
+def compact_answer(answer: str, max_chars: int = CHAT_SESSION_ANSWER_CHARS) -> str:
+    """
+    Shortens an answer for the session history: the citations block is dropped and the
+    text is cut to `max_chars` characters.
+
+    Args:
+        answer (str): The answer, as returned to the user.
+        max_chars (int): Maximum length of the compacted answer.
+
+    Returns:
+        str: The compacted answer.
+    """
+    answer = _CITATIONS_BLOCK.sub("", answer).strip()
+    return answer if len(answer) <= max_chars else answer[:max_chars].rstrip() + "..."
+
+class SessionStore:
+    """
+    A bounded, thread-safe store of chat sessions, keyed by session ID.
+
+    A session keeps what a follow-up question needs: the category filter, the last turns
+    (question and compacted answer), the retrieval candidates of the last retrieved
+    question and the sources cited by the last answer. Sessions expire `ttl_seconds`
+    after their last use and the least recently used one is evicted once `max_entries`
+    is reached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CHAT_SESSION_MAX_ENTRIES,
+        ttl_seconds: float = CHAT_SESSION_TTL_SECONDS,
+        history_turns: int = CHAT_SESSION_HISTORY_TURNS
+    ):
+        """
+        Initializes the store.
+
+        Args:
+            max_entries (int): Maximum number of sessions (0 disables sessions).
+            ttl_seconds (float): Idle time after which a session expires, in seconds.
+            history_turns (int): Number of turns kept in the history of a session (at least one).
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.history_turns = history_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.follow_ups = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def category_key(category: Union[str, List[str]] = None) -> Tuple[str, ...]:
+        """Returns the sorted, distinct categories of a category filter; empty means all of them."""
+        categories = [category] if isinstance(category, str) else category or []
+        return tuple(sorted(set(filter(None, categories))))
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """
+        Returns a session, if present and not expired.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            dict or None: The session (`categories`, `turns`, `results` and `sources`), or None.
+        """
+        if self.max_entries <= 0 or not session_id:
+            return None
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def follow_up(
+        self,
+        session_id: str,
+        query: str,
+        category: Union[str, List[str]] = None,
+        follow_up: bool = None
+    ) -> Optional[Dict]:
+        """
+        Returns the session a question follows up on: the question refers to the previous
+        answer and keeps the category filter of the session.
+
+        Args:
+            session_id (str): The session ID.
+            query (str): The user query.
+            category (str or list, optional): The category filter of the question.
+            follow_up (bool, optional): Whether the client marked the question as a follow-up;
+                None detects it from the wording (see `is_follow_up`).
+
+        Returns:
+            dict or None: The session, or None if the question starts a new topic.
+        """
+        session = self.get(session_id)
+        if follow_up is None:
+            follow_up = is_follow_up(query)
+        if session is None or not session["turns"] or not follow_up:
+            return None
+        if session["categories"] != self.category_key(category):
+            return None
+        with self._lock:
+            self.follow_ups += 1
+        return session
+
+    def record(
+        self,
+        session_id: str,
+        query: str,
+        category: Union[str, List[str]],
+        answer: str,
+        citations: List[Dict],
+        results: List[Dict] = None
+    ) -> None:
+        """
+        Records a turn of a session, creating the session if needed.
+
+        Args:
+            session_id (str): The session ID.
+            query (str): The user query.
+            category (str or list): The category filter of the question.
+            answer (str): The answer, as returned to the user.
+            citations (list): The citations of the answer; their sources are the candidates
+                a follow-up question refers to.
+            results (list, optional): The retrieval candidates a follow-up question can reuse
+                (None if the answer did not come from retrieval).
+        """
+        if self.max_entries <= 0 or not session_id:
+            return
+
+        categories = self.category_key(category)
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            previous = entry[1] if entry is not None and entry[1]["categories"] == categories else None
+            turns = (previous["turns"] if previous else []) + [(query, compact_answer(answer))]
+            session = {
+                "categories": categories,
+                "turns": turns[-max(self.history_turns, 1):],
+                "results": results,
+                "sources": [citation["source"] for citation in citations]
+            }
+            self._sessions[session_id] = (time.monotonic() + self.ttl_seconds, session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Removes a session.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            bool: True if the session existed.
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def clear(self) -> None:
+        """Removes every session and resets the counters."""
+        with self._lock:
+            self._sessions.clear()
+            self.follow_ups = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        """
+        Returns the session counters, used to size the store.
+
+        Returns:
+            dict: Size, capacity, TTL, follow-ups, evictions and expirations.
+        """
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "history_turns": self.history_turns,
+                "follow_ups": self.follow_ups,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+def format_history(session: Dict) -> str:
+    """
+    Formats the turns of a session for the prompt.
+
+    Args:
+        session (dict): The session.
+
+    Returns:
+        str: One "Question: ... / Answer: ..." pair per turn, oldest first.
+    """
+    return "\n\n".join(f"Question: {question}\nAnswer: {answer}" for question, answer in session["turns"])
+
+# Shared chat sessions
+chat_sessions = SessionStore()
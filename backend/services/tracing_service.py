@@ -0,0 +1,150 @@
+import contextvars
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import Dict
+
+# Header carrying the trace ID in requests (optional) and responses
+TRACE_ID_HEADER = "X-Trace-Id"
+# Accepted incoming trace IDs (anything else is replaced, so it cannot forge log lines)
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Log format with the trace ID of the request that emitted the line ("-" outside requests)
+TRACE_LOG_FORMAT = "%(asctime)s - %(levelname)s - [%(trace_id)s] %(name)s - %(message)s"
+
+# Trace ID of the request being handled
+trace_id_var = contextvars.ContextVar("trace_id", default="-")
+# Stage durations (ms) of the request being handled, filled by `track_stage`
+stage_timings_var = contextvars.ContextVar("stage_timings", default=None)
+# Stages of a request can run in worker threads at the same time (e.g., the retrievals of a
+# multi-category question), so the timings are read and updated under a lock
+_stage_timings_lock = threading.Lock()
+
+def new_trace_id() -> str:
+    """Returns a new random trace ID."""
+    return uuid.uuid4().hex[:16]
+
+def record_stage_timing(stage: str, seconds: float) -> None:
+    """
+    Adds the duration of a stage to the timings of the current request, if any.
+
+    A stage that runs several times in a request (e.g., every file of a bulk upload) is summed.
+
+    Args:
+        stage (str): The stage name.
+        seconds (float): The duration of the stage.
+    """
+    timings = stage_timings_var.get()
+    if timings is not None:
+        with _stage_timings_lock:
+            timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+def stage_timings() -> Dict[str, float]:
+    """
+    Returns a copy of the stage timings of the current request.
+
+    Returns:
+        dict: Stage durations in milliseconds (empty outside requests).
+    """
+    timings = stage_timings_var.get()
+    if timings is None:
+        return {}
+    with _stage_timings_lock:
+        return dict(timings)
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """
+    Formats stage timings as a `Server-Timing` header value, e.g. `retrieve;dur=12.3, generate;dur=512.0`.
+
+    Args:
+        timings (dict): Stage durations in milliseconds.
+
+    Returns:
+        str: The header value.
+    """
+    return ", ".join(f"{stage};dur={duration:.1f}" for stage, duration in timings.items())
+
+def stream_timing() -> Dict:
+    """
+    Returns the trace ID and stage timings of the current request, for the last event of a stream.
+
+    Returns:
+        dict: The `trace_id` and the `stages` durations in milliseconds.
+    """
+    timings = stage_timings()
+    return {"trace_id": trace_id_var.get(), "stages": {stage: round(duration, 1) for stage, duration in timings.items()}}
+
+def configure_trace_logging(level: int = logging.INFO) -> None:
+    """
+    Adds the current trace ID to every log record (as `trace_id`) and to the root log format.
+
+    Records are stamped when they are created, so this covers every logger, including
+    the ones of `retriever_service`, `s3_service` and `utils`.
+
+    Args:
+        level (int): The root log level.
+    """
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "adds_trace_id", False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.trace_id = trace_id_var.get()
+        return record
+
+    record_factory.adds_trace_id = True
+    logging.setLogRecordFactory(record_factory)
+
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(level=level)
+    root.setLevel(level)
+    for handler in root.handlers:
+        handler.setFormatter(logging.Formatter(TRACE_LOG_FORMAT))
+
+class TracingMiddleware:
+    """
+    ASGI middleware giving every HTTP request a trace ID and a stage timing breakdown.
+
+    The trace ID is taken from the `X-Trace-Id` request header, or generated. While the
+    request is handled, it is available to every log line and every stage timed with
+    `track_stage` is recorded. The response carries the trace ID and a `Server-Timing`
+    header with the stage durations and the total.
+
+    Headers are sent before the body, so a streamed response only lists the stages that
+    ran before it started; streams report their full breakdown in their last event.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id = headers.get(TRACE_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        if not TRACE_ID_PATTERN.match(trace_id):
+            trace_id = new_trace_id()
+        timings = {}
+        trace_token = trace_id_var.set(trace_id)
+        timings_token = stage_timings_var.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                server_timing = format_server_timing({**stage_timings(), "total": (time.perf_counter() - start) * 1000})
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER.lower().encode(), trace_id.encode("latin-1")),
+                    (b"server-timing", server_timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            stage_timings_var.reset(timings_token)
+            trace_id_var.reset(trace_token)
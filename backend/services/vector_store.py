@@ -0,0 +1,372 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from typing import Dict, Iterator, List, Tuple
+from config.settings import EMBEDDING_DIM, LOCAL_INDEX_DIR, RETRIEVER_TOP_K
+
+# Set up logger to track index activity
+logger = logging.getLogger(__name__)
+
+# File names inside a local index directory
+EMBEDDINGS_FILE = "embeddings.npy"
+CATEGORIES_FILE = "categories.npy"
+METADATA_FILE = "metadata.jsonl"
+INDEX_INFO_FILE = "index.json"
+DOCUMENT_EMBEDDINGS_FILE = "document_embeddings.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercase word tokens (keeping terms such as "c++" or "c#").
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The tokens, in order.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+class HashingEmbedder:
+    """
+    A local, dependency-free text embedder based on feature hashing.
+
+    Unigrams and bigrams are hashed into a fixed number of buckets with a signed
+    hash, weighted with a sublinear term frequency and L2-normalized, so that the
+    dot product of two embeddings is their cosine similarity. The hash (CRC32) is
+    stable across processes, so an index built once can be queried anywhere.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        """
+        Initializes the embedder.
+
+        Args:
+            dim (int): The number of hash buckets (embedding dimension).
+        """
+        self.dim = dim
+
+    def _features(self, text: str) -> Dict[int, float]:
+        tokens = tokenize(text)
+        features = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            bucket = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 == 0 else -1.0
+            features[bucket] = features.get(bucket, 0.0) + sign
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds a batch of texts.
+
+        Args:
+            texts (list): The texts to embed.
+
+        Returns:
+            np.ndarray: A float32 matrix of shape (len(texts), dim) with L2-normalized rows.
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in self._features(text).items():
+                if count:
+                    matrix[row, bucket] = math.copysign(1.0 + math.log(abs(count)), count)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+def iter_chunks(chunks_path: str) -> Iterator[Dict]:
+    """
+    Reads chunk records from a JSONL chunk file.
+
+    Each record holds at least `text`, `source` and `category`, and optionally `page`.
+
+    Args:
+        chunks_path (str): Path to the JSONL chunk file.
+
+    Yields:
+        dict: The next chunk record.
+    """
+    with open(chunks_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def build_local_index(chunks_path: str, index_dir: str = LOCAL_INDEX_DIR, dim: int = EMBEDDING_DIM, batch_size: int = 512) -> Dict:
+    """
+    Builds a local vector index from a JSONL chunk file.
+
+    Embeddings are written in batches into a memory-mapped `.npy` file, so memory use
+    is bounded by `batch_size` rather than by the size of the corpus (plus one row per
+    document for the document embeddings).
+
+    Every document (chunk `source`) also gets an embedding, the normalized mean of its
+    chunk embeddings, used to rank whole CVs. Documents are stored grouped by category,
+    so the documents of a category are one contiguous slice of the matrix.
+
+    Args:
+        chunks_path (str): Path to the JSONL chunk file.
+        index_dir (str): Directory where the index files are written.
+        dim (int): The embedding dimension.
+        batch_size (int): Number of chunks embedded at a time.
+
+    Returns:
+        dict: The index information (dimension, chunk and document counts, category names
+            and the document range of each category).
+    """
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        count = 0
+        document_ids = {}
+        for chunk in iter_chunks(chunks_path):
+            document_ids.setdefault(chunk.get("source", ""), len(document_ids))
+            count += 1
+        embedder = HashingEmbedder(dim)
+
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(index_dir, EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(count, dim)
+        )
+        category_codes = np.zeros(count, dtype=np.int32)
+        category_names = {}
+        document_sums = np.zeros((len(document_ids), dim), dtype=np.float32)
+        document_categories = np.zeros(len(document_ids), dtype=np.int32)
+
+        def flush(start, batch):
+            vectors = embedder.embed([chunk["text"] for chunk in batch])
+            embeddings[start:start + len(batch)] = vectors
+            np.add.at(document_sums, [document_ids[chunk.get("source", "")] for chunk in batch], vectors)
+
+        with open(os.path.join(index_dir, METADATA_FILE), "w", encoding="utf-8") as metadata_file:
+            batch, start = [], 0
+            for row, chunk in enumerate(iter_chunks(chunks_path)):
+                category = chunk.get("category") or "Uncategorized"
+                category_codes[row] = category_names.setdefault(category, len(category_names))
+                document_categories[document_ids[chunk.get("source", "")]] = category_codes[row]
+                metadata_file.write(json.dumps({
+                    "text": chunk["text"],
+                    "source": chunk.get("source", ""),
+                    "page": chunk.get("page", 0),
+                    "category": category
+                }) + "\n")
+
+                batch.append(chunk)
+                if len(batch) == batch_size:
+                    flush(start, batch)
+                    start += len(batch)
+                    batch = []
+            if batch:
+                flush(start, batch)
+
+        embeddings.flush()
+        del embeddings
+        np.save(os.path.join(index_dir, CATEGORIES_FILE), category_codes)
+        document_ranges = write_document_embeddings(index_dir, document_ids, document_sums, document_categories, category_names)
+
+        info = {
+            "dim": dim,
+            "count": count,
+            "categories": list(category_names),
+            "documents": len(document_ids),
+            "document_ranges": document_ranges
+        }
+        with open(os.path.join(index_dir, INDEX_INFO_FILE), "w", encoding="utf-8") as file:
+            json.dump(info, file)
+
+        logger.info(f"Local index built in '{index_dir}': {count} chunks, {len(category_names)} categories")
+        return info
+
+    except Exception as e:
+        logger.exception(f"Error building local index from '{chunks_path}'")
+        raise e
+
+def write_document_embeddings(
+    index_dir: str,
+    document_ids: Dict[str, int],
+    document_sums: np.ndarray,
+    document_categories: np.ndarray,
+    category_names: Dict[str, int]
+) -> Dict[str, List[int]]:
+    """
+    Writes the document embeddings and document list of a local index, grouped by category.
+
+    Args:
+        index_dir (str): Directory of the index.
+        document_ids (dict): Row of each document source in `document_sums`.
+        document_sums (np.ndarray): Sum of the chunk embeddings of each document.
+        document_categories (np.ndarray): Category code of each document.
+        category_names (dict): Code of each category name.
+
+    Returns:
+        dict: The `[start, end)` document range of each category.
+    """
+    norms = np.linalg.norm(document_sums, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    order = np.argsort(document_categories, kind="stable")
+    np.save(os.path.join(index_dir, DOCUMENT_EMBEDDINGS_FILE), (document_sums / norms)[order])
+
+    sources = list(document_ids)
+    names = list(category_names)
+    with open(os.path.join(index_dir, DOCUMENTS_FILE), "w", encoding="utf-8") as file:
+        for row in order:
+            file.write(json.dumps({"source": sources[row], "category": names[document_categories[row]]}) + "\n")
+
+    sorted_categories = document_categories[order]
+    return {
+        name: [int(np.searchsorted(sorted_categories, code)), int(np.searchsorted(sorted_categories, code, side="right"))]
+        for name, code in category_names.items()
+    }
+
+class LocalVectorStore:
+    """
+    An in-process vector store over a memory-mapped NumPy embedding matrix.
+
+    Search is a single vectorized matrix-vector product followed by a top-k
+    selection, with an optional filter on the `category` metadata column.
+    Results have the same shape as Amazon Knowledge Bases `retrievalResults`,
+    so they can be used in place of them.
+    """
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR):
+        """
+        Loads the index from disk. The embedding matrix is memory-mapped, not read into memory.
+
+        Args:
+            index_dir (str): Directory containing the index files.
+        """
+        with open(os.path.join(index_dir, INDEX_INFO_FILE), "r", encoding="utf-8") as file:
+            info = json.load(file)
+
+        self.index_dir = index_dir
+        self.embedder = HashingEmbedder(info["dim"])
+        self.embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        self.category_codes = np.load(os.path.join(index_dir, CATEGORIES_FILE))
+        self.category_ids = {name: code for code, name in enumerate(info["categories"])}
+        self.metadata = list(iter_chunks(os.path.join(index_dir, METADATA_FILE)))
+
+        # Document embeddings, for ranking whole CVs (indexes built before they existed have none)
+        self.document_ranges = info.get("document_ranges")
+        self.document_embeddings = None
+        self.documents = []
+        if self.document_ranges is not None:
+            self.document_embeddings = np.load(os.path.join(index_dir, DOCUMENT_EMBEDDINGS_FILE), mmap_mode="r")
+            self.documents = list(iter_chunks(os.path.join(index_dir, DOCUMENTS_FILE)))
+        logger.info(f"Local vector store loaded from '{index_dir}': {len(self.metadata)} chunks, {len(self.documents)} documents")
+
+    def search(self, query: str, category: str = None, top_k: int = RETRIEVER_TOP_K) -> List[Dict]:
+        """
+        Returns the chunks most similar to the query, by cosine similarity.
+
+        Args:
+            query (str): The search query.
+            category (str, optional): Only return chunks from this category.
+            top_k (int): Maximum number of results.
+
+        Returns:
+            list: Results shaped like Knowledge Bases `retrievalResults`, best first.
+        """
+        if len(self.metadata) == 0:
+            return []
+
+        scores = self._scores(query)
+        if category:
+            code = self.category_ids.get(category)
+            if code is None:
+                return []
+            scores = np.where(self.category_codes == code, scores, -np.inf)
+        return self._top_results(scores, top_k)
+
+    def search_categories(self, query: str, categories: List[str], top_k: int = RETRIEVER_TOP_K) -> Dict[str, List[Dict]]:
+        """
+        Returns the chunks most similar to the query in each of several categories.
+
+        The index is scored once for the query; only the top-k selection runs per category.
+
+        Args:
+            query (str): The search query.
+            categories (list): The categories to search.
+            top_k (int): Maximum number of results per category.
+
+        Returns:
+            dict: The results of each category, shaped like Knowledge Bases `retrievalResults`, best first.
+        """
+        if len(self.metadata) == 0:
+            return {category: [] for category in categories}
+
+        scores = self._scores(query)
+        results = {}
+        for category in categories:
+            code = self.category_ids.get(category)
+            results[category] = [] if code is None else self._top_results(
+                np.where(self.category_codes == code, scores, -np.inf), top_k
+            )
+        return results
+
+    def score_documents(self, text: str, category: str) -> Tuple[int, np.ndarray]:
+        """
+        Scores every document of a category against a text (e.g., a job description), by cosine similarity.
+
+        The documents of a category are a contiguous slice of the document embeddings, so this
+        is a single matrix-vector product over that slice, without copying it.
+
+        Args:
+            text (str): The text to compare the documents with.
+            category (str): The category whose documents are scored.
+
+        Returns:
+            tuple: The row of the first document of the category in `documents`, and the scores
+                of the documents of the category, in order.
+        """
+        if self.document_embeddings is None:
+            raise ValueError(f"The local index in '{self.index_dir}' has no document embeddings; rebuild it")
+        start, end = self.document_ranges.get(category, (0, 0))
+        return start, self.document_embeddings[start:end] @ self.embedder.embed([text])[0]
+
+    def _scores(self, query: str) -> np.ndarray:
+        # Cosine similarity of the query with every chunk (embeddings are L2-normalized)
+        return self.embeddings @ self.embedder.embed([query])[0]
+
+    def _top_results(self, scores: np.ndarray, top_k: int) -> List[Dict]:
+        # Select the top-k without sorting the whole score vector
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for row in top:
+            if not np.isfinite(scores[row]):
+                break
+            chunk = self.metadata[row]
+            results.append({
+                "content": {"text": chunk["text"]},
+                "metadata": {
+                    "x-amz-bedrock-kb-source-uri": chunk["source"],
+                    "x-amz-bedrock-kb-document-page-number": chunk["page"],
+                    "category": chunk["category"]
+                },
+                "score": float(scores[row])
+            })
+        return results
+
+_local_store = None
+_local_store_lock = threading.Lock()
+
+def get_local_vector_store() -> LocalVectorStore:
+    """
+    Returns the shared local vector store, loading it from `LOCAL_INDEX_DIR` on first use.
+
+    Returns:
+        LocalVectorStore: The shared store.
+    """
+    global _local_store
+    if _local_store is None:
+        with _local_store_lock:
+            if _local_store is None:
+                _local_store = LocalVectorStore(LOCAL_INDEX_DIR)
+    return _local_store
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the test environment is set before the app is imported
+_workdir = tempfile.mkdtemp(prefix="cv-assistant-tests-")
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SECURITY_TOKEN": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "test-bucket",
+    "S3_PREFIX": "uploads/test/",
+    "KNOWLEDGE_BASE_ID": "TESTKB",
+    # No data source: uploads do not schedule ingestion jobs
+    "KNOWLEDGE_BASE_DATA_SOURCE_ID": "",
+    "RETRIEVER_BACKEND": "bedrock",
+    "DEDUP_INDEX_PATH": os.path.join(_workdir, "dedup_index.sqlite3"),
+    # No field index: questions go through retrieval unless a test builds an index
+    "FIELD_INDEX_PATH": ""
+})
+
+import boto3
+import pytest
+from moto import mock_aws
+from services.aws_clients import clear_clients
+
+@pytest.fixture
+def s3():
+    """Runs the test against a moto S3 with the app's bucket, and returns an S3 client."""
+    with mock_aws():
+        # Shared clients created outside the mock must not be reused
+        clear_clients()
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=os.environ["S3_BUCKET_NAME"])
+        yield client
+    clear_clients()
+
+class AsyncBytesStream:
+    """An in-memory stream with the async `read(size)` of FastAPI's `UploadFile`."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        end = len(self.data) if size < 0 else self.position + size
+        chunk = self.data[self.position:end]
+        self.position += len(chunk)
+        return chunk
+
+    async def seek(self, position: int) -> None:
+        self.position = position
+
+@pytest.fixture
+def fake_bedrock(monkeypatch):
+    """Replaces the Bedrock clients of the chat pipeline with the offline fakes, with an empty answer cache."""
+    from services import retriever_service
+    from services.cache_service import query_cache
+    from services.fakes import FakeBedrockAgentRuntimeClient, FakeBedrockRuntimeClient
+
+    runtime = FakeBedrockRuntimeClient(latency=0, answer_tokens=20)
+    agent = FakeBedrockAgentRuntimeClient(latency=0, results=5, chunk_size=200, bucket="test-bucket")
+    monkeypatch.setattr(retriever_service, "bedrock_runtime_client", runtime)
+    monkeypatch.setattr(retriever_service, "bedrock_agent_client", agent)
+    query_cache.clear()
+    yield runtime, agent
+    query_cache.clear()
+
+@pytest.fixture
+def api(fake_bedrock):
+    """A test client of the app, with the fake Bedrock clients."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from config.settings import AWS_MAX_POOL_CONNECTIONS
+from services.aws_clients import clear_clients, get_client
+from utils.utils import generate_presigned_url
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    clear_clients()
+    yield
+    clear_clients()
+
+def test_clients_are_shared():
+    client = get_client("s3")
+    assert get_client("s3") is client
+    assert client.meta.config.max_pool_connections == AWS_MAX_POOL_CONNECTIONS
+
+def test_clients_are_keyed_by_service_region_and_arguments():
+    s3 = get_client("s3")
+    assert get_client("sts") is not s3
+    assert get_client("s3", "eu-west-1") is not s3
+    assert get_client("s3", "eu-west-1").meta.region_name == "eu-west-1"
+
+    explicit = get_client("s3", aws_access_key_id="a", aws_secret_access_key="b")
+    assert explicit is not s3
+    # The order of the arguments does not matter
+    assert get_client("s3", aws_secret_access_key="b", aws_access_key_id="a") is explicit
+
+def test_concurrent_first_calls_create_one_client():
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def call():
+        barrier.wait()
+        clients.append(get_client("s3"))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
+
+def test_cleared_clients_are_created_again():
+    client = get_client("s3")
+    clear_clients()
+    assert get_client("s3") is not client
+
+def test_presigned_urls_are_signed_by_the_given_client():
+    url = generate_presigned_url(get_client("s3"), "s3://test-bucket/uploads/test/cv.pdf", expiration=60)
+    assert url.startswith("https://test-bucket.s3.amazonaws.com/uploads/test/cv.pdf?")
+    assert "Expires=" in url or "X-Amz-Expires=60" in url
+
+def test_only_s3_uris_are_presigned():
+    assert generate_presigned_url(get_client("s3"), "local_index/cv.pdf") is None
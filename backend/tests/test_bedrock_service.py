@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from services.bedrock_service import AssumedRoleCredentialProvider, BedrockService
+
+class FakeStsClient:
+    """Returns credentials valid for `lifetime` seconds, numbered by call, after `latency` seconds."""
+
+    def __init__(self, lifetime: float = 3600, latency: float = 0.05):
+        self.lifetime = lifetime
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def assume_role(self, RoleArn: str, RoleSessionName: str) -> dict:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.latency)
+        return {"Credentials": {
+            "AccessKeyId": f"AKID{call}",
+            "SecretAccessKey": f"secret{call}",
+            "SessionToken": f"token{call}",
+            "Expiration": datetime.now(timezone.utc) + timedelta(seconds=self.lifetime)
+        }}
+
+def make_provider(sts: FakeStsClient) -> AssumedRoleCredentialProvider:
+    return AssumedRoleCredentialProvider(
+        sts, "arn:aws:iam::123456789012:role/kb", refresh_ahead_seconds=600, mandatory_refresh_seconds=60
+    )
+
+def expiring_in(seconds: float) -> dict:
+    return {
+        "access_key": "AKID0", "secret_key": "secret0", "token": "token0",
+        "expiry_time": (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+    }
+
+def call_concurrently(function, callers: int = 8) -> list:
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def call(i):
+        barrier.wait()
+        results[i] = function()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_callers_near_expiry_share_one_assume_role():
+    sts = FakeStsClient()
+    provider = make_provider(sts)
+    provider._credentials = expiring_in(30)
+
+    results = call_concurrently(provider.get_credentials)
+
+    assert sts.calls == 1
+    assert {credentials["access_key"] for credentials in results} == {"AKID1"}
+
+def test_first_concurrent_fetch_assumes_the_role_once():
+    sts = FakeStsClient()
+    results = call_concurrently(make_provider(sts).get_credentials)
+    assert sts.calls == 1
+    assert {credentials["access_key"] for credentials in results} == {"AKID1"}
+
+def test_credentials_about_to_expire_are_refreshed_in_the_background():
+    sts = FakeStsClient(latency=0.2)
+    provider = make_provider(sts)
+    provider._credentials = expiring_in(300)
+
+    # Callers get the current credentials without waiting for STS
+    results = call_concurrently(provider.get_credentials)
+    assert {credentials["access_key"] for credentials in results} == {"AKID0"}
+
+    deadline = time.monotonic() + 5
+    while provider._credentials["access_key"] == "AKID0" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sts.calls == 1
+    assert provider.get_credentials()["access_key"] == "AKID1"
+
+def test_fresh_credentials_are_reused():
+    sts = FakeStsClient()
+    provider = make_provider(sts)
+    for _ in range(5):
+        provider.get_credentials()
+    assert sts.calls == 1
+
+def test_bedrock_client_signs_with_the_assumed_role_credentials():
+    sts = FakeStsClient(latency=0)
+    service = BedrockService()
+    service.credential_provider = make_provider(sts)
+
+    client = service.get_bedrock_client()
+
+    assert service.get_bedrock_client() is client
+    assert client._get_credentials().get_frozen_credentials().access_key == "AKID1"
+    assert sts.calls == 1
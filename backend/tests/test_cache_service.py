@@ -0,0 +1,59 @@
+import time
+from services.cache_service import QueryCache, normalize_query
+
+def test_normalize_query_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_query("  Who knows   PYTHON?! ") == "who knows python"
+
+def test_key_ignores_category_order_and_duplicates():
+    assert QueryCache.make_key("Q", ["B", "A", "A"]) == QueryCache.make_key("q?", ["A", "B"])
+    assert QueryCache.make_key("q", "A") == QueryCache.make_key("q", ["A"])
+    assert QueryCache.make_key("q", None) == QueryCache.make_key("q", [])
+
+def test_get_returns_value_for_equivalent_query():
+    cache = QueryCache(max_entries=10, ttl_seconds=60)
+    cache.set("Who knows Python?", "Data Scientist", {"answer": "a"})
+    assert cache.get("who knows python", "Data Scientist") == {"answer": "a"}
+    assert cache.get("who knows python", "Legal Counsel") is None
+    assert cache.get("who knows python") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_entries_expire_after_ttl():
+    cache = QueryCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("q", None, {"answer": "a"})
+    time.sleep(0.02)
+    assert cache.get("q") is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", None, 1)
+    cache.set("b", None, 2)
+    cache.get("a")
+    cache.set("c", None, 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_zero_capacity_disables_the_cache():
+    cache = QueryCache(max_entries=0)
+    cache.set("q", None, 1)
+    assert cache.get("q") is None
+
+def test_invalidate_category_removes_matching_and_unfiltered_entries():
+    cache = QueryCache(max_entries=10, ttl_seconds=60)
+    cache.set("q", "Data Scientist", 1)
+    cache.set("q", ["Data Scientist", "Legal Counsel"], 2)
+    cache.set("q", "Legal Counsel", 3)
+    cache.set("q", None, 4)
+
+    assert cache.invalidate_category("Data Scientist") == 3
+    assert cache.get("q", "Legal Counsel") == 3
+    assert cache.get("q", "Data Scientist") is None
+    assert cache.get("q") is None
+
+def test_invalidate_without_category_clears_everything():
+    cache = QueryCache(max_entries=10, ttl_seconds=60)
+    cache.set("a", "A", 1)
+    cache.set("b", None, 2)
+    assert cache.invalidate_category() == 2
+    assert cache.stats()["size"] == 0
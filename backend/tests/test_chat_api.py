@@ -0,0 +1,78 @@
+import json
+
+def test_chat_without_category_or_session(api):
+    response = api.post("/api/chat", json={"message": "Who knows Python?"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["response"]
+    assert body["session_id"] is None
+
+def test_batch_accepts_items_without_category(api):
+    response = api.post("/api/chat/batch", json={"items": [
+        {"message": "Who knows Python?"},
+        {"message": "Who knows Java?", "category": "Data Scientist"}
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["category"] for result in results] == [None, "Data Scientist"]
+    assert all(result["response"] and result["error"] is None for result in results)
+
+def test_batch_reports_a_failing_question_in_its_own_result(api, fake_bedrock, monkeypatch):
+    runtime, _ = fake_bedrock
+    invoke_model = runtime.invoke_model
+
+    def failing_invoke_model(modelId, body, **kwargs):
+        if "Java" in body:
+            raise RuntimeError("model unavailable")
+        return invoke_model(modelId, body, **kwargs)
+
+    monkeypatch.setattr(runtime, "invoke_model", failing_invoke_model)
+    response = api.post("/api/chat/batch", json={"items": [{"message": "Who knows Python?"}, {"message": "Who knows Java?"}]})
+    assert response.status_code == 200
+    python, java = response.json()["results"]
+    assert python["response"] and python["error"] is None
+    assert java["response"] is None and "model unavailable" in java["error"]
+
+def stream_events(response) -> list:
+    """Splits a `text/event-stream` body into (event, data) pairs."""
+    events = []
+    for message in response.text.strip().split("\n\n"):
+        event, data = message.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_stream_sends_tokens_then_citations_then_timing(api, fake_bedrock):
+    response = api.post("/api/chat/stream", json={"message": "Who knows Python?", "category": "Data Scientist"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = stream_events(response)
+    names = [event for event, _ in events]
+    tokens = names.count("token")
+    assert tokens == fake_bedrock[0].answer_tokens
+    assert names == ["token"] * tokens + ["citations", "timing"]
+    citations, timing = events[-2][1], events[-1][1]
+    assert citations["citations"]
+    assert timing["trace_id"] == response.headers["x-trace-id"]
+
+def test_stream_reports_a_mid_stream_failure_as_an_error_event(api, fake_bedrock, monkeypatch):
+    runtime, _ = fake_bedrock
+    stream = runtime.invoke_model_with_response_stream
+
+    def failing_stream(modelId, body, **kwargs):
+        response = stream(modelId, body, **kwargs)
+        events = response["body"]
+
+        def interrupted():
+            yield next(events)
+            raise RuntimeError("stream interrupted")
+
+        return {**response, "body": interrupted()}
+
+    monkeypatch.setattr(runtime, "invoke_model_with_response_stream", failing_stream)
+    response = api.post("/api/chat/stream", json={"message": "Who knows Go?"})
+    assert response.status_code == 200
+
+    events = stream_events(response)
+    assert [event for event, _ in events] == ["token", "error"]
+    assert "stream interrupted" in events[-1][1]["detail"]
@@ -0,0 +1,62 @@
+from services.context_builder import build_context, estimate_tokens
+
+def result(text: str, source: str, score: float) -> dict:
+    return {"content": {"text": text}, "metadata": {"x-amz-bedrock-kb-source-uri": source}, "score": score}
+
+SENTENCE = "Senior data scientist with eight years of Python, SQL and machine learning experience in retail"
+
+def test_tokens_are_estimated_at_four_characters_each():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+def test_chunks_are_kept_best_score_first_within_the_budget():
+    built = build_context([
+        result("a" * 40, "s3://b/low.pdf", 0.2),
+        result("b" * 40, "s3://b/high.pdf", 0.9),
+        result("c" * 40, "s3://b/mid.pdf", 0.5)
+    ], token_budget=20)
+
+    assert [item["score"] for item in built["results"]] == [0.9, 0.5]
+    assert built["context"] == "b" * 40 + "\n\n" + "c" * 40
+    assert (built["chunks_kept"], built["tokens_kept"]) == (2, 20)
+    assert (built["chunks_dropped"], built["tokens_dropped"], built["duplicates"]) == (1, 10, 0)
+
+def test_a_smaller_chunk_further_down_can_still_fit():
+    built = build_context([
+        result("a" * 40, "s3://b/a.pdf", 0.9),
+        result("b" * 80, "s3://b/b.pdf", 0.8),
+        result("c" * 20, "s3://b/c.pdf", 0.7)
+    ], token_budget=16)
+
+    assert [item["metadata"]["x-amz-bedrock-kb-source-uri"] for item in built["results"]] == ["s3://b/a.pdf", "s3://b/c.pdf"]
+    assert built["tokens_kept"] == 15 and built["tokens_dropped"] == 20
+
+def test_overlapping_chunks_of_the_same_source_are_dropped():
+    built = build_context([
+        result(SENTENCE, "s3://b/ana.pdf", 0.9),
+        # The same chunk with a few more words, as consecutive overlapping chunks come back
+        result(SENTENCE + " and retail forecasting", "s3://b/ana.pdf", 0.8),
+        result("  ", "s3://b/ana.pdf", 0.7)
+    ])
+
+    assert built["chunks_kept"] == 1
+    assert built["duplicates"] == 2
+    assert built["chunks_dropped"] == 2
+    assert built["tokens_dropped"] == estimate_tokens(SENTENCE + " and retail forecasting")
+
+def test_the_same_text_from_another_source_is_kept():
+    built = build_context([result(SENTENCE, "s3://b/ana.pdf", 0.9), result(SENTENCE, "s3://b/ben.pdf", 0.8)])
+    assert built["chunks_kept"] == 2 and built["duplicates"] == 0
+
+def test_partial_overlap_below_the_threshold_is_kept():
+    other = "Led the legal review of supplier contracts and GDPR compliance programs for retail clients"
+    half = " ".join(SENTENCE.split()[:8] + other.split()[:8])
+    built = build_context([result(SENTENCE, "s3://b/ana.pdf", 0.9), result(half, "s3://b/ana.pdf", 0.8)], overlap_threshold=0.8)
+    assert built["chunks_kept"] == 2
+
+def test_no_results():
+    assert build_context([]) == {
+        "context": "", "results": [], "tokens_kept": 0, "tokens_dropped": 0,
+        "chunks_kept": 0, "chunks_dropped": 0, "duplicates": 0
+    }
@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from io import BytesIO
+import pytest
+from PIL import Image
+import generator_cvs_ia
+from generator_cvs_ia import RateLimiter, build_photo_pool, call_with_retry, generate_cvs_batch, load_manifest
+
+PROFILES = [
+    {"name": "Ana Ruiz", "gender": "female", "role": "Security Engineer", "level": "Senior"},
+    {"name": "Ben Stone", "gender": "male", "role": "Data Scientist", "level": "Junior"},
+    {"name": "Cleo Park", "gender": "female", "role": "Legal Counsel", "level": "Lead"}
+]
+
+def photo_bytes(number: int) -> bytes:
+    """A distinct 150x150 PNG per number, standing in for a downloaded photo."""
+    buffer = BytesIO()
+    Image.new("RGB", (150, 150), (number % 256, 80, 160)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+class CountingLimiter:
+    """Stands in for `RateLimiter`, counting the waits instead of sleeping."""
+
+    def __init__(self, requests_per_second):
+        self.requests_per_second = requests_per_second
+        self.waits = 0
+
+    def wait(self):
+        self.waits += 1
+
+@pytest.fixture
+def limiters(monkeypatch):
+    created = []
+
+    def make_limiter(requests_per_second):
+        created.append(CountingLimiter(requests_per_second))
+        return created[-1]
+
+    monkeypatch.setattr(generator_cvs_ia, "RateLimiter", make_limiter)
+    return created
+
+def pool_photos(pool_dir) -> list:
+    with open(pool_dir / generator_cvs_ia.PHOTO_POOL_INDEX, encoding="utf-8") as f:
+        return json.load(f)["photos"]
+
+def test_fetched_pool_photos_are_rate_limited(tmp_path, monkeypatch, limiters):
+    monkeypatch.setattr(generator_cvs_ia, "download_ai_photo_bytes", photo_bytes)
+
+    assert build_photo_pool(tmp_path, size=4, fetch=True, workers=2, requests_per_second=5) == 4
+    assert len(pool_photos(tmp_path)) == 4
+    assert [limiter.requests_per_second for limiter in limiters] == [5]
+    assert limiters[0].waits == 4
+
+def test_photos_that_cannot_be_fetched_are_left_out_of_the_pool(tmp_path, monkeypatch, limiters):
+    def download(number):
+        if number % 2:
+            raise ConnectionError("photo API unavailable")
+        return photo_bytes(number)
+
+    monkeypatch.setattr(generator_cvs_ia, "download_ai_photo_bytes", download)
+    monkeypatch.setattr(generator_cvs_ia.time, "sleep", lambda seconds: None)
+    assert build_photo_pool(tmp_path, size=4, fetch=True, retries=1) == 2
+    # Failed photos are retried, then skipped rather than replaced with a placeholder
+    assert limiters[0].waits == 2 + 2 * 2
+    assert len(pool_photos(tmp_path)) == 2
+
+def test_pool_build_fails_when_no_photo_can_be_fetched(tmp_path, monkeypatch, limiters):
+    def download(number):
+        raise ConnectionError("photo API unavailable")
+
+    monkeypatch.setattr(generator_cvs_ia, "download_ai_photo_bytes", download)
+    monkeypatch.setattr(generator_cvs_ia.time, "sleep", lambda seconds: None)
+    with pytest.raises(RuntimeError):
+        build_photo_pool(tmp_path, size=3, fetch=True, retries=0)
+    assert not (tmp_path / generator_cvs_ia.PHOTO_POOL_INDEX).exists()
+
+def test_rendered_pool_needs_no_network(tmp_path, monkeypatch):
+    def download(number):
+        raise AssertionError("the avatar pool must not fetch photos")
+
+    monkeypatch.setattr(generator_cvs_ia, "download_ai_photo_bytes", download)
+    assert build_photo_pool(tmp_path, size=5, seed=1) == 5
+
+def test_rate_limiter_spaces_concurrent_calls():
+    limiter = RateLimiter(20)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.wait) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The first call goes right away, the next three are 50 ms apart
+    assert time.monotonic() - start >= 0.14
+
+def test_rate_limiter_without_a_rate_does_not_wait():
+    limiter = RateLimiter(0)
+    start = time.monotonic()
+    for _ in range(100):
+        limiter.wait()
+    assert time.monotonic() - start < 0.05
+
+def test_failed_calls_are_retried_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(generator_cvs_ia.time, "sleep", delays.append)
+    limiter = CountingLimiter(1)
+    attempts = []
+
+    def flaky(value):
+        attempts.append(value)
+        if len(attempts) < 3:
+            raise ConnectionError("throttled")
+        return value * 2
+
+    assert call_with_retry(flaky, 21, retries=3, backoff=0.5, limiter=limiter) == 42
+    assert len(attempts) == 3 and limiter.waits == 3
+    # Exponential backoff with up to 100% jitter
+    assert 0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0
+
+def test_the_last_error_is_raised_once_the_retries_are_spent(monkeypatch):
+    monkeypatch.setattr(generator_cvs_ia.time, "sleep", lambda seconds: None)
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        call_with_retry(failing, retries=2)
+    assert len(attempts) == 3
+
+class FakeNova:
+    """Stands in for `generate_cv_content_with_nova`, counting calls and failing for the given names."""
+
+    def __init__(self, failing_names=()):
+        self.failing_names = set(failing_names)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, profile, language="en"):
+        with self._lock:
+            self.calls.append(profile["name"])
+        if profile["name"] in self.failing_names:
+            raise RuntimeError(f"Nova failed for {profile['name']}")
+        return {"name": profile["name"], "summary": f"{profile['level']} {profile['role']}",
+                "skills": ["Python", "AWS"], "experience": [{"position": profile["role"], "company": "Tesla",
+                "start": "2018", "end": "Present", "description": ["Led audits", "Built tooling"]}]}
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """Runs batch generation in a temporary folder, with Nova and the photos stubbed."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "profiles.json").write_text(json.dumps(PROFILES), encoding="utf-8")
+    nova = FakeNova()
+    monkeypatch.setattr(generator_cvs_ia, "generate_cv_content_with_nova", nova)
+    photo_path = tmp_path / "photo.png"
+    photo_path.write_bytes(photo_bytes(1))
+    monkeypatch.setattr(generator_cvs_ia, "generate_ai_photo", lambda cv_number, seed=0, limiter=None: str(photo_path))
+    monkeypatch.setattr(generator_cvs_ia, "generate_ai_photo_bytes", lambda cv_number, seed=0, limiter=None: photo_bytes(cv_number))
+    return nova
+
+def run_batch(**options):
+    defaults = {"count": 3, "pipelined": True, "workers": 2, "pdf_workers": 1, "requests_per_second": 0,
+                "retries": 0, "manifest_path": "generated_cvs/manifest.jsonl"}
+    generate_cvs_batch(**{**defaults, **options})
+    return load_manifest("generated_cvs/manifest.jsonl")
+
+def test_pipelined_batch_renders_every_cv(batch):
+    manifest = run_batch()
+
+    assert sorted(batch.calls) == sorted(profile["name"] for profile in PROFILES)
+    assert sorted(manifest) == [1, 2, 3]
+    for index, record in manifest.items():
+        assert record["status"] == "done"
+        assert record["pdf_path"] == f"generated_cvs/CV_{index:03d}_{PROFILES[index - 1]['name'].replace(' ', '_')}.pdf"
+        with open(record["pdf_path"], "rb") as f:
+            assert f.read(4) == b"%PDF"
+        assert record["cv_data"]["experience"][0]["description"] == "• Led audits\n• Built tooling"
+
+def test_a_failing_cv_does_not_stop_the_pipelined_batch(batch):
+    batch.failing_names = {"Ben Stone"}
+    manifest = run_batch()
+
+    assert {index: record["status"] for index, record in manifest.items()} == {1: "done", 2: "failed", 3: "done"}
+    assert "Nova failed for Ben Stone" in manifest[2]["error"]
+    assert not any(name.startswith("CV_002") for name in os.listdir("generated_cvs"))
+
+def test_a_fresh_run_regenerates_every_cv(batch):
+    run_batch()
+    run_batch(pipelined=False)
+    assert len(batch.calls) == 6
+
+def test_resume_skips_done_cvs_and_reuses_the_recorded_content(batch):
+    first = run_batch()
+    os.remove(first[3]["pdf_path"])
+
+    manifest = run_batch(resume=True)
+
+    # CVs 1 and 2 are skipped; CV 3 is rendered again from its recorded content without calling Nova
+    assert len(batch.calls) == 3
+    assert manifest[3]["status"] == "done" and os.path.exists(manifest[3]["pdf_path"])
+    with open("generated_cvs/manifest.jsonl", encoding="utf-8") as f:
+        indexes = [json.loads(line)["index"] for line in f]
+    # Two records (content, done) per CV in the first run, and two more for CV 3 only
+    assert indexes.count(1) == indexes.count(2) == 2 and indexes.count(3) == 4
+
+def test_retry_failures_only_processes_the_failed_cvs(batch):
+    batch.failing_names = {"Ben Stone"}
+    run_batch(pipelined=False)
+    assert load_manifest("generated_cvs/manifest.jsonl")[2]["status"] == "failed"
+
+    batch.failing_names = set()
+    batch.calls.clear()
+    manifest = run_batch(retry_failures_only=True)
+
+    assert batch.calls == ["Ben Stone"]
+    assert {record["status"] for record in manifest.values()} == {"done"}
+    assert manifest[2]["error"] is None
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_cvs_are_uploaded_in_memory_under_their_role(batch, s3, pipelined):
+    manifest = run_batch(pipelined=pipelined, upload_to_s3=True)
+
+    assert os.listdir("generated_cvs") == ["manifest.jsonl"]
+    for index, profile in enumerate(PROFILES, 1):
+        record = manifest[index]
+        key = f"uploads/test/cv_{index:03d}_{profile['name'].lower().replace(' ', '_')}.pdf"
+        assert record["status"] == "done" and record["s3_key"] == key
+        assert s3.get_object(Bucket="test-bucket", Key=key)["Body"].read(4) == b"%PDF"
+        sidecar = json.loads(s3.get_object(Bucket="test-bucket", Key=f"{key}.metadata.json")["Body"].read())
+        assert sidecar == {"metadataAttributes": {"category": profile["role"]}}
+
+def test_resumed_upload_skips_the_cvs_already_uploaded(batch, s3):
+    batch.failing_names = {"Cleo Park"}
+    run_batch(upload_to_s3=True)
+    batch.failing_names = set()
+
+    manifest = run_batch(upload_to_s3=True, resume=True)
+
+    assert batch.calls.count("Ana Ruiz") == 1 and batch.calls.count("Cleo Park") == 2
+    assert manifest[3]["status"] == "done"
+    assert len(s3.list_objects_v2(Bucket="test-bucket")["Contents"]) == 6
@@ -0,0 +1,120 @@
+import asyncio
+from services.bedrock_service import BedrockService
+from services.fakes import FakeBedrockAgentClient
+from services.ingestion_scheduler import IngestionScheduler
+
+DATA_SOURCE = "DS1"
+
+def make_scheduler(client: FakeBedrockAgentClient) -> IngestionScheduler:
+    return IngestionScheduler(
+        bedrock_service=BedrockService(client=client),
+        knowledge_base_id="TESTKB",
+        debounce_seconds=0.05,
+        max_delay_seconds=0.5,
+        poll_seconds=0.01
+    )
+
+async def wait_idle(scheduler: IngestionScheduler, timeout: float = 5.0) -> None:
+    task = scheduler._state(DATA_SOURCE)["task"]
+    await asyncio.wait_for(task, timeout)
+
+def test_burst_of_uploads_starts_a_single_job():
+    client = FakeBedrockAgentClient(job_duration=0.05)
+    scheduler = make_scheduler(client)
+
+    async def scenario():
+        for category in ("A", "B", "A"):
+            scheduler.mark_dirty([category], DATA_SOURCE)
+            await asyncio.sleep(0.01)
+        await wait_idle(scheduler)
+
+    asyncio.run(scenario())
+    status = scheduler.status()[DATA_SOURCE]
+    assert len(client.started_jobs) == 1
+    assert status["state"] == "idle"
+    assert status["last_job"]["status"] == "COMPLETE"
+    assert status["last_job"]["categories"] == ["A", "B"]
+
+def test_uploads_during_a_job_get_one_follow_up_job():
+    client = FakeBedrockAgentClient(job_duration=0.2)
+    scheduler = make_scheduler(client)
+
+    async def scenario():
+        scheduler.mark_dirty(["A"], DATA_SOURCE)
+        # Wait for the first job to start, then upload while it runs
+        while not client.started_jobs:
+            await asyncio.sleep(0.01)
+        for _ in range(3):
+            scheduler.mark_dirty(["B"], DATA_SOURCE)
+            await asyncio.sleep(0.01)
+        await wait_idle(scheduler)
+
+    asyncio.run(scenario())
+    # The fake raises if a job starts while another runs on the same data source
+    assert len(client.started_jobs) == 2
+    assert scheduler.status()[DATA_SOURCE]["last_job"]["categories"] == ["B"]
+    assert scheduler.status()[DATA_SOURCE]["last_error"] is None
+
+def test_no_data_source_schedules_nothing():
+    scheduler = make_scheduler(FakeBedrockAgentClient())
+
+    async def scenario():
+        return scheduler.mark_dirty(["A"], "")
+
+    assert asyncio.run(scenario()) is False
+    assert scheduler.status() == {}
+
+def test_failed_status_poll_clears_the_current_job():
+    client = FakeBedrockAgentClient(job_duration=0.05)
+    scheduler = make_scheduler(client)
+    get_ingestion_job = client.get_ingestion_job
+    polls = []
+
+    def failing_first_poll(**kwargs):
+        polls.append(kwargs["ingestionJobId"])
+        if len(polls) == 1:
+            raise RuntimeError("throttled")
+        return get_ingestion_job(**kwargs)
+
+    client.get_ingestion_job = failing_first_poll
+
+    async def scenario():
+        scheduler.mark_dirty(["A"], DATA_SOURCE)
+        await wait_idle(scheduler)
+        failed = scheduler.status()[DATA_SOURCE]
+        # Let the first job finish on the service, then upload again
+        await asyncio.sleep(0.1)
+        scheduler.mark_dirty(["B"], DATA_SOURCE)
+        await wait_idle(scheduler)
+        return failed
+
+    failed = asyncio.run(scenario())
+    assert failed["current_job"] is None
+    assert failed["last_job"]["error"] == "throttled"
+    assert failed["last_error"] == "throttled"
+    assert failed["pending_categories"] == ["A"]
+
+    status = scheduler.status()[DATA_SOURCE]
+    assert len(client.started_jobs) == 2
+    assert status["current_job"] is None
+    assert status["last_job"]["status"] == "COMPLETE"
+    assert status["last_job"]["categories"] == ["A", "B"]
+
+def test_cached_answers_are_invalidated_when_the_job_completes():
+    from services.cache_service import query_cache
+    client = FakeBedrockAgentClient(job_duration=0.1)
+    scheduler = make_scheduler(client)
+    query_cache.clear()
+    query_cache.set("Who knows Python?", "A", {"answer": "cached"})
+
+    async def scenario():
+        scheduler.mark_dirty(["A"], DATA_SOURCE)
+        while not client.started_jobs:
+            await asyncio.sleep(0.01)
+        # The new documents are not indexed yet, so starting the job keeps the cached answers
+        cached_while_running = query_cache.get("Who knows Python?", "A")
+        await wait_idle(scheduler)
+        return cached_while_running
+
+    assert asyncio.run(scenario()) == {"answer": "cached"}
+    assert query_cache.get("Who knows Python?", "A") is None
@@ -0,0 +1,85 @@
+import json
+import pytest
+from services.field_index import iter_field_records
+from services.ingestion_service import _process_file_safe, chunk_text, process_file, read_sidecar_category, run_ingestion
+
+TEXT = " ".join(f"word{i:03d}" for i in range(200))
+
+def write_document(path, text: str, category: str = None) -> str:
+    path.write_text(text, encoding="utf-8")
+    if category:
+        (path.parent / f"{path.name}.metadata.json").write_text(json.dumps({"metadataAttributes": {"category": category}}))
+    return str(path)
+
+def test_chunks_stay_within_the_size_and_cut_no_words():
+    words = set(TEXT.split())
+    chunks = chunk_text(TEXT, chunk_size=100, overlap=20)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(set(chunk.split()) <= words for chunk in chunks)
+    # Every word of the text is in some chunk
+    assert set().union(*(chunk.split() for chunk in chunks)) == words
+
+def test_consecutive_chunks_overlap():
+    chunks = chunk_text(TEXT, chunk_size=100, overlap=20)
+    for previous, following in zip(chunks, chunks[1:]):
+        assert following.split()[0] in previous.split()[-3:]
+
+def test_chunks_without_overlap_partition_the_text():
+    chunks = chunk_text(TEXT, chunk_size=100, overlap=0)
+    assert " ".join(chunks).split() == TEXT.split()
+
+def test_short_and_empty_texts():
+    assert chunk_text("  Python   developer \t ", chunk_size=100, overlap=20) == ["Python developer"]
+    assert chunk_text("", chunk_size=100, overlap=20) == []
+
+def test_overlap_must_be_smaller_than_the_chunk_size():
+    with pytest.raises(ValueError):
+        chunk_text(TEXT, chunk_size=50, overlap=50)
+
+def test_sidecar_category_wins_over_the_default(tmp_path):
+    with_sidecar = write_document(tmp_path / "ana.txt", "Python developer", "Data Scientist")
+    without_sidecar = write_document(tmp_path / "ben.txt", "Contract lawyer")
+
+    assert read_sidecar_category(with_sidecar) == "Data Scientist"
+    assert read_sidecar_category(without_sidecar) is None
+    assert process_file(with_sidecar, category="Legal Counsel")[0]["category"] == "Data Scientist"
+    assert process_file(without_sidecar, category="Legal Counsel")[0]["category"] == "Legal Counsel"
+    assert process_file(without_sidecar)[0]["category"] == "Uncategorized"
+
+def test_chunks_keep_their_page_and_never_span_pages(tmp_path):
+    path = write_document(tmp_path / "cv.txt", "First page\fSecond page")
+    records = process_file(path, chunk_size=100, overlap=10)
+    assert [(record["page"], record["chunk_index"], record["text"]) for record in records] == [
+        (1, 0, "First page"), (2, 1, "Second page")
+    ]
+
+def test_a_bad_file_returns_its_error():
+    path, records, fields, error = _process_file_safe("missing.pdf", None, 100, 10, parse_fields=True)
+    assert (path, records, fields) == ("missing.pdf", [], None)
+    assert error
+
+def test_ingestion_skips_bad_files_and_writes_chunks_and_fields(tmp_path):
+    documents = tmp_path / "cvs"
+    (documents / "nested").mkdir(parents=True)
+    write_document(documents / "ana.txt", "Ana Ruiz\nPROFESSIONAL SUMMARY\n" + TEXT + "\nSKILLS\nPython • SQL", "Data Scientist")
+    write_document(documents / "nested" / "ben.txt", "Ben Stone\nSKILLS\nContract law")
+    (documents / "broken.pdf").write_bytes(b"not a pdf")
+    (documents / "notes.md").write_text("ignored")
+    output = tmp_path / "chunks.jsonl"
+    fields = tmp_path / "fields.jsonl"
+
+    stats = run_ingestion(str(documents), str(output), category="Legal Counsel", workers=2,
+                          chunk_size=200, overlap=20, field_index_path=str(fields))
+
+    assert stats["documents"] == 2
+    assert stats["failed"] == [str(documents / "broken.pdf")]
+    chunks = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert stats["chunks"] == len(chunks) > 2
+    assert {chunk["category"] for chunk in chunks if chunk["source"].endswith("ana.txt")} == {"Data Scientist"}
+    assert {chunk["category"] for chunk in chunks if chunk["source"].endswith("ben.txt")} == {"Legal Counsel"}
+    records = {record["name"]: record for record in iter_field_records(str(fields))}
+    assert set(records) == {"Ana Ruiz", "Ben Stone"}
+    assert records["Ana Ruiz"]["skills"] == ["Python", "SQL"]
+    assert records["Ben Stone"]["category"] == "Legal Counsel"
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import pytest
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from services.metrics_service import timed, track_stage
+from services.tracing_service import stage_timings, stage_timings_var
+
+def stage_count(pipeline: str, stage: str) -> float:
+    return REGISTRY.get_sample_value("cv_assistant_stage_duration_seconds_count", {"pipeline": pipeline, "stage": stage}) or 0.0
+
+def stage_errors(pipeline: str, stage: str) -> float:
+    return REGISTRY.get_sample_value("cv_assistant_stage_errors_total", {"pipeline": pipeline, "stage": stage}) or 0.0
+
+def in_flight(pipeline: str, stage: str) -> float:
+    return REGISTRY.get_sample_value("cv_assistant_stage_in_flight", {"pipeline": pipeline, "stage": stage}) or 0.0
+
+def test_tracked_stage_is_observed_and_added_to_the_request_timings():
+    def request():
+        stage_timings_var.set({})
+        with track_stage("test_track", "work"):
+            assert in_flight("test_track", "work") == 1
+        return stage_timings()
+
+    timings = contextvars.copy_context().run(request)
+    assert stage_count("test_track", "work") == 1
+    assert in_flight("test_track", "work") == 0
+    assert set(timings) == {"work"}
+
+def test_errors_are_counted_and_raised():
+    with pytest.raises(ValueError):
+        with track_stage("test_errors", "work"):
+            raise ValueError("boom")
+    assert stage_count("test_errors", "work") == 1
+    assert stage_errors("test_errors", "work") == 1
+    assert in_flight("test_errors", "work") == 0
+
+def test_timed_function():
+    @timed("test_timed", "sync")
+    def add(a, b):
+        return a + b
+
+    assert add(2, 3) == 5
+    assert add.__name__ == "add"
+    assert stage_count("test_timed", "sync") == 1
+
+def test_timed_coroutine():
+    @timed("test_timed", "coroutine")
+    async def double(value):
+        await asyncio.sleep(0)
+        return value * 2
+
+    assert asyncio.run(double(21)) == 42
+    assert stage_count("test_timed", "coroutine") == 1
+
+def test_timed_async_generator_spans_the_whole_iteration():
+    @timed("test_timed", "generator")
+    async def numbers(count):
+        for number in range(count):
+            # The stage stays in flight until the generator is exhausted
+            assert in_flight("test_timed", "generator") == 1
+            yield number
+
+    async def consume():
+        return [number async for number in numbers(3)]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert stage_count("test_timed", "generator") == 1
+    assert in_flight("test_timed", "generator") == 0
+
+def test_closing_a_timed_async_generator_early_is_not_an_error():
+    @timed("test_timed", "closed")
+    async def numbers():
+        for number in range(10):
+            yield number
+
+    async def take_one():
+        generator = numbers()
+        first = await generator.__anext__()
+        await generator.aclose()
+        return first
+
+    assert asyncio.run(take_one()) == 0
+    assert stage_count("test_timed", "closed") == 1
+    assert stage_errors("test_timed", "closed") == 0
+    assert in_flight("test_timed", "closed") == 0
+
+def test_metrics_endpoint_exposes_the_chat_stage_histograms(api):
+    before = {stage: stage_count("chat", stage) for stage in ("retrieve", "generate")}
+    rag_routes = REGISTRY.get_sample_value("cv_assistant_query_routes_total", {"route": "rag"}) or 0.0
+    assert api.post("/api/chat", json={"message": "Who knows Kubernetes?", "category": "Data Scientist"}).status_code == 200
+
+    response = api.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+    for stage in ("retrieve", "generate"):
+        labels = (("pipeline", "chat"), ("stage", stage))
+        assert samples[("cv_assistant_stage_duration_seconds_count", labels)] == before[stage] + 1
+    assert samples[("cv_assistant_query_routes_total", (("route", "rag"),))] == rag_routes + 1
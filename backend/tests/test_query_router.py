@@ -0,0 +1,51 @@
+import pytest
+from services import query_router
+from services.field_index import FieldIndex
+from services.query_router import route_query
+
+RECORDS = [
+    {
+        "source": "s3://test-bucket/uploads/test/ana.pdf", "name": "Ana Ruiz", "category": "Security Engineer",
+        "skills": ["Python", "AWS"], "certifications": ["Certified Information Systems Security Professional (CISSP)"],
+        "languages": {"Spanish": "Native", "English": "Fluent (C1)"}, "positions": ["Security Engineer"],
+        "education": [], "years_experience": 8
+    },
+    {
+        "source": "s3://test-bucket/uploads/test/ben.pdf", "name": "Ben Stone", "category": "Data Scientist",
+        "skills": ["Python", "SQL"], "certifications": [],
+        "languages": {"English": "Native", "Spanish": "Basic (A2)"}, "positions": ["Data Scientist"],
+        "education": [], "years_experience": 3
+    }
+]
+
+@pytest.fixture(autouse=True)
+def field_index(monkeypatch):
+    monkeypatch.setattr(query_router, "get_field_index", lambda: FieldIndex(RECORDS))
+
+@pytest.mark.parametrize("query, count", [
+    ("Which Security Engineers hold CISSP?", 1),
+    ("Who knows Python?", 2),
+    ("How many candidates speak Spanish fluently?", 1),
+    ("Who knows SQL or AWS?", 2),
+    ("Which candidates have more than 5 years of experience?", 1),
+    ("Who has worked as a Data Scientist?", 1)
+])
+def test_field_questions_are_answered_from_the_index(query, count):
+    routed = route_query(query)
+    assert routed is not None
+    assert routed["count"] == count
+
+@pytest.mark.parametrize("query", [
+    "Who knows Python and has worked at Google?",
+    "Which Security Engineers hold CISSP and led an incident response team?",
+    "How many candidates know Python and live in Madrid?",
+    "Who is the best Python candidate?",
+    "Tell me about Ana"
+])
+def test_mixed_and_open_questions_go_to_retrieval(query):
+    assert route_query(query) is None
+
+def test_follow_up_narrows_the_previous_candidates():
+    routed = route_query("which of them hold CISSP?", sources=[record["source"] for record in RECORDS])
+    assert routed is not None
+    assert [result["metadata"]["x-amz-bedrock-kb-source-uri"] for result in routed["results"]] == [RECORDS[0]["source"]]
@@ -0,0 +1,138 @@
+import json
+import pytest
+from services import ranking_service
+from services.field_index import FieldIndex
+from services.ranking_service import document_field_rows, extract_job_skills, rank_candidates
+from services.vector_store import LocalVectorStore, build_local_index
+
+BUCKET_PREFIX = "s3://test-bucket/uploads/test/"
+
+RECORDS = [
+    {
+        "source": f"{BUCKET_PREFIX}ana.pdf", "name": "Ana Ruiz", "category": "Security Engineer",
+        "skills": ["Python", "AWS", "Terraform"], "certifications": ["Certified Information Systems Security Professional (CISSP)"],
+        "languages": {"Spanish": "Native"}, "positions": ["Security Engineer"], "education": [], "years_experience": 8
+    },
+    {
+        "source": f"{BUCKET_PREFIX}carl.pdf", "name": "Carl Diaz", "category": "Security Engineer",
+        "skills": ["Java"], "certifications": [], "languages": {"English": "Native"},
+        "positions": ["Security Engineer"], "education": [], "years_experience": 2
+    },
+    {
+        "source": f"{BUCKET_PREFIX}ben.pdf", "name": "Ben Stone", "category": "Data Scientist",
+        "skills": ["Python", "SQL"], "certifications": [], "languages": {"English": "Native"},
+        "positions": ["Data Scientist"], "education": [], "years_experience": 3
+    }
+]
+
+CHUNKS = [
+    {"text": "Cloud security engineer automating AWS with Python and Terraform", "source": f"{BUCKET_PREFIX}ana.pdf", "category": "Security Engineer"},
+    {"text": "Holds the CISSP certification and leads incident response", "source": f"{BUCKET_PREFIX}ana.pdf", "category": "Security Engineer"},
+    {"text": "Java developer moving into application security reviews", "source": f"{BUCKET_PREFIX}carl.pdf", "category": "Security Engineer"},
+    {"text": "Penetration tester without a field index record", "source": f"{BUCKET_PREFIX}dana.pdf", "category": "Security Engineer"},
+    {"text": "Data scientist building SQL pipelines and Python models", "source": f"{BUCKET_PREFIX}ben.pdf", "category": "Data Scientist"}
+]
+
+JOB = "Security engineer with Python, AWS and a CISSP certification to secure our cloud"
+
+def build_store(directory) -> LocalVectorStore:
+    chunks_path = directory / "chunks.jsonl"
+    chunks_path.write_text("".join(json.dumps(chunk) + "\n" for chunk in CHUNKS), encoding="utf-8")
+    build_local_index(str(chunks_path), str(directory / "index"), dim=256)
+    return LocalVectorStore(str(directory / "index"))
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = build_store(tmp_path)
+    monkeypatch.setattr(ranking_service, "get_local_vector_store", lambda: store)
+    return store
+
+@pytest.fixture
+def field_index(monkeypatch):
+    index = FieldIndex(RECORDS)
+    monkeypatch.setattr(ranking_service, "get_field_index", lambda: index)
+    return index
+
+def test_job_skills_are_the_skills_certifications_and_languages_it_names():
+    index = FieldIndex(RECORDS)
+    skills = extract_job_skills(index, "Python and AWS, Python again, Spanish, and a Data Scientist position")
+    assert skills == [("skills", "python"), ("skills", "aws"), ("languages", "spanish")]
+
+def test_candidates_holding_the_required_skills_rank_first(store, field_index):
+    result = rank_candidates(JOB, "Security Engineer", top_n=10)
+
+    assert result["total_candidates"] == 3
+    assert result["job_skills"] == ["Python", "AWS", "Certified Information Systems Security Professional (CISSP)"]
+    best = result["candidates"][0]
+    assert best["name"] == "Ana Ruiz"
+    assert best["skill_overlap"] == 1.0
+    assert best["matched_skills"] == result["job_skills"]
+    assert best["download_url"].startswith("https://")
+    assert [candidate["rank"] for candidate in result["candidates"]] == [1, 2, 3]
+    scores = [candidate["score"] for candidate in result["candidates"]]
+    assert scores == sorted(scores, reverse=True)
+    assert {candidate["category"] for candidate in result["candidates"]} == {"Security Engineer"}
+
+def test_cvs_missing_from_the_field_index_keep_their_file_name(store, field_index):
+    candidates = rank_candidates(JOB, "Security Engineer", top_n=10)["candidates"]
+    dana = next(candidate for candidate in candidates if candidate["filename"] == "dana.pdf")
+    assert dana["name"] == "dana.pdf"
+    assert dana["skill_overlap"] == 0.0 and dana["matched_skills"] == []
+
+def test_top_n_limits_the_candidates(store, field_index):
+    result = rank_candidates(JOB, "Security Engineer", top_n=1)
+    assert len(result["candidates"]) == 1
+    assert result["total_candidates"] == 3
+
+def test_without_a_field_index_cvs_are_ranked_by_similarity(store, monkeypatch):
+    monkeypatch.setattr(ranking_service, "get_field_index", lambda: None)
+    result = rank_candidates(JOB, "Security Engineer", top_n=10)
+
+    assert result["job_skills"] == []
+    for candidate in result["candidates"]:
+        assert candidate["score"] == candidate["similarity"]
+        assert candidate["skill_overlap"] == 0.0
+
+def test_unknown_category_has_no_candidates(store, field_index):
+    assert rank_candidates(JOB, "Legal Counsel") == {"candidates": [], "total_candidates": 0, "job_skills": [
+        "Python", "AWS", "Certified Information Systems Security Professional (CISSP)"
+    ]}
+
+def test_field_rows_are_rebuilt_for_a_reloaded_store_or_index(store, field_index):
+    rows = document_field_rows(store, field_index)
+    assert document_field_rows(store, field_index) is rows
+    # Dana is not in the field index, so she maps to the padding row
+    sources = [document["source"] for document in store.documents]
+    assert rows[sources.index(f"{BUCKET_PREFIX}dana.pdf")] == len(field_index)
+    assert rows[sources.index(f"{BUCKET_PREFIX}ben.pdf")] == 2
+
+    assert document_field_rows(LocalVectorStore(store.index_dir), field_index) is not rows
+    smaller = FieldIndex(RECORDS[2:])
+    assert document_field_rows(store, smaller)[sources.index(f"{BUCKET_PREFIX}ben.pdf")] == 0
+
+def test_rank_endpoint(api, store, field_index):
+    response = api.post("/api/rank", json={"job_description": JOB, "category": "Security Engineer", "top_n": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [candidate["name"] for candidate in body["candidates"]][0] == "Ana Ruiz"
+    assert len(body["candidates"]) == 2
+
+@pytest.mark.parametrize("top_n", [0, 10_000])
+def test_rank_endpoint_rejects_top_n_out_of_range(api, top_n):
+    response = api.post("/api/rank", json={"job_description": JOB, "category": "Security Engineer", "top_n": top_n})
+    assert response.status_code == 400
+
+def test_rank_endpoint_is_unavailable_without_a_local_index(api, monkeypatch):
+    def missing_index():
+        raise FileNotFoundError("No local index in 'local_index'")
+
+    monkeypatch.setattr(ranking_service, "get_local_vector_store", missing_index)
+    response = api.post("/api/rank", json={"job_description": JOB, "category": "Security Engineer"})
+    assert response.status_code == 503
+    assert "No local index" in response.json()["detail"]
+
+def test_rank_endpoint_is_unavailable_without_document_embeddings(api, store, field_index):
+    store.document_embeddings = None
+    response = api.post("/api/rank", json={"job_description": JOB, "category": "Security Engineer"})
+    assert response.status_code == 503
+    assert "rebuild it" in response.json()["detail"]
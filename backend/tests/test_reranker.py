@@ -0,0 +1,47 @@
+import pytest
+from services.reranker import bm25_scores, rerank
+
+def result(text: str, score: float) -> dict:
+    return {"content": {"text": text}, "metadata": {"x-amz-bedrock-kb-source-uri": f"s3://b/{text[:8]}.pdf"}, "score": score}
+
+def test_texts_with_rare_query_terms_score_higher():
+    scores = bm25_scores("kubernetes python", [
+        "python developer with python scripts",
+        "python and kubernetes operator",
+        "java developer"
+    ])
+    assert scores[1] > scores[0] > scores[2] == 0.0
+
+def test_terms_are_tokenized_like_the_index():
+    # "c++" and "c#" are single terms, as in the local index and the field index
+    scores = bm25_scores("C++", ["c++ engineer", "c engineer", "c# engineer"])
+    assert scores[0] > 0 and scores[1] == scores[2] == 0.0
+
+def test_no_query_terms_or_texts_score_nothing():
+    assert bm25_scores("", ["python"]) == [0.0]
+    assert bm25_scores("python", []) == []
+
+def test_lexical_matches_move_up_and_the_original_score_is_kept():
+    results = [result("java developer", 0.9), result("go developer", 0.85), result("terraform and aws engineer", 0.8)]
+    reranked = rerank("terraform aws", results, top_n=0, bm25_weight=0.6)
+
+    assert [item["content"]["text"] for item in reranked] == ["terraform and aws engineer", "java developer", "go developer"]
+    assert [item["kb_score"] for item in reranked] == [0.8, 0.9, 0.85]
+    assert [item["score"] for item in reranked] == [0.6, 0.4, 0.2]
+    assert results[0]["score"] == 0.9
+
+def test_top_n_keeps_the_best_results():
+    results = [result(f"candidate {i}", 1 - i / 10) for i in range(6)]
+    reranked = rerank("nothing in common", results, top_n=2)
+    assert [item["kb_score"] for item in reranked] == [1.0, 0.9]
+
+@pytest.mark.parametrize("bm25_weight", [0.0, 0.3, 1.0])
+def test_constant_scores_keep_the_knowledge_base_order(bm25_weight):
+    results = [result("python engineer", 0.5), result("python analyst", 0.5), result("python lead", 0.5)]
+    reranked = rerank("sql", results, top_n=0, bm25_weight=bm25_weight)
+
+    assert [item["content"]["text"] for item in reranked] == ["python engineer", "python analyst", "python lead"]
+    assert {item["score"] for item in reranked} == {0.0}
+
+def test_nothing_to_rerank():
+    assert rerank("python", []) == []
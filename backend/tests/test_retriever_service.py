@@ -0,0 +1,106 @@
+import asyncio
+import uuid
+from services import retriever_service
+from services.cache_service import query_cache
+from services.session_service import chat_sessions
+
+def collect(events) -> list:
+    async def consume():
+        return [event async for event in events]
+    return asyncio.run(consume())
+
+def test_repeated_question_is_served_from_the_cache(fake_bedrock):
+    runtime, agent = fake_bedrock
+    first = retriever_service.retriever_function("Who knows Kubernetes?", ["Data Scientist"])
+    calls = (runtime.calls, agent.calls)
+
+    second = retriever_service.retriever_function("  who KNOWS kubernetes? ", ["Data Scientist"])
+
+    assert second == first
+    assert (runtime.calls, agent.calls) == calls
+
+def test_cache_is_keyed_by_category(fake_bedrock):
+    runtime, _ = fake_bedrock
+    retriever_service.retriever_function("Who knows Terraform?", "Data Scientist")
+    retriever_service.retriever_function("Who knows Terraform?", "Security Engineer")
+    assert runtime.calls == 2
+
+def test_uploads_invalidate_the_cached_answers_of_their_category(fake_bedrock):
+    runtime, _ = fake_bedrock
+    retriever_service.retriever_function("Who knows Docker?", "Data Scientist")
+    query_cache.invalidate_category("Data Scientist")
+    retriever_service.retriever_function("Who knows Docker?", "Data Scientist")
+    assert runtime.calls == 2
+
+def test_stream_and_sync_answers_share_the_cache(fake_bedrock):
+    runtime, _ = fake_bedrock
+    events = collect(retriever_service.stream_retriever_function("Who knows React?", "Data Scientist"))
+    streamed = "".join(event["data"]["text"] for event in events if event["event"] == "token")
+
+    answer = retriever_service.retriever_function("Who knows React?", "Data Scientist")
+
+    assert runtime.calls == 1
+    assert answer["answer"].startswith(streamed)
+    assert events[-1]["event"] == "citations"
+
+def test_question_without_documents_is_recorded_in_its_session(fake_bedrock, monkeypatch):
+    runtime, agent = fake_bedrock
+    monkeypatch.setattr(agent, "retrieve", lambda **kwargs: {"retrievalResults": []})
+    session_id = uuid.uuid4().hex
+
+    result = retriever_service.retriever_function("Who knows COBOL?", session_id=session_id)
+    events = collect(retriever_service.stream_retriever_function("Who knows Fortran?", session_id=session_id))
+
+    assert result["answer"] == retriever_service.NO_DOCUMENTS_ANSWER
+    assert events[0]["data"]["text"] == retriever_service.NO_DOCUMENTS_ANSWER
+    assert runtime.calls == 0
+    turns = chat_sessions.get(session_id)["turns"]
+    assert [question for question, _ in turns] == ["Who knows COBOL?", "Who knows Fortran?"]
+
+def chunk(text: str, source: str, score: float) -> dict:
+    return {"content": {"text": text}, "metadata": {"x-amz-bedrock-kb-source-uri": source}, "score": score}
+
+def test_merged_categories_keep_their_relative_scores():
+    merged = retriever_service.merge_category_results({
+        "Data Scientist": [chunk("pandas", "s3://b/ana.pdf", 0.8), chunk("sql", "s3://b/ben.pdf", 0.6)],
+        "Legal Counsel": [chunk("contracts", "s3://b/cleo.pdf", 0.3), chunk("gdpr", "s3://b/dan.pdf", 0.2)]
+    })
+    assert [result["content"]["text"] for result in merged] == ["pandas", "sql", "contracts", "gdpr"]
+    assert merged[0]["score"] == 1.0 and merged[-1]["score"] == 0.0
+    assert [result["raw_score"] for result in merged] == [0.8, 0.6, 0.3, 0.2]
+
+def test_equal_scores_alternate_between_categories_by_rank():
+    merged = retriever_service.merge_category_results({
+        "Data Scientist": [chunk("a1", "s3://b/a1.pdf", 0.9), chunk("a2", "s3://b/a2.pdf", 0.5)],
+        "Legal Counsel": [chunk("b1", "s3://b/b1.pdf", 0.9), chunk("b2", "s3://b/b2.pdf", 0.5)]
+    })
+    assert [result["content"]["text"] for result in merged] == ["a1", "b1", "a2", "b2"]
+
+def test_a_chunk_returned_for_several_categories_is_kept_once_with_its_best_score():
+    merged = retriever_service.merge_category_results({
+        "Data Scientist": [chunk("python", "s3://b/ana.pdf", 0.4), chunk("sql", "s3://b/ben.pdf", 0.2)],
+        "Security Engineer": [chunk("python", "s3://b/ana.pdf", 0.7)]
+    })
+    assert [(result["content"]["text"], result["raw_score"]) for result in merged] == [("python", 0.7), ("sql", 0.2)]
+
+def test_merging_no_results_returns_nothing():
+    assert retriever_service.merge_category_results({"Data Scientist": [], "Legal Counsel": []}) == []
+
+def test_several_categories_are_searched_once_each(fake_bedrock):
+    _, agent = fake_bedrock
+    results = retriever_service.search_knowledge_base_categories("Who knows Python?", ["Data Scientist", "Legal Counsel"])
+
+    assert agent.calls == 2
+    assert list(results) == ["Data Scientist", "Legal Counsel"]
+    for category, category_results in results.items():
+        assert category_results
+        assert {result["metadata"]["category"] for result in category_results} == {category}
+
+def test_documents_of_several_categories_are_merged_into_one_context(fake_bedrock):
+    _, agent = fake_bedrock
+    retrieved = retriever_service.retrieve_documents("Who knows Python?", ["Data Scientist", "Legal Counsel", "Data Scientist"])
+
+    assert agent.calls == 2
+    assert {result["metadata"]["category"] for result in retrieved["candidates"]} == {"Data Scientist", "Legal Counsel"}
+    sources = [(result["metadata"]["x-amz-bedrock-kb-source-uri"], result["content"]["text"]) for result in retrieved["candidates"]]
+    assert len(sources) == len(set(sources))
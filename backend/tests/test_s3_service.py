@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import json
+import pytest
+from services.s3_service import MIN_PART_SIZE, S3Service
+from tests.conftest import AsyncBytesStream
+
+BUCKET = "test-bucket"
+
+def test_small_file_is_sent_in_one_put(s3):
+    service = S3Service(prefix="uploads/")
+    data = b"%PDF small file"
+    result = asyncio.run(service.upload_stream(AsyncBytesStream(data), "My CV.pdf", "application/pdf", "Data Scientist"))
+
+    assert result["s3_key"] == "uploads/my_cv.pdf"
+    assert s3.get_object(Bucket=BUCKET, Key="uploads/my_cv.pdf")["Body"].read() == data
+    sidecar = json.loads(s3.get_object(Bucket=BUCKET, Key="uploads/my_cv.pdf.metadata.json")["Body"].read())
+    assert sidecar == {"metadataAttributes": {"category": "Data Scientist"}}
+
+def test_large_file_is_sent_as_multipart_upload(s3):
+    service = S3Service(prefix="uploads/")
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 1000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    asyncio.run(service.upload_stream(
+        AsyncBytesStream(data), "big.pdf", "application/pdf", "Legal Counsel",
+        part_size=MIN_PART_SIZE, max_concurrency=2, sha256=sha256
+    ))
+
+    head = s3.head_object(Bucket=BUCKET, Key="uploads/big.pdf")
+    # Multipart ETags end with the number of parts
+    assert head["ETag"].strip('"').endswith("-3")
+    assert head["ContentLength"] == len(data)
+    assert head["Metadata"]["sha256"] == sha256
+    assert s3.get_object(Bucket=BUCKET, Key="uploads/big.pdf")["Body"].read() == data
+
+def test_failed_part_aborts_the_multipart_upload(s3):
+    service = S3Service(prefix="uploads/")
+    upload_part = service.s3_client.upload_part
+
+    def failing_upload_part(**kwargs):
+        if kwargs["PartNumber"] == 2:
+            raise RuntimeError("part failed")
+        return upload_part(**kwargs)
+
+    service.s3_client = type("Client", (), {})()
+    for name in ("put_object", "create_multipart_upload", "complete_multipart_upload", "abort_multipart_upload"):
+        setattr(service.s3_client, name, getattr(s3, name))
+    service.s3_client.upload_part = failing_upload_part
+
+    data = b"x" * (MIN_PART_SIZE * 3)
+    with pytest.raises(RuntimeError, match="part failed"):
+        asyncio.run(service.upload_stream(AsyncBytesStream(data), "broken.pdf", part_size=MIN_PART_SIZE, max_concurrency=1))
+
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    # Neither the object nor its sidecar is left behind
+    assert s3.list_objects_v2(Bucket=BUCKET).get("Contents", []) == []
+
+def test_failed_upload_keeps_the_sidecar_of_the_existing_object(s3):
+    service = S3Service(prefix="uploads/")
+    asyncio.run(service.upload_stream(AsyncBytesStream(b"%PDF v1"), "cv.pdf", "application/pdf", "Data Scientist"))
+
+    class BrokenStream(AsyncBytesStream):
+        async def read(self, size: int = -1) -> bytes:
+            raise ConnectionError("client disconnected")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(service.upload_stream(BrokenStream(b""), "cv.pdf", "application/pdf", "Legal Counsel"))
+
+    assert s3.get_object(Bucket=BUCKET, Key="uploads/cv.pdf")["Body"].read() == b"%PDF v1"
+    sidecar = json.loads(s3.get_object(Bucket=BUCKET, Key="uploads/cv.pdf.metadata.json")["Body"].read())
+    assert sidecar == {"metadataAttributes": {"category": "Data Scientist"}}
@@ -0,0 +1,54 @@
+import uuid
+import pytest
+from services.session_service import SessionStore, is_follow_up
+
+@pytest.mark.parametrize("query", [
+    "and which of them has AWS certs?",
+    "Which of them know Python?",
+    "Who among those has a master's degree?",
+    "Are the same ones available in Madrid?",
+    "what about Spanish?",
+    "Those with AWS certs?",
+    "¿Y cuáles de ellos hablan inglés?"
+])
+def test_explicit_references_are_follow_ups(query):
+    assert is_follow_up(query)
+
+@pytest.mark.parametrize("query", [
+    "Which candidates list their Java skills?",
+    "Does he have a degree in physics?",
+    "Show candidates whose manager praised her work",
+    "They say Rust is hard: who knows Rust?",
+    "And who knows Python and has worked at Google for at least five years?"
+])
+def test_pronouns_alone_start_a_new_question(query):
+    assert not is_follow_up(query)
+
+def make_session() -> tuple:
+    store = SessionStore(max_entries=10, ttl_seconds=60, history_turns=3)
+    session_id = uuid.uuid4().hex
+    citations = [{"source": "s3://test-bucket/uploads/test/cv_0001.pdf"}]
+    store.record(session_id, "Who knows Python?", None, "Candidate 1 knows Python.", citations, [{"content": {"text": "python"}}])
+    return store, session_id
+
+def test_store_follows_up_on_detected_references_only():
+    store, session_id = make_session()
+    assert store.follow_up(session_id, "and which of them know AWS?") is not None
+    assert store.follow_up(session_id, "Which candidates list their Java skills?") is None
+
+def test_client_flag_overrides_detection():
+    store, session_id = make_session()
+    assert store.follow_up(session_id, "Which ones know AWS?", follow_up=True) is not None
+    assert store.follow_up(session_id, "and which of them know AWS?", follow_up=False) is None
+
+def test_new_question_in_a_session_searches_the_knowledge_base(api, fake_bedrock):
+    _, agent = fake_bedrock
+    session_id = uuid.uuid4().hex
+    api.post("/api/chat", json={"message": "Who knows Python?", "session_id": session_id})
+    calls = agent.calls
+
+    api.post("/api/chat", json={"message": "and which of them know AWS?", "session_id": session_id})
+    assert agent.calls == calls
+
+    api.post("/api/chat", json={"message": "Which candidates list their Java skills?", "session_id": session_id})
+    assert agent.calls == calls + 1
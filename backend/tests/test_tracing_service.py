@@ -0,0 +1,70 @@
+import contextvars
+import logging
+import threading
+from services.tracing_service import (
+    TRACE_ID_HEADER, format_server_timing, record_stage_timing, stage_timings, stage_timings_var, stream_timing, trace_id_var
+)
+
+def server_timing_stages(header: str) -> dict:
+    return {entry.split(";dur=")[0]: float(entry.split(";dur=")[1]) for entry in header.split(", ")}
+
+def test_server_timing_lists_every_stage_in_milliseconds():
+    assert format_server_timing({"retrieve": 12.345, "generate": 512}) == "retrieve;dur=12.3, generate;dur=512.0"
+    assert format_server_timing({}) == ""
+
+def test_stage_timings_are_recorded_only_inside_a_request():
+    record_stage_timing("retrieve", 1.0)
+    assert stage_timings() == {}
+
+    def request():
+        stage_timings_var.set({})
+        trace_id_var.set("abc")
+        record_stage_timing("retrieve", 0.010)
+        record_stage_timing("retrieve", 0.005)
+        return stream_timing()
+
+    assert contextvars.copy_context().run(request) == {"trace_id": "abc", "stages": {"retrieve": 15.0}}
+
+def test_stages_recorded_from_several_threads_are_all_summed():
+    def request():
+        stage_timings_var.set({})
+
+        def work():
+            for _ in range(1000):
+                record_stage_timing("retrieve", 0.001)
+
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(work,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stage_timings()
+
+    assert round(contextvars.copy_context().run(request)["retrieve"]) == 8000
+
+def test_responses_carry_a_trace_id_and_the_stage_timings(api):
+    response = api.post("/api/chat", json={"message": "Who knows Python?", "category": "Data Scientist"})
+
+    assert response.status_code == 200
+    trace_id = response.headers[TRACE_ID_HEADER]
+    assert len(trace_id) == 16
+    stages = server_timing_stages(response.headers["server-timing"])
+    assert {"retrieve", "generate", "total"} <= set(stages)
+    assert stages["total"] >= stages["generate"]
+
+def test_a_valid_incoming_trace_id_is_kept_and_an_invalid_one_replaced(api):
+    kept = api.get("/api/chat/cache/stats", headers={TRACE_ID_HEADER: "client-trace.42"})
+    assert kept.headers[TRACE_ID_HEADER] == "client-trace.42"
+
+    replaced = api.get("/api/chat/cache/stats", headers={TRACE_ID_HEADER: "bad id\nforged log line"})
+    assert replaced.headers[TRACE_ID_HEADER] != "bad id\nforged log line"
+    assert len(replaced.headers[TRACE_ID_HEADER]) == 16
+
+def test_log_lines_of_a_request_carry_its_trace_id(api, caplog):
+    with caplog.at_level(logging.INFO):
+        response = api.post("/api/chat", json={"message": "Who knows Python?"}, headers={TRACE_ID_HEADER: "trace-123"})
+
+    assert response.headers[TRACE_ID_HEADER] == "trace-123"
+    retrieval_logs = [record for record in caplog.records if record.getMessage().startswith("Retrieving documents")]
+    assert retrieval_logs
+    assert {record.trace_id for record in retrieval_logs} == {"trace-123"}
@@ -0,0 +1,96 @@
+import io
+import json
+import uuid
+import zipfile
+
+BUCKET = "test-bucket"
+
+def unique_pdf() -> bytes:
+    # Unique content, so the content hash index never answers with an earlier test's file
+    return b"%PDF-1.4 " + uuid.uuid4().bytes
+
+def make_zip(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def test_bulk_file_without_category_is_reported_not_failed_as_a_whole(api, s3):
+    response = api.post("/api/upload/bulk", files=[
+        ("files", ("a.pdf", unique_pdf(), "application/pdf")),
+        ("files", ("b.pdf", unique_pdf(), "application/pdf"))
+    ], data={"category_mapping": json.dumps({"a.pdf": "Legal Counsel"})})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uploaded"] == 1 and body["failed"] == 1
+    missing = next(item for item in body["results"] if item["filename"] == "b.pdf")
+    assert missing["status"] == "failed"
+    assert missing["category"] is None
+    assert missing["error"] == "No category provided for this file"
+
+def test_zip_members_with_the_same_name_in_different_folders_are_both_kept(api, s3):
+    legal, security = unique_pdf(), unique_pdf()
+    archive = make_zip({"Legal Counsel/cv.pdf": legal, "Security Engineer/cv.pdf": security})
+    mapping = {"Legal Counsel": "Legal Counsel", "Security Engineer": "Security Engineer"}
+    response = api.post(
+        "/api/upload/bulk",
+        files={"archive": ("cvs.zip", archive, "application/zip")},
+        data={"category_mapping": json.dumps(mapping)}
+    )
+
+    assert response.status_code == 200
+    results = {item["category"]: item for item in response.json()["results"]}
+    assert results["Legal Counsel"]["status"] == results["Security Engineer"]["status"] == "uploaded"
+    assert results["Legal Counsel"]["file_id"] != results["Security Engineer"]["file_id"]
+    assert s3.get_object(Bucket=BUCKET, Key=results["Legal Counsel"]["file_id"])["Body"].read() == legal
+    assert s3.get_object(Bucket=BUCKET, Key=results["Security Engineer"]["file_id"])["Body"].read() == security
+
+def test_files_with_the_same_name_are_rejected_instead_of_overwritten(api, s3):
+    response = api.post("/api/upload/bulk", files=[
+        ("files", ("cv.pdf", unique_pdf(), "application/pdf")),
+        ("files", ("CV.pdf", unique_pdf(), "application/pdf"))
+    ], data={"category": "Legal Counsel"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uploaded"] == 0 and body["failed"] == 2
+    assert all("also named 'cv.pdf'" in item["error"] for item in body["results"])
+
+def upload(api, filename: str, data: bytes):
+    return api.post(
+        "/api/upload",
+        files={"file": (filename, data, "application/pdf")},
+        data={"category": "Legal Counsel"}
+    )
+
+def test_identical_upload_is_reported_as_duplicate(api, s3):
+    data = unique_pdf()
+    first = upload(api, "first.pdf", data).json()
+    second = upload(api, "second.pdf", data).json()
+
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["file_id"] == first["file_id"]
+
+def test_content_overwritten_under_the_same_name_is_uploaded_again(api, s3):
+    a, b = unique_pdf(), unique_pdf()
+    key = upload(api, "overwritten.pdf", a).json()["file_id"]
+    assert upload(api, "overwritten.pdf", b).json()["duplicate"] is False
+
+    again = upload(api, "overwritten.pdf", a).json()
+
+    assert again["duplicate"] is False
+    assert again["file_id"] == key
+    assert s3.get_object(Bucket=BUCKET, Key=key)["Body"].read() == a
+
+def test_deleted_object_is_uploaded_again(api, s3):
+    data = unique_pdf()
+    key = upload(api, "deleted.pdf", data).json()["file_id"]
+    s3.delete_object(Bucket=BUCKET, Key=key)
+
+    again = upload(api, "deleted.pdf", data).json()
+
+    assert again["duplicate"] is False
+    assert s3.get_object(Bucket=BUCKET, Key=key)["Body"].read() == data
@@ -0,0 +1,96 @@
+import json
+import numpy as np
+import pytest
+from services.vector_store import HashingEmbedder, LocalVectorStore, build_local_index, tokenize
+
+CHUNKS = [
+    {"text": "Python developer building data pipelines with pandas", "source": "cvs/ana.pdf", "category": "Data Scientist", "page": 1},
+    {"text": "Machine learning models in Python and SQL", "source": "cvs/ana.pdf", "category": "Data Scientist", "page": 2},
+    {"text": "Contract law, GDPR compliance and negotiation", "source": "cvs/cleo.pdf", "category": "Legal Counsel", "page": 1},
+    {"text": "Penetration testing, CISSP and incident response", "source": "cvs/dan.pdf", "category": "Security Engineer", "page": 1},
+    {"text": "Statistics and Python notebooks for forecasting", "source": "cvs/ben.pdf", "category": "Data Scientist", "page": 1},
+    {"text": "Privacy law and GDPR audits", "source": "cvs/eva.pdf", "page": 1}
+]
+
+def write_chunks(path, chunks) -> str:
+    path.write_text("".join(json.dumps(chunk) + "\n" for chunk in chunks), encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def store(tmp_path) -> LocalVectorStore:
+    # A small batch size, so the embeddings are written in several batches
+    build_local_index(write_chunks(tmp_path / "chunks.jsonl", CHUNKS), str(tmp_path / "index"), dim=512, batch_size=2)
+    return LocalVectorStore(str(tmp_path / "index"))
+
+def test_tokens_keep_programming_language_names():
+    assert tokenize("C++, C# and Python 3!") == ["c++", "c#", "and", "python", "3"]
+
+def test_embeddings_are_normalized_and_deterministic():
+    embedder = HashingEmbedder(256)
+    vectors = embedder.embed(["Python developer", "Python developer", "contract law", ""])
+
+    assert vectors.shape == (4, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    # Text without tokens embeds to zeros rather than NaN
+    assert not vectors[3].any()
+    assert np.array_equal(vectors[0], vectors[1])
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+def test_index_lists_categories_and_contiguous_document_ranges(tmp_path):
+    info = build_local_index(write_chunks(tmp_path / "chunks.jsonl", CHUNKS), str(tmp_path / "index"), dim=512)
+    store = LocalVectorStore(str(tmp_path / "index"))
+
+    assert info["count"] == 6 and info["documents"] == 5
+    assert info["categories"] == ["Data Scientist", "Legal Counsel", "Security Engineer", "Uncategorized"]
+    assert store.embeddings.shape == (6, 512)
+    assert store.document_embeddings.shape == (5, 512)
+    for category, (start, end) in info["document_ranges"].items():
+        assert {document["category"] for document in store.documents[start:end]} == {category}
+    start, end = info["document_ranges"]["Data Scientist"]
+    assert sorted(document["source"] for document in store.documents[start:end]) == ["cvs/ana.pdf", "cvs/ben.pdf"]
+
+def test_search_returns_knowledge_base_shaped_results_best_first(store):
+    results = store.search("GDPR compliance", top_k=2)
+
+    assert [result["metadata"]["x-amz-bedrock-kb-source-uri"] for result in results] == ["cvs/cleo.pdf", "cvs/eva.pdf"]
+    assert results[0]["content"]["text"] == CHUNKS[2]["text"]
+    assert results[0]["metadata"]["category"] == "Legal Counsel"
+    assert results[0]["metadata"]["x-amz-bedrock-kb-document-page-number"] == 1
+    assert results[0]["score"] >= results[1]["score"]
+
+def test_search_filters_by_category(store):
+    results = store.search("Python", category="Data Scientist", top_k=10)
+    assert len(results) == 3
+    assert {result["metadata"]["category"] for result in results} == {"Data Scientist"}
+    assert store.search("Python", category="Product Manager") == []
+
+def test_search_of_several_categories_gives_each_its_own_top_k(store):
+    results = store.search_categories("GDPR and Python", ["Data Scientist", "Legal Counsel", "Product Manager"], top_k=1)
+
+    assert list(results) == ["Data Scientist", "Legal Counsel", "Product Manager"]
+    assert [result["metadata"]["category"] for result in results["Data Scientist"]] == ["Data Scientist"]
+    assert [result["metadata"]["category"] for result in results["Legal Counsel"]] == ["Legal Counsel"]
+    assert results["Product Manager"] == []
+    assert results["Legal Counsel"] == store.search("GDPR and Python", category="Legal Counsel", top_k=1)
+
+def test_documents_of_a_category_are_scored_against_a_text(store):
+    start, scores = store.score_documents("Python pandas pipelines", "Data Scientist")
+    sources = [document["source"] for document in store.documents[start:start + len(scores)]]
+
+    assert sorted(sources) == ["cvs/ana.pdf", "cvs/ben.pdf"]
+    assert sources[int(np.argmax(scores))] == "cvs/ana.pdf"
+    assert len(store.score_documents("Python", "Product Manager")[1]) == 0
+
+def test_index_without_document_embeddings_cannot_score_documents(store):
+    store.document_embeddings = None
+    with pytest.raises(ValueError):
+        store.score_documents("Python", "Data Scientist")
+
+def test_empty_corpus(tmp_path):
+    info = build_local_index(write_chunks(tmp_path / "chunks.jsonl", []), str(tmp_path / "index"), dim=64)
+    store = LocalVectorStore(str(tmp_path / "index"))
+
+    assert info == {"dim": 64, "count": 0, "categories": [], "documents": 0, "document_ranges": {}}
+    assert store.search("Python") == []
+    assert store.search_categories("Python", ["Data Scientist"]) == {"Data Scientist": []}
+    assert store.score_documents("Python", "Data Scientist")[1].shape == (0,)
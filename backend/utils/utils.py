@@ -1,9 +1,8 @@
 import re
-import boto3
+import hashlib
 import logging
 import json
 from typing import Dict
-from config.settings import AWS_REGION
 
 logger = logging.getLogger(__name__)
 
@@ -48,11 +47,12 @@ def extract_filename_from_uri(s3_uri: str) -> str:
         logger.exception("Error extracting filename from URI.")
         return "document"
 
-def generate_presigned_url(s3_uri: str, expiration: int = 3600) -> str:
+def generate_presigned_url(s3_client, s3_uri: str, expiration: int = 3600) -> str:
     """
     Generates a pre-signed URL for downloading an S3 document.
     
     Args:
+        s3_client: The S3 client that signs the URL (signing is local, no request is made).
         s3_uri: The S3 URI (e.g., s3://bucket-name/path/to/file.pdf).
         expiration: The expiration time in seconds (default: 1 hour).
     
@@ -71,7 +71,6 @@ def generate_presigned_url(s3_uri: str, expiration: int = 3600) -> str:
         key = parts[1] if len(parts) > 1 else ''
         
         # Generate pre-signed URL
-        s3_client = boto3.client('s3', region_name=AWS_REGION)
         url = s3_client.generate_presigned_url(
             'get_object',
             Params={'Bucket': bucket, 'Key': key},
@@ -84,3 +83,37 @@ def generate_presigned_url(s3_uri: str, expiration: int = 3600) -> str:
     except Exception as e:
         logger.exception(f"Error generating pre-signed URL for {s3_uri}")
         return None
+
+def format_sse(event: str, data: Dict) -> str:
+    """
+    Formats an event as a server-sent events (SSE) message.
+
+    Args:
+        event (str): The event name (e.g., "token").
+        data (dict): The JSON-serializable event payload.
+
+    Returns:
+        str: The SSE message, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def compute_sha256_async(stream, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Computes the SHA-256 of an async stream, reading it in chunks so memory use stays constant.
+
+    The stream is left at its end; rewind it with `seek(0)` before reading it again.
+
+    Args:
+        stream: An object with an async `read(size)` method (e.g., FastAPI's `UploadFile`).
+        chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    while True:
+        data = await stream.read(chunk_size)
+        if not data:
+            break
+        digest.update(data)
+    return digest.hexdigest()
@@ -10,14 +10,17 @@ st.set_page_config(page_title="CV Knowledge Assistant", page_icon="🧠", layout
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to:", ["Home", "Upload CV", "Chat"])
 
-# Initialize selected_role for Chat page
-selected_role = None
+# Initialize selected_roles for Chat page
+selected_roles = []
 
 if page == "Chat":
-    # Chat page specific role selection
-    st.sidebar.markdown("### Select Category to Ask About:")
+    # Chat page specific role selection (several roles can be asked about at once)
+    st.sidebar.markdown("### Select Categories to Ask About:")
     if ROLES:
-        selected_role = st.sidebar.selectbox("Select Category to Ask About", ROLES)
+        selected_roles = st.sidebar.multiselect(
+            "Select Categories to Ask About", ROLES, default=ROLES[:1],
+            help="Leave empty to ask about every category."
+        )
     else:
         st.sidebar.warning("No roles available for selection. Please check configuration.")
 
@@ -28,7 +31,4 @@ if page == "Home":
 elif page == "Upload CV":
     render_upload()
 elif page == "Chat":
-    if selected_role:
-        render_chat(selected_role)
-    else:
-        st.warning("Please select a role to continue with the Chat.")
+    render_chat(selected_roles)
@@ -7,6 +7,7 @@ load_dotenv()
 # API URLs
 UPLOAD_URL = os.getenv("UPLOAD_URL", "http://localhost:8000/api/upload")  # Default to local if not set
 CHAT_URL = os.getenv("CHAT_URL", "http://localhost:8000/api/chat")      # Default to local if not set
+CHAT_STREAM_URL = os.getenv("CHAT_STREAM_URL", "http://localhost:8000/api/chat/stream")  # Streaming (SSE) chat endpoint
 
 # Available roles in the system
 ROLES = [
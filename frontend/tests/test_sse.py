@@ -0,0 +1,25 @@
+from ui.sse import iter_sse_events
+
+def test_events_are_split_on_blank_lines():
+    lines = [
+        "event: token", 'data: {"text": "Hello "}', "",
+        "event: token", 'data: {"text": "world"}', "",
+        "event: citations", 'data: {"citations": []}', ""
+    ]
+    assert list(iter_sse_events(lines)) == [
+        ("token", {"text": "Hello "}),
+        ("token", {"text": "world"}),
+        ("citations", {"citations": []})
+    ]
+
+def test_multiline_data_and_default_event_name():
+    lines = ['data: {"text":', 'data: "split"}', ""]
+    assert list(iter_sse_events(lines)) == [("message", {"text": "split"})]
+
+def test_last_event_without_trailing_blank_line_is_yielded():
+    lines = ["", "event: timing", 'data: {"trace_id": "abc"}']
+    assert list(iter_sse_events(lines)) == [("timing", {"trace_id": "abc"})]
+
+def test_event_name_does_not_leak_into_the_next_event():
+    lines = ["event: error", 'data: {"detail": "boom"}', "", 'data: {"text": "next"}', ""]
+    assert list(iter_sse_events(lines)) == [("error", {"detail": "boom"}), ("message", {"text": "next"})]
@@ -1,12 +1,18 @@
+import uuid
 import streamlit as st
 import requests
-from config import CHAT_URL
+from config import CHAT_STREAM_URL
+from ui.debug import render_timing_debug
+from ui.sse import iter_sse_events
 
-def render_chat(selected_role):
+def render_chat(selected_roles):
     st.title("💬 Chat Assistant")
 
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # The backend keeps the retrieved chunks of this conversation, so follow-up questions reuse them
+    if "chat_session_id" not in st.session_state:
+        st.session_state.chat_session_id = uuid.uuid4().hex
 
 
     # Render chat history
@@ -15,20 +21,43 @@ def render_chat(selected_role):
 
     user_input = st.chat_input("Ask a question...")
 
-    if user_input and selected_role:
+    if user_input:
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         with st.chat_message("user"):
             st.markdown(user_input)
 
-        payload = {"message": user_input, "category": selected_role}
-
-        with st.spinner("Thinking..."):
-            response = requests.post(CHAT_URL, json=payload)
-
-        if response.status_code == 200:
-            answer = response.json().get("response", "")
-            st.session_state.chat_history.append({"role": "assistant", "content": answer})
-            with st.chat_message("assistant"):
-                st.markdown(answer)
-        else:
-            st.error("❌ Error contacting backend")
+        # No selected role searches every category
+        payload = {"message": user_input, "categories": selected_roles, "session_id": st.session_state.chat_session_id}
+
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            placeholder.markdown("Thinking...")
+            answer = ""
+            timing = {}
+            try:
+                with requests.post(CHAT_STREAM_URL, json=payload, stream=True) as response:
+                    if response.status_code != 200:
+                        placeholder.empty()
+                        st.error("❌ Error contacting backend")
+                        return
+
+                    # Render tokens as they arrive
+                    for event, data in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                        if event == "token":
+                            answer += data["text"]
+                            placeholder.markdown(answer + "▌")
+                        elif event == "citations":
+                            answer += data["markdown"]
+                        elif event == "timing":
+                            timing = data
+                        elif event == "error":
+                            st.error("❌ Error generating the answer")
+            except requests.RequestException:
+                placeholder.empty()
+                st.error("❌ Error contacting backend")
+                return
+
+            placeholder.markdown(answer)
+            render_timing_debug(timing.get("trace_id"), timing.get("stages"))
+
+        st.session_state.chat_history.append({"role": "assistant", "content": answer})
@@ -0,0 +1,22 @@
+import streamlit as st
+
+def parse_server_timing(header):
+    """Parses a `Server-Timing` header (e.g. `retrieve;dur=12.3, generate;dur=512.0`) into {stage: ms}."""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            if name and param.startswith("dur="):
+                try:
+                    timings[name] = float(param[len("dur="):])
+                except ValueError:
+                    pass
+    return timings
+
+def render_timing_debug(trace_id, timings):
+    """Shows the trace ID and the per-stage timing breakdown of a request in a collapsed expander."""
+    if not timings:
+        return
+    with st.expander("🔍 Debug: timing breakdown"):
+        st.caption(f"Trace ID: `{trace_id}`")
+        st.table([{"Stage": stage, "Duration (ms)": round(duration, 1)} for stage, duration in timings.items()])
@@ -0,0 +1,17 @@
+import json
+
+def iter_sse_events(lines):
+    """Parses server-sent events from an iterable of text lines and yields (event, data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            # A blank line terminates the current event
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].lstrip())
+    if data:
+        yield event, json.loads("\n".join(data))
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 from config import UPLOAD_URL, ROLES
+from ui.debug import parse_server_timing, render_timing_debug
 
 def render_upload():
     st.title("📤 Upload CV")
@@ -24,5 +25,9 @@ def render_upload():
                         st.success("✅ CV uploaded successfully!")
                     else:
                         st.error("❌ Failed to upload CV")
+                    render_timing_debug(
+                        response.headers.get("X-Trace-Id"),
+                        parse_server_timing(response.headers.get("Server-Timing"))
+                    )
                 except Exception as e:
                     st.error("❌ Failed to upload CV")